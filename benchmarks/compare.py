@@ -0,0 +1,100 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Numeric metrics are matched by their path in the JSON document. Throughput
+metrics (`*_rps`, `*ops*`) regress when they go down; everything else
+(latency, seconds, queries, RSS) regresses when it goes up. `meta` is
+ignored. Exits with status 1 when any metric regresses by more than the
+threshold, so the script can gate CI.
+
+Usage:
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import re
+import sys
+
+HIGHER_IS_BETTER = ('_rps', 'ops')
+IGNORED = ('meta', 'status_counts')
+
+
+def flatten(document, prefix=''):
+    """Map dotted metric paths to their numeric values."""
+    metrics = {}
+    for key, value in document.items():
+        if key in IGNORED:
+            continue
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f'{path}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[path] = value
+    return metrics
+
+
+def higher_is_better(path):
+    return any(marker in path.rsplit('.', 1)[-1] for marker in HIGHER_IS_BETTER)
+
+
+def compare(before, after, threshold, pattern=None):
+    """
+    Compare two flattened result sets.
+
+    Args:
+        pattern (str): Only compare metrics whose path matches this regex.
+
+    Returns:
+        list: `(path, before, after, change_percent, regressed)` rows.
+    """
+    rows = []
+    for path in sorted(before.keys() & after.keys()):
+        if pattern and not re.search(pattern, path):
+            continue
+        old, new = before[path], after[path]
+        if old == 0:
+            change = 0.0 if new == 0 else float('inf')
+        else:
+            change = (new - old) / abs(old) * 100
+        worse = -change if higher_is_better(path) else change
+        rows.append((path, old, new, change, worse > threshold))
+    return rows
+
+
+def report(rows, threshold):
+    """
+    Print comparison rows.
+
+    Returns:
+        int: The number of regressed metrics.
+    """
+    width = max((len(row[0]) for row in rows), default=10)
+    for path, old, new, change, regressed in rows:
+        print(f'{path:<{width}}  {old:>14.3f}  {new:>14.3f}  {change:>+9.1f}%  {"REGRESSION" if regressed else ""}')
+
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(f'\n{regressions} metric(s) regressed by more than {threshold:g}%')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Allowed regression in percent (default: 10)')
+    parser.add_argument('--metrics', help=r'Only compare metrics matching this regex, e.g. "median_ms$"')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = flatten(json.load(f))
+    with open(args.after) as f:
+        after = flatten(json.load(f))
+
+    if report(compare(before, after, args.threshold, args.metrics), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark participant IP storage: packed 16-byte keys against text.
+
+Fills two copies of the `(raffle_id, participant_ip)` unique index that
+`has_already_participated` and every claim hit, one with the IPs as text
+(the former `GenericIPAddressField`) and one packed (`PackedIPAddressField`),
+then reports each index's size and the latency of participation lookups,
+half of them for IPs that took part and half for ones that did not.
+
+Index sizes are read from `dbstat` on SQLite and `pg_relation_size` on
+PostgreSQL.
+
+Usage:
+    python -m benchmarks.ip_storage --participants 5000000
+"""
+import argparse
+import ipaddress
+import json
+import random
+import time
+import uuid
+
+from .utils import create_benchmark_db, destroy_benchmark_db, setup_django, time_call
+
+IPV6_SHARE = 0.2
+LOOKUPS = 2000
+
+
+def random_ips(count, rng):
+    """Distinct participant IPs, a fifth of them IPv6."""
+    ips = set()
+    while len(ips) < count:
+        if rng.random() < IPV6_SHARE:
+            ips.add(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+        else:
+            ips.add(str(ipaddress.IPv4Address(rng.getrandbits(32))))
+    return list(ips)
+
+
+def create_table(cursor, name, column_type):
+    cursor.execute(f'DROP TABLE IF EXISTS {name}')
+    cursor.execute(f'CREATE TABLE {name} (id integer PRIMARY KEY, raffle_id char(32) NOT NULL, '
+                   f'participant_ip {column_type} NOT NULL)')
+
+
+def index_size(cursor, vendor, name):
+    """Size of an index in bytes, or None where it cannot be measured."""
+    if vendor == 'sqlite':
+        cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [name])
+        return cursor.fetchone()[0]
+    if vendor == 'postgresql':
+        cursor.execute('SELECT pg_relation_size(%s)', [name])
+        return cursor.fetchone()[0]
+    return None
+
+
+def run(participant_count, repeat, batch_size=50000):
+    from django.db import connection
+    from raffle.fields import PackedIPAddressField, pack_ip
+
+    rng = random.Random(42)
+    raffle_id = uuid.uuid4().hex
+    ips = random_ips(participant_count, rng)
+    absent = random_ips(LOOKUPS // 2, random.Random(7))
+    lookups = rng.sample(ips, LOOKUPS // 2) + absent
+    rng.shuffle(lookups)
+
+    layouts = {
+        'text': ('varchar(39)', lambda ip: ip),
+        'packed': (PackedIPAddressField().db_type(connection), pack_ip),
+    }
+    results = {'participants': participant_count, 'vendor': connection.vendor, 'layouts': {}}
+    print(f'{"layout":<10}{"load s":>10}{"index MB":>12}{"bytes/row":>12}{"lookup us":>12}')
+    for name, (column_type, convert) in layouts.items():
+        table, index = f'bench_ip_{name}', f'bench_ip_{name}_idx'
+        with connection.cursor() as cursor:
+            create_table(cursor, table, column_type)
+            start = time.perf_counter()
+            for offset in range(0, participant_count, batch_size):
+                cursor.executemany(
+                    f'INSERT INTO {table} (raffle_id, participant_ip) VALUES (%s, %s)',
+                    [(raffle_id, convert(ip)) for ip in ips[offset:offset + batch_size]],
+                )
+            cursor.execute(f'CREATE UNIQUE INDEX {index} ON {table} (raffle_id, participant_ip)')
+            load_seconds = time.perf_counter() - start
+            size = index_size(cursor, connection.vendor, index)
+
+            query = f'SELECT 1 FROM {table} WHERE raffle_id = %s AND participant_ip = %s'
+
+            def lookup_all():
+                for ip in lookups:
+                    cursor.execute(query, [raffle_id, convert(ip)])
+                    cursor.fetchone()
+
+            timing = time_call(lookup_all, repeat)
+            cursor.execute(f'DROP TABLE {table}')
+
+        per_lookup = timing['median'] / len(lookups)
+        results['layouts'][name] = {'load_seconds': load_seconds, 'index_bytes': size,
+                                    'lookup_seconds': per_lookup}
+        print(f'{name:<10}{load_seconds:>10.1f}{(size or 0) / 2**20:>12.1f}'
+              f'{(size or 0) / participant_count:>12.1f}{per_lookup * 1e6:>12.1f}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=5000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    setup_django()
+    old_name = create_benchmark_db()
+    try:
+        results = run(args.participants, args.repeat)
+    finally:
+        destroy_benchmark_db(old_name)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+End-to-end load test for the raffle API.
+
+Drives the whole raffle lifecycle, create -> mass participate -> draw ->
+mass verify, and reports for every phase the throughput, p50/p95/p99
+latency, SQL queries and peak RSS. Results can be written as JSON and diffed
+between commits with `python -m benchmarks.compare`.
+
+Requests go either through the test suite's `RaffleClient` in this process
+(`--mode inprocess`, the default) or over HTTP to a `benchmarks.server`
+started on a throwaway database (`--mode http`). Both modes run with thread
+workers; HTTP mode can also use process workers.
+
+Usage:
+    python -m benchmarks.load --tickets 1000
+    python -m benchmarks.load --tickets 100000 --mode http --workers 16 --worker-type process --json after.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .utils import latency_summary, read_peak_rss_kb, reset_peak_rss, setup_django
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+
+class InProcessTarget:
+    """Sends requests through the test suite's `RaffleClient`."""
+
+    def __init__(self):
+        from testing.conftest import RaffleClient
+
+        self.client = RaffleClient()
+
+    def request(self, method, path, data=None, ip=None):
+        from django.db import connection
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            resp = getattr(self.client, method)(path, data=data, REMOTE_ADDR=ip or '127.0.0.1')
+        body = resp.json() if resp.get('Content-Type', '').startswith('application/json') else None
+        return resp.status_code, body, queries
+
+
+class HttpTarget:
+    """Sends requests over HTTP to a `benchmarks.server`."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None, ip=None):
+        from .server import QUERIES_HEADER
+
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if data is not None else b'',
+            method=method.upper(),
+            headers={
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+                'X-Bench-Client-IP': ip or '127.0.0.1',
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as resp:
+                status, raw, headers = resp.status, resp.read(), resp.headers
+        except urllib.error.HTTPError as e:
+            status, raw, headers = e.code, e.read(), e.headers
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            body = None
+        return status, body, int(headers.get(QUERIES_HEADER, 0))
+
+
+def run_job(target, job):
+    """
+    Run one request.
+
+    Returns:
+        tuple: `(latency_seconds, status, queries, body)`; the body is only
+            kept for jobs marked with `keep`.
+    """
+    start = time.perf_counter()
+    status, body, queries = target.request(job['method'], job['path'], job.get('data'), job.get('ip'))
+    return time.perf_counter() - start, status, queries, body if job.get('keep') else None
+
+
+_process_target = None
+
+
+def _run_http_job(base_url, job):
+    global _process_target
+    if _process_target is None:
+        _process_target = HttpTarget(base_url)
+    return run_job(_process_target, job)
+
+
+class LoadTest:
+    """Runs the raffle lifecycle scenario and collects per-phase metrics."""
+
+    def __init__(self, mode, workers, worker_type, base_url=None, server_pid=None):
+        self.mode = mode
+        self.workers = workers
+        self.worker_type = worker_type
+        self.base_url = base_url
+        self.server_pid = server_pid
+        self.local = threading.local()
+
+    def make_target(self):
+        if self.mode == 'http':
+            return HttpTarget(self.base_url)
+        return InProcessTarget()
+
+    def thread_target(self):
+        if not hasattr(self.local, 'target'):
+            self.local.target = self.make_target()
+        return self.local.target
+
+    def execute(self, jobs):
+        if self.workers <= 1:
+            target = self.make_target()
+            return [run_job(target, job) for job in jobs]
+        if self.worker_type == 'process':
+            from functools import partial
+
+            chunksize = max(1, len(jobs) // (self.workers * 16))
+            with multiprocessing.get_context('fork').Pool(self.workers) as pool:
+                return pool.map(partial(_run_http_job, self.base_url), jobs, chunksize=chunksize)
+        with ThreadPoolExecutor(self.workers) as pool:
+            return list(pool.map(lambda job: run_job(self.thread_target(), job), jobs))
+
+    def phase(self, name, jobs, expected_status):
+        """
+        Run a list of jobs as one phase.
+
+        Returns:
+            tuple: `(metrics, results)`.
+        """
+        rss_pid = self.server_pid if self.mode == 'http' else 'self'
+        reset_peak_rss(rss_pid)
+        start = time.perf_counter()
+        results = self.execute(jobs)
+        elapsed = time.perf_counter() - start
+
+        statuses = Counter(result[1] for result in results)
+        queries = sum(result[2] for result in results)
+        metrics = {
+            'requests': len(results),
+            'errors': sum(count for status, count in statuses.items() if status != expected_status),
+            'status_counts': {str(status): count for status, count in sorted(statuses.items())},
+            'seconds': round(elapsed, 3),
+            'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+            'latency_ms': latency_summary([result[0] for result in results]),
+            'queries': queries,
+            'queries_per_request': round(queries / len(results), 2) if results else None,
+            'peak_rss_kb': read_peak_rss_kb(rss_pid),
+        }
+        print(f'{name:<12}{metrics["requests"]:>9}{metrics["errors"]:>8}{metrics["throughput_rps"] or 0:>12.1f}'
+              f'{metrics["latency_ms"]["p50"] or 0:>10.2f}{metrics["latency_ms"]["p95"] or 0:>10.2f}'
+              f'{metrics["latency_ms"]["p99"] or 0:>10.2f}{metrics["queries_per_request"] or 0:>10.2f}'
+              f'{(metrics["peak_rss_kb"] or 0) / 1024:>10.1f}')
+        return metrics, results
+
+    def run(self, tickets, verify):
+        from testing.conftest import DEFAULT_RAFFLE, MANAGER_IP, IncrementingIpFactory
+
+        print(f'{"phase":<12}{"requests":>9}{"errors":>8}{"req/s":>12}{"p50 ms":>10}{"p95 ms":>10}'
+              f'{"p99 ms":>10}{"q/req":>10}{"rss MiB":>10}')
+        phases = {}
+
+        phases['create'], results = self.phase('create', [{
+            'method': 'post', 'path': '/raffles/', 'ip': MANAGER_IP, 'keep': True,
+            'data': DEFAULT_RAFFLE | {'name': f'Load test {tickets}', 'total_tickets': tickets},
+        }], 201)
+        raffle_id = results[0][3]['id']
+
+        make_ip = IncrementingIpFactory()
+        participants = [make_ip() for _ in range(tickets)]
+        phases['participate'], results = self.phase('participate', [
+            {'method': 'post', 'path': f'/raffles/{raffle_id}/participate/', 'ip': ip, 'keep': n < verify}
+            for n, ip in enumerate(participants)
+        ], 201)
+        claimed = [(participants[n], result[3]) for n, result in enumerate(results[:verify]) if result[1] == 201]
+
+        phases['draw'], _ = self.phase('draw', [
+            {'method': 'post', 'path': f'/raffles/{raffle_id}/winners/', 'ip': MANAGER_IP},
+        ], 201)
+
+        phases['verify'], _ = self.phase('verify', [
+            {
+                'method': 'post', 'path': f'/raffles/{raffle_id}/verify-ticket/', 'ip': ip,
+                'data': {'ticket_number': ticket['ticket_number'], 'verification_code': ticket['verification_code']},
+            }
+            for ip, ticket in claimed
+        ], 200)
+        return phases
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(port, env):
+    """Start `benchmarks.server` and wait until it answers."""
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.server', '--port', str(port)], env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'{base_url}/raffles/', timeout=1).close()
+            return server, base_url
+        except (urllib.error.URLError, ConnectionError):
+            if server.poll() is not None:
+                raise RuntimeError('Benchmark server exited during startup')
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('Benchmark server did not start')
+
+
+def parse_scale(value):
+    return SCALES.get(value.lower()) or int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=parse_scale, default=1000,
+                        help='Raffle size, e.g. 1000, 100k or 1m (default: 1000)')
+    parser.add_argument('--verify', type=int, default=1000,
+                        help='Number of tickets to verify; each checks a salted SHA-256 digest (default: 1000)')
+    parser.add_argument('--mode', choices=['inprocess', 'http'], default='inprocess')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--worker-type', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+    if args.worker_type == 'process' and args.mode != 'http':
+        parser.error('--worker-type process needs --mode http')
+
+    workdir = tempfile.mkdtemp(prefix='raffle-bench-')
+    os.environ['RAFFLE_BENCH_DB'] = args.db or os.path.join(workdir, 'bench.sqlite3')
+    setup_django('benchmarks.settings')
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', verbosity=0)
+    connection.close()
+
+    server = None
+    try:
+        if args.mode == 'http':
+            server, base_url = start_server(args.port, dict(os.environ))
+            load_test = LoadTest('http', args.workers, args.worker_type, base_url, server.pid)
+        else:
+            load_test = LoadTest('inprocess', args.workers, 'thread')
+        phases = load_test.run(args.tickets, min(args.verify, args.tickets))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        if not args.db and os.path.exists(os.environ['RAFFLE_BENCH_DB']):
+            os.remove(os.environ['RAFFLE_BENCH_DB'])
+
+    results = {
+        'meta': {
+            'benchmark': 'load',
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'tickets': args.tickets,
+            'verify': min(args.verify, args.tickets),
+            'mode': args.mode,
+            'workers': args.workers,
+            'worker_type': args.worker_type,
+        },
+        'phases': phases,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
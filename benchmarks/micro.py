@@ -0,0 +1,404 @@
+"""
+Micro-benchmarks for the model-level hot paths.
+
+Times each hot path directly, without a server or the request cycle, so a
+slowdown can be traced to the layer it comes from:
+
+    generate_tickets        Raffle.generate_tickets, per ticket
+    get_random_ticket       Raffle.get_random_ticket, per claim
+    set_verification_code   Ticket.set_verification_code, per code
+    check_verification_code Ticket.check_verification_code, per code
+    draw_winners            RaffleWinnersView.draw_winners, per eligible ticket
+    raffle_serializer       RaffleSerializer(many=True), per raffle
+    raffle_values           RaffleValuesSerializer, per raffle
+    winner_serializer       WinnerSerializer(many=True), per winner
+    winner_values           WinnerValuesSerializer, per winner
+    render_<payload>        DRF's JSONRenderer, per raffle, prize or winner
+    render_<payload>_orjson FragmentJSONRenderer with the orjson backend
+    render_winners_fragment FragmentJSONRenderer on the cached winners fragment
+    get_raffle              raffle_cache.get_or_404, per lookup
+    get_raffle_uncached     get_object_or_404(Raffle), per lookup
+
+where the payloads are a raffle list page (`raffle_list`), a raffle with
+many prizes (`raffle_detail`) and the winners of a raffle (`winners`).
+
+Every case runs at several sizes, with warmup runs and repeated timed runs;
+setup that is not part of the hot path happens between runs, outside the
+timer. Baselines live in `benchmarks/baselines/micro.json`.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --case draw --sizes 1000 100000
+    python -m benchmarks.micro --check             # exit 1 on a >10% median regression
+    python -m benchmarks.micro --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .compare import compare, flatten, report
+from .load import git_revision
+from .utils import create_benchmark_db, destroy_benchmark_db, setup_django
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines', 'micro.json')
+PRIZES = [{'name': 'Prize', 'amount': 1}]
+CLAIMS_PER_RUN = 5
+
+
+def participant_ip(n):
+    return f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}'
+
+
+def create_raffle(total_tickets, prizes=PRIZES):
+    from raffle.models import Raffle
+
+    return Raffle.objects.create(name='Bench', total_tickets=total_tickets, prizes=prizes)
+
+
+def claim_all(raffle):
+    """Claim every ticket of a raffle without hashing a code per ticket."""
+    from raffle.models import Ticket
+
+    tickets = list(raffle.tickets.only('id', 'ticket_number'))
+    for ticket in tickets:
+        ticket.participant_ip = participant_ip(ticket.ticket_number)
+        ticket.verification_code = f'bench${uuid.uuid4().hex}'
+    Ticket.objects.bulk_update(tickets, ['participant_ip', 'verification_code'], batch_size=500)
+
+
+def bench_generate_tickets(size):
+    from raffle.models import Raffle
+
+    raffles = []
+
+    def reset():
+        raffle = Raffle(name='Bench', total_tickets=size, prizes=PRIZES)
+        Raffle.objects.bulk_create([raffle])  # bypasses save(), which would generate the tickets
+        raffles.append(raffle)
+
+    def run():
+        raffles[-1].generate_tickets()
+
+    return run, reset, size
+
+
+def bench_get_random_ticket(size):
+    raffle = create_raffle(size)
+    claims = min(CLAIMS_PER_RUN, size)
+
+    def reset():
+        raffle.tickets.exclude(participant_ip=None).update(participant_ip=None, verification_code=None)
+
+    def run():
+        for n in range(claims):
+            raffle.get_random_ticket(participant_ip(n))
+
+    return run, reset, claims
+
+
+def bench_set_verification_code(size):
+    from raffle.models import Ticket
+
+    ticket = Ticket()
+    codes = [str(uuid.uuid4()) for _ in range(size)]
+
+    def run():
+        for code in codes:
+            ticket.set_verification_code(code)
+
+    return run, None, size
+
+
+def bench_check_verification_code(size):
+    from raffle.models import Ticket
+
+    code = str(uuid.uuid4())
+    ticket = Ticket()
+    ticket.set_verification_code(code)
+
+    def run():
+        for _ in range(size):
+            ticket.check_verification_code(code)
+
+    return run, None, size
+
+
+def bench_draw_winners(size):
+    from raffle.models import Winner
+    from raffle.views import RaffleWinnersView
+
+    raffle = create_raffle(size, [{'name': 'Prize', 'amount': max(1, size // 100)}])
+    claim_all(raffle)
+    view = RaffleWinnersView()
+
+    def reset():
+        Winner.objects.filter(raffle=raffle).delete()
+        raffle.tickets.filter(is_winner=True).update(is_winner=False)
+
+    def run():
+        view.draw_winners(raffle)
+
+    return run, reset, size
+
+
+def bench_raffle_serializer(size):
+    from raffle.models import Raffle
+    from raffle.serializers import RaffleSerializer
+
+    ids = [create_raffle(10).id for _ in range(size)]
+
+    def run():
+        RaffleSerializer(Raffle.objects.filter(id__in=ids), many=True).data
+
+    return run, None, size
+
+
+def bench_raffle_values(size):
+    from raffle.fast_serializers import raffle_values_serializer
+    from raffle.models import Raffle
+
+    ids = [create_raffle(10).id for _ in range(size)]
+
+    def run():
+        raffle_values_serializer.serialize(raffle_values_serializer.get_rows(Raffle.objects.filter(id__in=ids)))
+
+    return run, None, size
+
+
+def create_winners(size):
+    """A raffle whose every ticket won, and the winners queryset of its winners endpoint."""
+    from raffle.models import Winner
+    from raffle.views import RaffleWinnersView
+
+    raffle = create_raffle(size, [{'name': 'Prize', 'amount': size}])
+    claim_all(raffle)
+    Winner.objects.bulk_create([
+        Winner(raffle=raffle, ticket=ticket, prize='Prize') for ticket in raffle.tickets.all()
+    ])
+    raffle.tickets.update(is_winner=True)
+    return RaffleWinnersView().get_winners(raffle)
+
+
+def bench_winner_serializer(size):
+    from raffle.serializers import WinnerSerializer
+
+    winners = create_winners(size)
+
+    def run():
+        WinnerSerializer(winners.all(), many=True).data
+
+    return run, None, size
+
+
+def bench_winner_values(size):
+    from raffle.fast_serializers import winner_values_serializer
+
+    winners = create_winners(size)
+
+    def run():
+        winner_values_serializer.serialize(winner_values_serializer.get_rows(winners.all()))
+
+    return run, None, size
+
+
+def render_payload(payload, size):
+    """The response data of a list page of `size` raffles, a raffle with `size` prizes or `size` winners."""
+    from raffle.fast_serializers import raffle_values_serializer, winner_values_serializer
+    from raffle.models import Raffle
+
+    if payload == 'raffle_list':
+        ids = [create_raffle(10).id for _ in range(size)]
+        rows = raffle_values_serializer.get_rows(Raffle.objects.filter(id__in=ids))
+        return {'count': size, 'next': None, 'previous': None, 'results': raffle_values_serializer.serialize(rows)}
+    if payload == 'raffle_detail':
+        raffle = create_raffle(size, [{'name': f'Prize {n} ✓', 'amount': 1} for n in range(size)])
+        return raffle_values_serializer.serialize(raffle_values_serializer.get_rows(Raffle.objects.filter(pk=raffle.pk)))[0]
+    return winner_values_serializer.serialize(winner_values_serializer.get_rows(create_winners(size)))
+
+
+def render_case(payload, backend=None):
+    """Factory rendering a payload with DRF's JSONRenderer, or FragmentJSONRenderer with `backend`."""
+    def factory(size):
+        from django.conf import settings
+        from rest_framework.renderers import JSONRenderer
+        from raffle.renderers import FragmentJSONRenderer
+
+        data = render_payload(payload, size)
+        if backend is None:
+            renderer = JSONRenderer()
+        else:
+            settings.RAFFLE_JSON_ENCODER = backend
+            renderer = FragmentJSONRenderer()
+
+        def run():
+            renderer.render(data)
+
+        return run, None, size
+
+    return factory
+
+
+def bench_render_winners_fragment(size):
+    from raffle.renderers import FragmentJSONRenderer, get_fragment, set_fragment
+
+    set_fragment('bench', 1, render_payload('winners', size))
+    renderer = FragmentJSONRenderer()
+
+    def run():
+        renderer.render(get_fragment('bench', 1))
+
+    return run, None, size
+
+
+def raffle_lookup_case(cached):
+    """Factory for the raffle lookup cases: the raffle cache or a database read per lookup."""
+    def factory(size):
+        from django.shortcuts import get_object_or_404
+        from raffle.caching import raffle_cache
+        from raffle.models import Raffle
+
+        pk = create_raffle(1).pk
+
+        def run():
+            for _ in range(size):
+                if cached:
+                    raffle_cache.get_or_404(pk)
+                else:
+                    get_object_or_404(Raffle, pk=pk)
+
+        return run, None, size
+
+    return factory
+
+
+# name: (factory, default sizes)
+CASES = {
+    'generate_tickets': (bench_generate_tickets, [1000, 10000]),
+    'get_random_ticket': (bench_get_random_ticket, [1000, 10000]),
+    'set_verification_code': (bench_set_verification_code, [1, 4]),
+    'check_verification_code': (bench_check_verification_code, [1, 4]),
+    'draw_winners': (bench_draw_winners, [1000, 10000]),
+    'raffle_serializer': (bench_raffle_serializer, [10, 100]),
+    'raffle_values': (bench_raffle_values, [10, 100]),
+    'winner_serializer': (bench_winner_serializer, [10, 100, 10000]),
+    'winner_values': (bench_winner_values, [10, 100, 10000]),
+    'render_raffle_list': (render_case('raffle_list'), [10, 100]),
+    'render_raffle_list_orjson': (render_case('raffle_list', 'orjson'), [10, 100]),
+    'render_raffle_detail': (render_case('raffle_detail'), [10, 1000]),
+    'render_raffle_detail_orjson': (render_case('raffle_detail', 'orjson'), [10, 1000]),
+    'render_winners': (render_case('winners'), [100, 10000]),
+    'render_winners_orjson': (render_case('winners', 'orjson'), [100, 10000]),
+    'render_winners_fragment': (bench_render_winners_fragment, [100, 10000]),
+    'get_raffle': (raffle_lookup_case(True), [1000]),
+    'get_raffle_uncached': (raffle_lookup_case(False), [1000]),
+}
+
+
+def measure(run, reset, ops, warmup, repeat):
+    """
+    Time `run` after `warmup` untimed runs, calling `reset` before every run.
+
+    Returns:
+        dict: Timing statistics in milliseconds and operations per second.
+    """
+    timings = []
+    for n in range(warmup + repeat):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if n >= warmup:
+            timings.append(elapsed)
+    median = statistics.median(timings)
+    return {
+        'runs': repeat,
+        'ops_per_run': ops,
+        'min_ms': round(min(timings) * 1000, 3),
+        'median_ms': round(median * 1000, 3),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'stdev_ms': round(statistics.stdev(timings) * 1000, 3) if len(timings) > 1 else 0.0,
+        'max_ms': round(max(timings) * 1000, 3),
+        'ops_per_sec': round(ops / median, 2) if median else None,
+    }
+
+
+def run_cases(names, sizes, warmup, repeat):
+    from django.db import transaction
+    from raffle.models import Raffle
+
+    results = {}
+    print(f'{"case":<26}{"size":>8}{"median ms":>12}{"min ms":>12}{"stdev ms":>12}{"ops/s":>14}')
+    for name in names:
+        factory, default_sizes = CASES[name]
+        results[name] = {}
+        for size in sizes or default_sizes:
+            run, reset, ops = factory(size)
+            stats = measure(run, reset, ops, warmup, repeat)
+            results[name][str(size)] = stats
+            print(f'{name:<26}{size:>8}{stats["median_ms"]:>12.3f}{stats["min_ms"]:>12.3f}'
+                  f'{stats["stdev_ms"]:>12.3f}{stats["ops_per_sec"] or 0:>14.1f}')
+            with transaction.atomic():
+                Raffle.objects.all().delete()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--case', action='append', default=[],
+                        help='Only run cases whose name contains this (repeatable)')
+    parser.add_argument('--sizes', type=int, nargs='+', help='Override the default sizes of every case')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Compare median times against the baseline')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Allowed median regression in percent for --check (default: 10)')
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.case or any(part in name for part in args.case)]
+    if not names:
+        parser.error(f'no case matches {args.case}; choose from {", ".join(CASES)}')
+
+    setup_django()
+    old_name = create_benchmark_db()
+    try:
+        cases = run_cases(names, args.sizes, args.warmup, args.repeat)
+    finally:
+        destroy_benchmark_db(old_name)
+
+    results = {
+        'meta': {
+            'benchmark': 'micro',
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+        },
+        'cases': cases,
+    }
+    for path in filter(None, [args.json, args.baseline if args.save_baseline else None]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = flatten(json.load(f))
+        print()
+        if report(compare(baseline, flatten(results), args.threshold, r'median_ms$'), args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark raffle name search: indexed search against `name__icontains`.
+
+Usage:
+    python -m benchmarks.search --raffles 500000
+"""
+import argparse
+import json
+import random
+import time
+
+from .utils import create_benchmark_db, destroy_benchmark_db, setup_django, time_call
+
+WORDS = [
+    'summer', 'winter', 'spring', 'autumn', 'charity', 'school', 'church', 'club',
+    'football', 'tennis', 'golf', 'car', 'bike', 'holiday', 'cruise', 'festival',
+    'community', 'garden', 'library', 'hospital', 'animal', 'shelter', 'music',
+    'concert', 'gala', 'ball', 'bake', 'sale', 'fair', 'market', 'village', 'city',
+    'mega', 'grand', 'super', 'family', 'kids', 'senior', 'veterans', 'firefighters',
+]
+
+TERMS = ['sum', 'summer fair', 'firefighters', 'car', 'zzz', 'gala 17']
+
+
+def populate(count, batch_size=10000):
+    from raffle.models import Raffle
+
+    rng = random.Random(42)
+    for start in range(0, count, batch_size):
+        Raffle.objects.bulk_create([
+            Raffle(
+                name=f'{" ".join(rng.sample(WORDS, 3)).title()} {rng.randint(1, 99)}',
+                total_tickets=100,
+                prizes=[{'name': 'Prize', 'amount': 1}],
+            )
+            for _ in range(start, min(count, start + batch_size))
+        ])
+
+
+def run(raffle_count, repeat):
+    from django.db import connection
+    from raffle import search
+    from raffle.models import Raffle
+
+    start = time.perf_counter()
+    populate(raffle_count)
+    results = {'raffles': raffle_count, 'populate_seconds': time.perf_counter() - start, 'terms': {}}
+    print(f'Inserted {raffle_count} raffles in {results["populate_seconds"]:.1f}s '
+          f'(indexed search available: {search.search_available(connection)})')
+
+    base = Raffle.objects.all()
+    strategies = {
+        'icontains': lambda term: base.filter(name__icontains=term).order_by('-created_at'),
+        'indexed': lambda term: search.filter_by_name(base, term).order_by('-created_at'),
+        'indexed_ranked': lambda term: search.filter_by_name(base, term, ranked=True),
+    }
+
+    print(f'{"term":<16}{"strategy":<16}{"matches":>10}{"count ms":>12}{"page ms":>12}')
+    for term in TERMS:
+        results['terms'][term] = {}
+        for name, build in strategies.items():
+            matches = build(term).count()
+            count_timing = time_call(lambda: build(term).count(), repeat)
+            page_timing = time_call(lambda: list(build(term)[:10]), repeat)
+            results['terms'][term][name] = {'matches': matches, 'count': count_timing, 'page': page_timing}
+            print(f'{term:<16}{name:<16}{matches:>10}'
+                  f'{count_timing["median"] * 1000:>12.2f}{page_timing["median"] * 1000:>12.2f}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--raffles', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    setup_django()
+    old_name = create_benchmark_db()
+    try:
+        results = run(args.raffles, args.repeat)
+    finally:
+        destroy_benchmark_db(old_name)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Threaded WSGI server for HTTP load tests.
+
+Every request from a load test comes from 127.0.0.1, so the server takes the
+client IP from the `X-Bench-Client-IP` header instead. It also reports the
+number of SQL queries each request ran in the `X-Bench-Queries` response
+header. Only run this with `benchmarks.settings`, never in production.
+
+Usage:
+    RAFFLE_BENCH_DB=/tmp/bench.sqlite3 python -m benchmarks.server --port 8765
+"""
+import argparse
+import os
+import socketserver
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+CLIENT_IP_HEADER = 'HTTP_X_BENCH_CLIENT_IP'
+QUERIES_HEADER = 'X-Bench-Queries'
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_application(application):
+    """Wrap a WSGI application with client IP injection and query counting."""
+    from django.db import close_old_connections, connection
+
+    def app(environ, start_response):
+        if CLIENT_IP_HEADER in environ:
+            environ['REMOTE_ADDR'] = environ[CLIENT_IP_HEADER]
+        queries = 0
+        response_start = []
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        def buffered_start_response(status, headers, exc_info=None):
+            response_start[:] = [status, headers, exc_info]
+
+        with connection.execute_wrapper(count):
+            result = application(environ, buffered_start_response)
+            try:
+                body = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        status, headers, exc_info = response_start
+        start_response(status, headers + [(QUERIES_HEADER, str(queries))], exc_info)
+        close_old_connections()
+        return [body]
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server(args.host, args.port, bench_application(get_wsgi_application()),
+                         server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+Settings for running the application under the benchmark scripts.
+
+Uses a separate SQLite file (`RAFFLE_BENCH_DB`) so benchmarks never touch
+`db.sqlite3`, and turns off rate limiting and debug query logging, which
+would otherwise dominate the measurements.
+"""
+import os
+import tempfile
+
+from project.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['localhost', '127.0.0.1', '[::1]', 'testserver']
+MANAGER_IPS = os.environ.get('MANAGER_IPS', '123.123.123.123,127.0.0.2')
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('RAFFLE_BENCH_DB', os.path.join(tempfile.gettempdir(), 'raffle_bench.sqlite3')),
+        'OPTIONS': {'timeout': 60},
+    }
+}
+
+RAFFLE_RATE_LIMITING_ENABLED = False
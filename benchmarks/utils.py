@@ -0,0 +1,121 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway database created with Django's test
+database machinery, so they never touch `db.sqlite3`.
+"""
+import math
+import os
+import statistics
+import time
+
+
+def setup_django(settings_module=None):
+    """
+    Configure Django for a standalone benchmark script.
+
+    Args:
+        settings_module (str): Settings to force, e.g. 'benchmarks.settings'.
+            Defaults to `DJANGO_SETTINGS_MODULE` or the project settings.
+    """
+    if settings_module:
+        os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+    os.environ.setdefault('MANAGER_IPS', '123.123.123.123,127.0.0.2')
+    import django
+    django.setup()
+
+
+def create_benchmark_db():
+    """
+    Create and migrate a throwaway database for the default connection.
+
+    Returns:
+        str: The original database name, for `destroy_benchmark_db`.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return old_name
+
+
+def destroy_benchmark_db(old_name):
+    from django.db import connection
+    from django.test.utils import teardown_test_environment
+
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+def time_call(func, repeat=5):
+    """
+    Time `func` over several runs after one warmup call.
+
+    Returns:
+        dict: min/median/max wall-clock seconds.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'max': max(timings),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    """
+    Summarise request latencies in milliseconds.
+
+    Returns:
+        dict: p50/p95/p99/max latency in milliseconds.
+    """
+    ordered = sorted(latencies)
+    return {
+        name: round(percentile(ordered, fraction) * 1000, 3) if ordered else None
+        for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+    }
+
+
+def reset_peak_rss(pid='self'):
+    """Reset the kernel's peak RSS counter for a process (Linux only, best effort)."""
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def read_peak_rss_kb(pid='self'):
+    """
+    Peak resident set size of a process in KiB.
+
+    Reads `VmHWM` from /proc on Linux and falls back to `getrusage` for the
+    current process elsewhere.
+    """
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if pid == 'self':
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
@@ -0,0 +1,102 @@
+"""
+Benchmark verification code storage: binary digests against hash strings.
+
+Loads two copies of the verification code column, one as the former
+128-character password hash column with its unique index and one as
+`VerificationDigestField` records without an index, and reports each
+table's and index's size and the insert throughput. The hash strings have
+the shape of Django's PBKDF2 hashes; hashing that many codes for real
+would take hours, so the cost of hashing one code with each scheme is
+measured separately.
+
+Sizes are read from `dbstat` on SQLite and `pg_relation_size` on PostgreSQL.
+
+Usage:
+    python -m benchmarks.verification_storage --tickets 1000000
+"""
+import argparse
+import base64
+import json
+import os
+import time
+import uuid
+
+from .ip_storage import index_size as relation_size
+from .utils import create_benchmark_db, destroy_benchmark_db, setup_django, time_call
+
+HASHES = 20
+
+
+def fake_password_hash():
+    """A random string shaped like a Django PBKDF2-SHA256 hash."""
+    salt = base64.b64encode(os.urandom(16)).decode()[:22]
+    return f'pbkdf2_sha256$600000${salt}${base64.b64encode(os.urandom(32)).decode()}'
+
+
+def run(ticket_count, batch_size=50000):
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection
+    from raffle.digests import make_digest, pack_digest
+    from raffle.fields import VerificationDigestField
+
+    raffle_id = uuid.uuid4().hex
+    layouts = {
+        'hash': ('varchar(128)', fake_password_hash, True),
+        'digest': (VerificationDigestField().db_type(connection),
+                   lambda: pack_digest(make_digest(uuid.uuid4())), False),
+    }
+    hashing = {
+        'hash': time_call(lambda: [make_password(str(uuid.uuid4())) for _ in range(HASHES)], 3)['median'] / HASHES,
+        'digest': time_call(lambda: [make_digest(uuid.uuid4()) for _ in range(HASHES)], 3)['median'] / HASHES,
+    }
+    results = {'tickets': ticket_count, 'vendor': connection.vendor, 'layouts': {}}
+    print(f'{"layout":<10}{"rows/s":>12}{"table MB":>12}{"index MB":>12}{"bytes/row":>12}{"hash us":>12}')
+    for name, (column_type, make_value, indexed) in layouts.items():
+        table, index = f'bench_code_{name}', f'bench_code_{name}_idx'
+        codes = [make_value() for _ in range(ticket_count)]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            cursor.execute(f'CREATE TABLE {table} (id integer PRIMARY KEY, raffle_id char(32) NOT NULL, '
+                           f'ticket_number bigint NOT NULL, verification_code {column_type} NULL)')
+            if indexed:
+                cursor.execute(f'CREATE UNIQUE INDEX {index} ON {table} (verification_code)')
+            start = time.perf_counter()
+            for offset in range(0, ticket_count, batch_size):
+                cursor.executemany(
+                    f'INSERT INTO {table} (raffle_id, ticket_number, verification_code) VALUES (%s, %s, %s)',
+                    [(raffle_id, number, codes[number]) for number in range(offset, min(offset + batch_size,
+                                                                                       ticket_count))],
+                )
+            insert_seconds = time.perf_counter() - start
+            table_bytes = relation_size(cursor, connection.vendor, table)
+            index_bytes = relation_size(cursor, connection.vendor, index) if indexed else 0
+            cursor.execute(f'DROP TABLE {table}')
+
+        rows_per_second = ticket_count / insert_seconds
+        results['layouts'][name] = {'rows_per_second': rows_per_second, 'table_bytes': table_bytes,
+                                    'index_bytes': index_bytes, 'hash_seconds': hashing[name]}
+        total = (table_bytes or 0) + (index_bytes or 0)
+        print(f'{name:<10}{rows_per_second:>12.0f}{(table_bytes or 0) / 2**20:>12.1f}'
+              f'{(index_bytes or 0) / 2**20:>12.1f}{total / ticket_count:>12.1f}{hashing[name] * 1e6:>12.1f}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=1000000)
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    setup_django()
+    old_name = create_benchmark_db()
+    try:
+        results = run(args.tickets)
+    finally:
+        destroy_benchmark_db(old_name)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,3 +15,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_asgi_application()
+
+from raffle.counters import reconcile_on_startup  # noqa: E402, needs the apps loaded
+
+reconcile_on_startup()
@@ -103,6 +103,14 @@ DATABASES = {
     }
 }
 
+# Run against a local PostgreSQL database instead, e.g. for the concurrency
+# tests. Host, user and password come from the standard PG* variables.
+if os.environ.get('RAFFLE_POSTGRES_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['RAFFLE_POSTGRES_DB'],
+    }
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -114,7 +122,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  # Number of items per page
     'DEFAULT_RENDERER_CLASSES': (
-       'rest_framework.renderers.JSONRenderer',
+       'raffle.renderers.FragmentJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
        # 'rest_framework.renderers.TemplateHTMLRenderer',
     ),
@@ -122,6 +130,53 @@ REST_FRAMEWORK = {
 }
 DISABLE_TEST_CACHING = True
 
+# 'auto' claims with SELECT ... FOR UPDATE SKIP LOCKED where supported, else with a conditional UPDATE
+RAFFLE_CLAIM_STRATEGY = 'auto'
+
+# Raffles with at least this many tickets only store rows for claimed tickets (None disables)
+RAFFLE_COMPACT_TICKETS_THRESHOLD = 100000
+
+# Per-worker pools of leased tickets for flash-sale traffic, see raffle.claims.TicketPool
+RAFFLE_TICKET_POOL_ENABLED = False
+RAFFLE_TICKET_POOL_SIZE = 256
+RAFFLE_TICKET_POOL_LEASE = 60  # seconds
+
+# Claims are added to Raffle.participant_count in batches, see raffle/counters.py
+RAFFLE_PARTICIPANT_COUNT_FLUSH_INTERVAL = 1.0  # seconds
+RAFFLE_PARTICIPANT_COUNT_FLUSH_BATCH = 100  # pending claims
+# Recount participant_count from the tickets when project.wsgi/asgi loads. Only safe if the
+# application loads once before all workers fork (e.g. gunicorn --preload) and single workers
+# are never restarted next to live ones; otherwise run `manage.py reconcile_participant_counts`
+# while the workers are stopped.
+RAFFLE_RECONCILE_ON_STARTUP = False
+
+# Live availability over Server-Sent Events, see raffle/live.py
+RAFFLE_LIVE_INTERVAL = 0.25  # seconds between pushes per raffle
+RAFFLE_LIVE_REFRESH = 2.0  # seconds before re-reading a raffle changed by another process
+RAFFLE_LIVE_HEARTBEAT = 15.0  # seconds between keep-alive comments
+RAFFLE_LIVE_MAX_AGE = 300.0  # seconds before a stream closes and the client reconnects
+
+# JSON encoder backend of raffle.renderers.FragmentJSONRenderer: 'json' or 'orjson' (needs the orjson package)
+RAFFLE_JSON_ENCODER = 'json'
+RAFFLE_FRAGMENT_CACHE_TIMEOUT = 60 * 60  # seconds a pre-encoded fragment stays cached
+
+# Per-process LRU of raffle objects in front of the shared cache, see raffle/caching.py
+RAFFLE_OBJECT_CACHE_SIZE = 1024  # raffles per process
+RAFFLE_OBJECT_CACHE_TTL = 5.0  # seconds before a local copy is revalidated against the shared cache
+RAFFLE_OBJECT_CACHE_TIMEOUT = 60 * 60  # seconds a raffle stays in the shared cache
+
+# Cross-process cache invalidation log, see raffle/invalidation.py: 'sqlite' (shared file) or 'local'
+RAFFLE_INVALIDATION_BACKEND = 'sqlite'
+RAFFLE_INVALIDATION_PATH = os.path.join(BASE_DIR, 'invalidation.sqlite3')
+RAFFLE_INVALIDATION_POLL_INTERVAL = 0.5  # seconds between polls of the log
+RAFFLE_INVALIDATION_RETENTION = 60 * 60  # seconds events are kept
+
+# Token-bucket limits for the participate and verify-ticket endpoints.
+# See raffle/ratelimit.py for the format and the defaults.
+RAFFLE_RATE_LIMITING_ENABLED = True
+RAFFLE_RATE_LIMITS = {}
+RAFFLE_RATE_LIMIT_OVERRIDES = {}
+
 #git checkout -b finalversion
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -15,3 +15,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_wsgi_application()
+
+from raffle.counters import reconcile_on_startup  # noqa: E402, needs the apps loaded
+
+reconcile_on_startup()
@@ -4,7 +4,27 @@ from .models import Raffle, Winner, Ticket
 
 # Register your models here.
 admin.site.register(Raffle)
-admin.site.register(Winner)
+
+
+class WinnerAdmin(admin.ModelAdmin):
+    """Bumps the raffle version on changes, so the cached winners are not served stale."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.raffle.bump_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.raffle.bump_version()
+
+    def delete_queryset(self, request, queryset):
+        raffles = list(Raffle.objects.filter(winner__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        for raffle in raffles:
+            raffle.bump_version()
+
+
+admin.site.register(Winner, WinnerAdmin)
 class TicketAdmin(admin.ModelAdmin):
     list_display = ('raffle', 'ticket_number', 'verification_code', 'participant_ip', 'is_winner')
 
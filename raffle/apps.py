@@ -1,9 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RaffleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'raffle'
 
-def ready(self):
-    import raffle.signals  
\ No newline at end of file
+    def ready(self):
+        import raffle.signals
+        from raffle.search import repair_search_index
+        post_migrate.connect(repair_search_index, sender=self)
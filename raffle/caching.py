@@ -0,0 +1,161 @@
+"""
+Two-level read-through cache of `Raffle` objects.
+
+Every raffle endpoint starts by loading its raffle, and a raffle's name,
+size and prizes practically never change once it is created. `raffle_cache`
+keeps recently used raffles in a bounded per-process LRU in front of the
+shared Django cache, which in turn sits in front of the database:
+
+1. A local copy checked less than `RAFFLE_OBJECT_CACHE_TTL` seconds ago is
+   used as is, without any I/O.
+2. Otherwise the raffle's stamp, its `version`, is read from the shared
+   cache. An unchanged stamp revalidates the local copy; a new one fetches
+   the raffle stored under that stamp.
+3. Without a stamp the raffle is read from the database and stored in the
+   shared cache, stamped with its version.
+
+`invalidate` publishes the raffle on `raffle.invalidation.invalidation_bus`,
+which drops its local copy and its stamp in this process at once, and in
+every other process at its next poll after the transaction commits. It runs
+after every raffle save and delete and every `Raffle.bump_version`; queryset
+updates of other fields must call it themselves. `RAFFLE_OBJECT_CACHE_TTL`
+bounds how stale a local copy can get should an invalidation be lost.
+
+The counters (`issued_count`, `participant_count`) change on every claim
+without a version bump, so cached raffles defer them: reading one queries
+the database for its current value.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .invalidation import RAFFLE, RESET, invalidation_bus
+from .models import Raffle
+
+DEFAULT_SIZE = 1024  # raffles per process
+DEFAULT_TTL = 5.0  # seconds a local copy is used without checking its stamp
+DEFAULT_TIMEOUT = 60 * 60  # seconds a raffle stays in the shared cache
+
+
+def stamp_key(pk):
+    return f'raffle_obj_stamp:{pk}'
+
+
+def object_key(pk, stamp):
+    return f'raffle_obj:{pk}:{stamp}'
+
+
+class RaffleCache:
+    """A bounded per-process LRU of raffles, revalidated against version stamps in the shared cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Drop every local copy, e.g. after a fork."""
+        with self.lock:
+            self.pid = os.getpid()
+            self.entries = OrderedDict()
+
+    @property
+    def size(self):
+        return getattr(settings, 'RAFFLE_OBJECT_CACHE_SIZE', DEFAULT_SIZE)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'RAFFLE_OBJECT_CACHE_TTL', DEFAULT_TTL)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'RAFFLE_OBJECT_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+    def get(self, pk):
+        """
+        Get a raffle by primary key.
+
+        Args:
+            pk (UUID): The raffle's primary key.
+
+        Returns:
+            Raffle: A private copy of the raffle, or None if it does not exist.
+        """
+        invalidation_bus.poll()
+        key = str(pk)
+        now = time.monotonic()
+        entry = self.get_local(key)
+        if entry is not None and now - entry[2] < self.ttl:
+            return copy.copy(entry[1])
+
+        stamp = cache.get(stamp_key(key))
+        if entry is not None and stamp == entry[0]:
+            self.set_local(key, stamp, entry[1], now)
+            return copy.copy(entry[1])
+
+        raffle = cache.get(object_key(key, stamp)) if stamp is not None else None
+        if raffle is None:
+            raffle = Raffle.objects.defer(*Raffle.COUNTER_FIELDS).filter(pk=pk).first()
+            if raffle is None:
+                return None
+            stamp = raffle.version
+            cache.set_many({object_key(key, stamp): raffle, stamp_key(key): stamp}, self.timeout)
+        self.set_local(key, stamp, raffle, now)
+        return copy.copy(raffle)
+
+    def get_or_404(self, pk):
+        """
+        Get a raffle by primary key.
+
+        Raises:
+            Http404: If the raffle does not exist.
+        """
+        raffle = self.get(pk)
+        if raffle is None:
+            raise Http404('No Raffle matches the given query.')
+        return raffle
+
+    def get_local(self, key):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid, self.entries = os.getpid(), OrderedDict()
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set_local(self, key, stamp, raffle, checked_at):
+        with self.lock:
+            self.entries[key] = (stamp, raffle, checked_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, pk, version=None):
+        """
+        Drop a raffle from the local copies and the stamps of every process.
+
+        Args:
+            pk (UUID): The raffle's primary key.
+            version (int): The raffle's new version, if known.
+        """
+        invalidation_bus.publish(RAFFLE, pk, version)
+
+    def drop(self, key, version=None):
+        """Drop a raffle's local copy and stamp, unless the copy already has `version`."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if version is not None and entry is not None and entry[0] == version:
+                return
+            self.entries.pop(key, None)
+        cache.delete(stamp_key(key))
+
+
+raffle_cache = RaffleCache()
+invalidation_bus.subscribe(RAFFLE, raffle_cache.drop)
+invalidation_bus.subscribe(RESET, raffle_cache.clear)
@@ -0,0 +1,315 @@
+"""
+Ticket claim strategies.
+
+`Raffle.get_random_ticket` delegates the claim to a strategy picked for the
+database backend:
+
+- `SkipLockedClaim` locks one unclaimed ticket from a random point of the
+  raffle with `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent claimers
+  each lock a different row instead of queueing on the same one. Used where
+  the backend supports SKIP LOCKED (PostgreSQL, MySQL 8, Oracle).
+- `ConditionalUpdateClaim` holds no lock: it picks a few candidates and claims
+  one with `UPDATE ... WHERE participant_ip IS NULL`. Used everywhere else,
+  e.g. SQLite, where `select_for_update` is a no-op.
+
+`RAFFLE_CLAIM_STRATEGY` forces one of them ('skip_locked' or
+'conditional_update'); the default 'auto' picks by backend.
+
+With `RAFFLE_TICKET_POOL_ENABLED` each worker process instead leases blocks
+of tickets into a local `TicketPool` and hands them out from memory.
+
+Raffles with compact ticket storage have no unclaimed rows to pick from and
+always use `CompactClaim`.
+"""
+import atexit
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .exceptions import AlreadyParticipatedException
+from .models import Ticket
+
+
+class ConditionalUpdateClaim:
+    """Claims a ticket with a conditional UPDATE and retries on a lost race."""
+
+    name = 'conditional_update'
+
+    def claim(self, raffle, participant_ip, hashed_code):
+        """
+        Claim a random unclaimed ticket.
+
+        A candidate taken in the meantime updates no row and the next one is
+        tried; when a whole candidate set is gone a new one is picked. Every
+        lost race means another claim succeeded, so the loop always ends.
+
+        Returns:
+            Ticket: The claimed ticket, or None if no tickets are left.
+        """
+        while True:
+            candidates = raffle.get_ticket_candidates()
+            if not candidates:
+                return None
+            for ticket_id, ticket_number in candidates:
+                if raffle.claim_ticket(ticket_id, participant_ip, hashed_code):
+                    return Ticket(id=ticket_id, raffle=raffle, ticket_number=ticket_number,
+                                  participant_ip=participant_ip, verification_code=hashed_code)
+
+
+class SkipLockedClaim:
+    """Claims a ticket locked with SELECT ... FOR UPDATE SKIP LOCKED."""
+
+    name = 'skip_locked'
+
+    def claim(self, raffle, participant_ip, hashed_code):
+        """
+        Claim a random unclaimed ticket.
+
+        Walks ticket_unclaimed_idx from a random ticket number, wrapping
+        around, and locks the first unclaimed ticket no one else has locked.
+
+        Returns:
+            Ticket: The claimed ticket, or None if no tickets are left.
+
+        Raises:
+            AlreadyParticipatedException: If the IP already holds a ticket for this raffle.
+        """
+        unclaimed = (
+            raffle.tickets.filter(participant_ip__isnull=True)
+            .order_by('ticket_number')
+            .only('id', 'ticket_number')
+            .select_for_update(skip_locked=True)
+        )
+        start = random.randint(1, raffle.total_tickets)
+        while True:
+            try:
+                with transaction.atomic():
+                    ticket = unclaimed.filter(ticket_number__gte=start).first() or unclaimed.first()
+                    if ticket is None:
+                        return None
+                    # Still conditional: a row committed as claimed after our snapshot is not taken twice
+                    claimed = Ticket.objects.filter(id=ticket.id, participant_ip__isnull=True).update(
+                        participant_ip=participant_ip, verification_code=hashed_code,
+                        lease_owner=None, leased_until=None)
+            except IntegrityError:
+                raise AlreadyParticipatedException()
+            if claimed:
+                return Ticket(id=ticket.id, raffle=raffle, ticket_number=ticket.ticket_number,
+                              participant_ip=participant_ip, verification_code=hashed_code)
+
+
+class CompactClaim:
+    """
+    Claims the next ticket of a raffle with compact ticket storage.
+
+    Bumps `Raffle.issued_count` and inserts the claimed ticket's row in one
+    transaction; the ticket number is the raffle's permutation of the count.
+    The increment holds the raffle row's write lock until commit, so the
+    count read back is this claim's own. A unique violation on the
+    participant IP rolls the increment back.
+    """
+
+    name = 'compact'
+
+    def claim(self, raffle, participant_ip, hashed_code):
+        """
+        Claim the next ticket number.
+
+        Returns:
+            Ticket: The claimed ticket, or None if no tickets are left.
+
+        Raises:
+            AlreadyParticipatedException: If the IP already holds a ticket for this raffle.
+        """
+        raffles = type(raffle).objects.filter(pk=raffle.pk)
+        try:
+            with transaction.atomic():
+                if not raffles.filter(issued_count__lt=F('total_tickets')).update(issued_count=F('issued_count') + 1):
+                    return None
+                position = raffles.values_list('issued_count', flat=True).get() - 1
+                return Ticket.objects.create(raffle=raffle, ticket_number=raffle.get_ticket_number(position),
+                                             participant_ip=participant_ip, verification_code=hashed_code)
+        except IntegrityError:
+            raise AlreadyParticipatedException()
+
+
+class TicketPool:
+    """
+    Per-process pools of leased tickets, for raffles with heavy claim traffic.
+
+    A worker leases a block of unclaimed tickets of a raffle at once by
+    stamping them with its `lease_owner` token and a `leased_until` expiry,
+    then hands them out from memory. A claim from the pool is only the final
+    conditional participant write. Leases are advisory: the write still
+    requires `participant_ip IS NULL`, so a ticket taken by someone else
+    (after the lease expired, or by a fallback claim) is just skipped.
+
+    When no unleased tickets are left the claim falls back to the backend
+    strategy, so leased tickets of other workers are never stranded. Unused
+    leases are returned when they expire locally and at process exit.
+    """
+
+    name = 'pool'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all pools and take a new owner token, e.g. after a fork."""
+        self.pid = os.getpid()
+        self.owner = f'{socket.gethostname()[:20]}:{self.pid}:{uuid.uuid4().hex[:16]}'
+        self.pools = {}
+
+    def claim(self, raffle, participant_ip, hashed_code):
+        """
+        Claim a ticket from this worker's pool for the raffle.
+
+        Returns:
+            Ticket: The claimed ticket, or None if no tickets are left.
+
+        Raises:
+            AlreadyParticipatedException: If the IP already holds a ticket for this raffle.
+        """
+        while True:
+            leased = self.take(raffle)
+            if leased is None:
+                return get_backend_claim_strategy().claim(raffle, participant_ip, hashed_code)
+            ticket_id, ticket_number = leased
+            try:
+                claimed = raffle.claim_ticket(ticket_id, participant_ip, hashed_code)
+            except AlreadyParticipatedException:
+                self.put_back(raffle, leased)
+                raise
+            if claimed:
+                return Ticket(id=ticket_id, raffle=raffle, ticket_number=ticket_number,
+                              participant_ip=participant_ip, verification_code=hashed_code)
+
+    def take(self, raffle):
+        """Pop a leased ticket, leasing a new block when the pool is empty or expired."""
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            pool = self.pools.get(raffle.pk)
+            if pool and pool['expires'] <= time.monotonic():
+                self.release(pool['tickets'])
+                pool = None
+            if not pool or not pool['tickets']:
+                pool = self.pools[raffle.pk] = self.lease(raffle)
+            if not pool['tickets']:
+                del self.pools[raffle.pk]
+                return None
+            return pool['tickets'].pop()
+
+    def put_back(self, raffle, leased):
+        with self.lock:
+            pool = self.pools.get(raffle.pk)
+            if pool:
+                pool['tickets'].append(leased)
+
+    def lease(self, raffle):
+        """
+        Lease a block of unclaimed, unleased tickets from a random point of the raffle.
+
+        Returns:
+            dict: The pool, with the leased `(id, ticket_number)` pairs in `tickets`.
+        """
+        lease_seconds = getattr(settings, 'RAFFLE_TICKET_POOL_LEASE', 60)
+        now = timezone.now()
+        unleased = (
+            raffle.tickets.filter(participant_ip__isnull=True)
+            .filter(Q(leased_until__isnull=True) | Q(leased_until__lt=now))
+            .order_by('ticket_number')
+            .values_list('id', flat=True)
+        )
+        size = getattr(settings, 'RAFFLE_TICKET_POOL_SIZE', 256)
+        start = random.randint(1, raffle.total_tickets)
+        candidates = list(unleased.filter(ticket_number__gte=start)[:size])
+        if len(candidates) < size:
+            candidates += list(unleased.filter(ticket_number__lt=start)[:size - len(candidates)])
+
+        tickets = []
+        if candidates:
+            # Another worker may lease some of the same candidates; re-check and read back our own
+            Ticket.objects.filter(id__in=candidates, participant_ip__isnull=True).filter(
+                Q(leased_until__isnull=True) | Q(leased_until__lt=now)
+            ).update(lease_owner=self.owner, leased_until=now + timedelta(seconds=lease_seconds))
+            tickets = list(Ticket.objects.filter(id__in=candidates, lease_owner=self.owner, participant_ip__isnull=True)
+                           .values_list('id', 'ticket_number'))
+            random.shuffle(tickets)
+        # Expire locally a little early so a ticket is never handed out after its lease ran out
+        return {'tickets': tickets, 'expires': time.monotonic() + lease_seconds * 0.9}
+
+    def release(self, tickets):
+        """Return leased tickets that were not handed out."""
+        if tickets:
+            Ticket.objects.filter(id__in=[ticket_id for ticket_id, _ in tickets], lease_owner=self.owner,
+                                  participant_ip__isnull=True).update(lease_owner=None, leased_until=None)
+
+    def release_all(self):
+        """Return every unused lease of this process, e.g. at shutdown."""
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            pools, self.pools = self.pools, {}
+            for pool in pools.values():
+                self.release(pool['tickets'])
+
+
+ticket_pool = TicketPool()
+
+
+@atexit.register
+def release_ticket_pools():
+    if not getattr(settings, 'RAFFLE_TICKET_POOL_ENABLED', False):
+        return
+    try:
+        ticket_pool.release_all()
+    except DatabaseError:
+        pass  # The leases expire on their own
+
+
+STRATEGIES = {strategy.name: strategy for strategy in (ConditionalUpdateClaim, SkipLockedClaim)}
+
+
+def get_claim_strategy(using=None):
+    """
+    Get the claim strategy for a database connection.
+
+    Args:
+        using (str): The database alias, defaults to the default connection.
+
+    Returns:
+        The process-wide `TicketPool` if `RAFFLE_TICKET_POOL_ENABLED` is set,
+        otherwise the strategy from `get_backend_claim_strategy`.
+    """
+    if getattr(settings, 'RAFFLE_TICKET_POOL_ENABLED', False):
+        return ticket_pool
+    return get_backend_claim_strategy(using)
+
+
+def get_backend_claim_strategy(using=None):
+    """
+    Get the claim strategy for a database backend.
+
+    Args:
+        using (str): The database alias, defaults to the default connection.
+
+    Returns:
+        The `RAFFLE_CLAIM_STRATEGY` strategy, or for 'auto' `SkipLockedClaim`
+        where the backend supports SKIP LOCKED and `ConditionalUpdateClaim` otherwise.
+    """
+    name = getattr(settings, 'RAFFLE_CLAIM_STRATEGY', 'auto')
+    if name == 'auto':
+        features = (transaction.get_connection(using) if using else connection).features
+        name = SkipLockedClaim.name if features.has_select_for_update_skip_locked else ConditionalUpdateClaim.name
+    return STRATEGIES[name]()
@@ -0,0 +1,186 @@
+"""
+Write-behind participant counters.
+
+A claim does not touch its raffle's row: `participant_counter.add` only
+accumulates the delta in memory, and the deltas of every raffle are written
+to `Raffle.participant_count` in one transaction, one `F()` update per
+raffle, after `RAFFLE_PARTICIPANT_COUNT_FLUSH_INTERVAL` seconds or once
+`RAFFLE_PARTICIPANT_COUNT_FLUSH_BATCH` claims are pending, whichever comes
+first. Hot raffles therefore take one counter row write per flush instead of
+one per claim.
+
+Deltas still pending when a worker dies are lost, so the counts are
+reconciled from the tickets table with `python manage.py
+reconcile_participant_counts`, or as `project.wsgi` and `project.asgi` load
+if `RAFFLE_RECONCILE_ON_STARTUP` is set. A recount must not run while other
+workers are serving claims: their pending deltas are already counted from
+the tickets table and are added again when they flush. It is therefore off by
+default and never runs on its own after `migrate`, which rolling deploys run
+next to live workers.
+"""
+import atexit
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .logging_utils import logger
+from .models import Raffle, Ticket
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_FLUSH_BATCH = 100  # pending claims
+
+
+class ParticipantCounter:
+    """Accumulates per-raffle claim deltas in memory and flushes them in batches."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timer = None
+        self.reset()
+
+    def reset(self):
+        """Drop pending deltas and the flush timer, e.g. after a fork."""
+        if self.timer is not None:
+            self.timer.cancel()
+        self.pid = os.getpid()
+        self.pending = Counter()
+        self.timer = None
+
+    @property
+    def interval(self):
+        return getattr(settings, 'RAFFLE_PARTICIPANT_COUNT_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'RAFFLE_PARTICIPANT_COUNT_FLUSH_BATCH', DEFAULT_FLUSH_BATCH)
+
+    def add(self, raffle_id, delta=1):
+        """
+        Record claims for a raffle.
+
+        Args:
+            raffle_id (UUID): The raffle.
+            delta (int): Number of tickets claimed.
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            self.pending[raffle_id] += delta
+            flush_now = sum(self.pending.values()) >= self.batch_size
+            if not flush_now:
+                self.schedule()
+        if flush_now:
+            self.flush()
+
+    def get_pending(self, raffle_id):
+        """Claims of a raffle recorded by this process but not flushed yet."""
+        with self.lock:
+            return self.pending.get(raffle_id, 0) if self.pid == os.getpid() else 0
+
+    def schedule(self):
+        """Start the flush timer unless one is running. Call with the lock held."""
+        if self.timer is None and self.interval is not None:
+            self.timer = threading.Timer(self.interval, self.flush_in_background)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """
+        Write the pending deltas to the raffle rows.
+
+        On a database error the deltas are kept for the next flush.
+
+        Returns:
+            int: Number of claims written.
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+                return 0
+            pending, self.pending = self.pending, Counter()
+            if self.timer is not None and self.timer is not threading.current_thread():
+                self.timer.cancel()
+            self.timer = None
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                # A fixed order keeps concurrent flushes of several workers from deadlocking
+                for raffle_id, delta in sorted(pending.items(), key=lambda item: str(item[0])):
+                    Raffle.objects.filter(pk=raffle_id).update(participant_count=F('participant_count') + delta)
+        except DatabaseError as e:
+            logger.error(f'Participant count flush failed, keeping {sum(pending.values())} claims pending: {e}')
+            with self.lock:
+                self.pending.update(pending)
+                self.schedule()
+            return 0
+        return sum(pending.values())
+
+    def flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+participant_counter = ParticipantCounter()
+
+
+@atexit.register
+def flush_participant_counts():
+    try:
+        participant_counter.flush()
+    except DatabaseError:
+        pass  # Reconciliation restores the lost claims
+
+
+def reconcile_participant_counts(raffles=None):
+    """
+    Recount `participant_count` from the claimed tickets where it drifted.
+
+    This process's pending deltas are flushed first. Deltas pending in other
+    live workers cannot be, and would be counted twice, so only run this
+    while no other worker is serving claims.
+
+    Args:
+        raffles (QuerySet): The raffles to check, all by default.
+
+    Returns:
+        int: Number of raffles corrected.
+    """
+    participant_counter.flush()
+    claimed = Coalesce(Subquery(
+        Ticket.objects.filter(raffle=OuterRef('pk'), participant_ip__isnull=False)
+        .order_by().values('raffle').annotate(count=Count('*')).values('count')
+    ), 0)
+    raffles = Raffle.objects.all() if raffles is None else raffles
+    drifted = list(raffles.annotate(claimed=claimed).exclude(participant_count=F('claimed')).values_list('pk', flat=True))
+    if not drifted:
+        return 0
+    return raffles.filter(pk__in=drifted).update(participant_count=claimed)
+
+
+def reconcile_on_startup():
+    """
+    Reconcile the counts as the application loads, if `RAFFLE_RECONCILE_ON_STARTUP` is set.
+
+    Meant for servers that load the application once before forking their
+    workers (e.g. `gunicorn --preload`). Where workers load it themselves and
+    a restarted worker would start next to live ones, set the setting to
+    False and run `reconcile_participant_counts` before starting the workers.
+
+    Returns:
+        int: Number of raffles corrected.
+    """
+    if not getattr(settings, 'RAFFLE_RECONCILE_ON_STARTUP', False):
+        return 0
+    try:
+        return reconcile_participant_counts()
+    except DatabaseError as e:
+        logger.error(f'Participant counts not reconciled on startup: {e}')
+        return 0
@@ -0,0 +1,97 @@
+"""
+Verification code digests.
+
+A ticket's verification code is stored as a compact binary record whose
+first byte is the format version:
+
+    0  a Django password hash (`make_password`), kept as UTF-8 text. Used by
+       tickets claimed before digests existed.
+    1  a 16-byte salt followed by SHA-256(salt + code), 49 bytes in all. Used
+       for every new code, claimed or imported, so neither claims nor bulk
+       imports pay for the password hasher.
+
+In Python a record is handled as text: the password hash itself for
+version 0 and `sha256$<salt hex>$<digest hex>` for version 1, so
+serializers and the admin show it like the former hash strings.
+"""
+import hashlib
+import hmac
+import os
+
+from django.contrib.auth.hashers import check_password
+
+DIGEST_PASSWORD_HASH = 0
+DIGEST_SHA256 = 1
+SHA256_PREFIX = 'sha256'
+SALT_LENGTH = 16
+DIGEST_LENGTH = 32
+# Version byte and a password hash of up to the former 128 characters
+DIGEST_MAX_LENGTH = 129
+
+
+def make_digest(code):
+    """
+    Digest a verification code with a random salt.
+
+    Returns:
+        str: The digest, as `sha256$<salt hex>$<digest hex>`.
+    """
+    salt = os.urandom(SALT_LENGTH)
+    return f'{SHA256_PREFIX}${salt.hex()}${sha256(salt, code).hex()}'
+
+
+def check_digest(code, encoded):
+    """
+    Check a verification code against a digest or a password hash.
+
+    Returns:
+        bool: True if the code matches.
+    """
+    if not encoded:
+        return False
+    parts = parse_sha256(encoded)
+    if parts is None:
+        return check_password(str(code), encoded)
+    salt, digest = parts
+    return hmac.compare_digest(sha256(salt, code), digest)
+
+
+def sha256(salt, code):
+    return hashlib.sha256(salt + str(code).encode()).digest()
+
+
+def parse_sha256(encoded):
+    """The salt and digest of a version 1 digest string, or None for anything else."""
+    prefix, _, rest = encoded.partition('$')
+    salt, _, digest = rest.partition('$')
+    if prefix != SHA256_PREFIX or len(salt) != SALT_LENGTH * 2 or len(digest) != DIGEST_LENGTH * 2:
+        return None
+    try:
+        return bytes.fromhex(salt), bytes.fromhex(digest)
+    except ValueError:
+        return None
+
+
+def pack_digest(encoded):
+    """Pack a digest or password hash string into its binary record."""
+    parts = parse_sha256(encoded)
+    if parts is None:
+        return bytes([DIGEST_PASSWORD_HASH]) + encoded.encode()
+    salt, digest = parts
+    return bytes([DIGEST_SHA256]) + salt + digest
+
+
+def unpack_digest(value):
+    """
+    The string form of a binary digest record.
+
+    Raises:
+        ValueError: If the record has an unknown version.
+    """
+    value = bytes(value)
+    version, record = value[:1], value[1:]
+    if version == bytes([DIGEST_PASSWORD_HASH]):
+        return record.decode()
+    if version == bytes([DIGEST_SHA256]) and len(record) == SALT_LENGTH + DIGEST_LENGTH:
+        return f'{SHA256_PREFIX}${record[:SALT_LENGTH].hex()}${record[SALT_LENGTH:].hex()}'
+    raise ValueError(f'Unknown verification digest version {value[:1]!r}')
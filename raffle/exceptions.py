@@ -61,4 +61,32 @@ class NoPrizesException(APIException):
 class TooManyPrizesException(APIException):
     status_code=400
     default_detail= "Too many prizes, the total number of prizes cannot exceed the total number of tickets."
-    default_code= 'more_prizes_than_tickets'
\ No newline at end of file
+    default_code= 'more_prizes_than_tickets'
+class RateLimitedException(APIException):
+    status_code = 429
+    default_detail = "Too many requests. Please try again later."
+    default_code = 'rate_limited'
+
+    def __init__(self, wait=None, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+class InvalidCursorException(APIException):
+    status_code = 400
+    default_detail = "Invalid pagination cursor."
+    default_code = 'invalid_cursor'
+class InvalidFilterException(APIException):
+    status_code = 400
+    default_detail = "Invalid raffle filter."
+    default_code = 'invalid_filter'
+class ExportNotManagerException(APIException):
+    status_code = 403
+    default_detail = "Only managers can export raffle data."
+    default_code = 'permission_denied'
+class ImportNotManagerException(APIException):
+    status_code = 403
+    default_detail = "Only managers can import raffles."
+    default_code = 'permission_denied'
+class InvalidImportFileException(APIException):
+    status_code = 400
+    default_detail = "Upload a CSV or NDJSON file in the 'file' field."
+    default_code = 'invalid_import_file'
@@ -0,0 +1,137 @@
+"""
+Streaming CSV and NDJSON exports of a raffle's tickets, participants and winners.
+
+Rows are read with `values_list(...).iterator(chunk_size=...)` and written
+out one chunk at a time, so an export holds at most one chunk in memory and
+the first bytes go out before the last rows are read. Under ASGI, which
+would buffer a sync iterator whole, `astream_export` hands the same chunks
+out one at a time from a thread.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+
+from .models import Ticket, Winner
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def ticket_rows(raffle):
+    return Ticket.objects.filter(raffle=raffle).order_by('ticket_number')
+
+
+def participant_rows(raffle):
+    return ticket_rows(raffle).filter(participant_ip__isnull=False)
+
+
+def winner_rows(raffle):
+    return Winner.objects.filter(raffle=raffle).order_by('ticket__ticket_number')
+
+
+# name: (queryset, exported fields, column names)
+DATASETS = {
+    'tickets': (ticket_rows, ['ticket_number', 'participant_ip', 'is_winner'], None),
+    'participants': (participant_rows, ['ticket_number', 'participant_ip'], None),
+    'winners': (
+        winner_rows,
+        ['ticket__ticket_number', 'ticket__participant_ip', 'prize'],
+        ['ticket_number', 'participant_ip', 'prize'],
+    ),
+}
+
+
+def iter_rows(raffle, dataset):
+    """
+    Iterate the rows of an export without caching the queryset.
+
+    Returns:
+        tuple: The column names and an iterator of row tuples.
+    """
+    queryset, fields, columns = DATASETS[dataset]
+    return columns or fields, queryset(raffle).values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def chunked(rows, size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_csv(columns, rows):
+    """Yield CSV text, a header and then one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for chunk in chunked(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def stream_ndjson(columns, rows):
+    """Yield one JSON object per line, one string per chunk of rows."""
+    for chunk in chunked(rows):
+        yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in chunk)
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
+
+
+def stream_export(raffle, dataset, export_format):
+    """
+    Stream an export of a raffle.
+
+    Args:
+        raffle (Raffle): The raffle instance.
+        dataset (str): 'tickets', 'participants' or 'winners'.
+        export_format (str): 'csv' or 'ndjson'.
+
+    Returns:
+        generator: The export, chunk by chunk.
+    """
+    columns, rows = iter_rows(raffle, dataset)
+    return STREAMERS[export_format](columns, rows)
+
+
+async def astream_export(raffle, dataset, export_format):
+    """
+    Stream an export of a raffle from an async iterator, as ASGI servers need.
+
+    Every chunk is produced in the request's thread, where the export's
+    database cursor lives.
+
+    Args:
+        raffle (Raffle): The raffle instance.
+        dataset (str): 'tickets', 'participants' or 'winners'.
+        export_format (str): 'csv' or 'ndjson'.
+
+    Yields:
+        str: The export, chunk by chunk.
+    """
+    chunks = stream_export(raffle, dataset, export_format)
+    next_chunk = sync_to_async(next)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
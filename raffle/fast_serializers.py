@@ -0,0 +1,150 @@
+"""
+Values-based serializers for the read-only raffle and winner endpoints.
+
+`RaffleSerializer` and `WinnerSerializer` resolve every field of every row
+through DRF's field machinery. For GETs these serializers read the
+`values()` columns they need in one query and build each response dict from
+a precomputed field plan: one `(name, getter, columns)` entry per output
+field, in the order of the DRF serializer's `Meta.fields`. A sparse fieldset
+(`?fields=`/`?exclude=`) selects plan entries, and only their columns are
+read; the selections are computed once and reused. The output renders to the same
+JSON, byte for byte, as the DRF serializers' (checked by
+`testing/fast_serializer_tests.py`); the DRF serializers stay the reference
+and handle writes.
+"""
+from django.db.models import Exists, OuterRef
+from rest_framework import serializers
+
+from .models import Raffle, Winner
+from .serializers import select_fields
+
+_datetime_field = serializers.DateTimeField()
+
+
+def optional_str(value):
+    return None if value is None else str(value)
+
+
+class ValuesSerializer:
+    """
+    Serializes a queryset from its `values()` rows with a field plan.
+
+    Subclasses build `plan` from `(output name, getter, columns)` entries,
+    where a getter takes a row dict and `columns` are the `values()` columns
+    it reads, and may name columns computed by `get_annotations`.
+    `required_columns` are always read, e.g. for pagination.
+    """
+    required_columns = ('id',)
+
+    def __init__(self):
+        self.plan = self.get_plan()
+        self.selections = {}
+
+    def get_plan(self):
+        return ()
+
+    def get_annotations(self):
+        return {}
+
+    def select(self, fieldset=None):
+        """
+        The getters and columns for a sparse fieldset.
+
+        Args:
+            fieldset (tuple): `(fields, exclude)` as from `parse_fieldset`, or None for all fields.
+
+        Returns:
+            tuple: `(getters, columns)` where getters are `(name, getter)` pairs.
+        """
+        names = tuple(select_fields([entry[0] for entry in self.plan], *(fieldset or (None, ()))))
+        selection = self.selections.get(names)
+        if selection is None:
+            entries = [entry for entry in self.plan if entry[0] in names]
+            getters = tuple((name, getter) for name, getter, _ in entries)
+            columns = tuple(dict.fromkeys(
+                self.required_columns + tuple(column for _, _, columns in entries for column in columns)))
+            selection = self.selections[names] = (getters, columns)
+        return selection
+
+    def get_rows(self, queryset, fieldset=None):
+        """Narrow a queryset to the columns the selected fields read."""
+        _, columns = self.select(fieldset)
+        annotations = {name: expression for name, expression in self.get_annotations().items() if name in columns}
+        return queryset.values(*(column for column in columns if column not in annotations), **annotations)
+
+    def serialize_row(self, row, fieldset=None):
+        getters, _ = self.select(fieldset)
+        return {name: getter(row) for name, getter in getters}
+
+    def serialize(self, rows, fieldset=None):
+        """
+        Serialize `values()` rows.
+
+        Args:
+            rows (iterable): Rows from `get_rows` with the same fieldset.
+            fieldset (tuple): `(fields, exclude)`, or None for all fields.
+
+        Returns:
+            list: The response dicts.
+        """
+        getters, _ = self.select(fieldset)
+        return [{name: getter(row) for name, getter in getters} for row in rows]
+
+
+class RaffleValuesSerializer(ValuesSerializer):
+    """Fast read equivalent of `RaffleSerializer`."""
+    required_columns = ('id', 'created_at')  # the keyset pagination cursor
+
+    def get_plan(self):
+        return (
+            ('id', lambda row: str(row['id']), ('id',)),
+            ('name', lambda row: str(row['name']), ('name',)),
+            ('total_tickets', lambda row: int(row['total_tickets']), ('total_tickets',)),
+            ('created_at', lambda row: _datetime_field.to_representation(row['created_at']), ('created_at',)),
+            ('prizes', lambda row: [{'name': str(prize['name']), 'amount': int(prize['amount'])}
+                                    for prize in row['prizes']], ('prizes',)),
+            ('available_tickets', self.get_available_tickets,
+             ('total_tickets', 'ticket_storage', 'issued_count', 'participant_count')),
+            ('winners_drawn', lambda row: row['winners_drawn'], ('winners_drawn',)),
+        )
+
+    def get_annotations(self):
+        return {'winners_drawn': Exists(Winner.objects.filter(raffle=OuterRef('pk')))}
+
+    def get_available_tickets(self, row):
+        """Same count as `Raffle.count_available_tickets`, from the row's counters."""
+        from .counters import participant_counter
+
+        if row['ticket_storage'] == Raffle.COMPACT_STORAGE:
+            claimed = row['issued_count']
+        else:
+            claimed = row['participant_count'] + participant_counter.get_pending(row['id'])
+        return max(row['total_tickets'] - claimed, 0)
+
+
+class WinnerValuesSerializer(ValuesSerializer):
+    """Fast read equivalent of `WinnerSerializer`, including the nested ticket."""
+
+    def get_plan(self):
+        return (
+            ('id', lambda row: row['id'], ('id',)),
+            ('ticket', self.get_ticket, ('ticket__id', 'ticket__raffle_id', 'ticket__ticket_number',
+                                         'ticket__verification_code', 'ticket__participant_ip')),
+            ('prize', lambda row: row['prize'], ('prize',)),
+            ('raffle', lambda row: str(row['raffle__name']), ('raffle__name',)),
+            ('ticket_number', lambda row: row['ticket__ticket_number'], ('ticket__ticket_number',)),
+        )
+
+    @staticmethod
+    def get_ticket(row):
+        return {
+            'id': row['ticket__id'],
+            'raffle_id': str(row['ticket__raffle_id']),
+            'ticket_number': int(row['ticket__ticket_number']),
+            'verification_code': optional_str(row['ticket__verification_code']),
+            'participant_ip': optional_str(row['ticket__participant_ip']),
+        }
+
+
+raffle_values_serializer = RaffleValuesSerializer()
+winner_values_serializer = WinnerValuesSerializer()
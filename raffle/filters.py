@@ -1,16 +1,85 @@
+"""
+Filters for the raffle and winner lists.
+
+`RaffleFilter` is the single place raffle list query parameters are turned
+into a query: it validates them once, applies every filter without joins
+(the winners filter is an `Exists` subquery, so no `DISTINCT` is needed),
+and describes the applied filters with a normalised `filter_key` for cache
+keys.
+"""
+import datetime
+import decimal
+
 import django_filters
+from django.db.models import Exists, OuterRef
+
+from .exceptions import InvalidFilterException
 from .models import Raffle, Winner
+from .search import filter_by_name
+
+
+def normalise_filter_value(value):
+    """A canonical string for a cleaned filter value, e.g. `10` for `Decimal('10.0')`."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(int(value)) if value == value.to_integral_value() else str(value.normalize())
+    return str(value)
+
 
 class RaffleFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr='icontains')
+    name = django_filters.CharFilter(method='filter_name')
     total_tickets = django_filters.NumberFilter()
     created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    winners_drawn = django_filters.BooleanFilter(field_name='winner', lookup_expr='isnull', exclude=True)
+    winners_drawn = django_filters.BooleanFilter(method='filter_winners_drawn')
 
     class Meta:
         model = Raffle
         fields = ['name', 'total_tickets', 'created_at', 'winners_drawn']
 
+    @classmethod
+    def from_request(cls, request, queryset=None):
+        """
+        Build and validate the filters of a request.
+
+        Raises:
+            InvalidFilterException: If a filter value does not parse.
+        """
+        filterset = cls(request.query_params, queryset=Raffle.objects.all() if queryset is None else queryset,
+                        request=request)
+        if not filterset.is_valid():
+            raise InvalidFilterException
+        return filterset
+
+    @property
+    def filter_key(self):
+        """
+        The applied filters as sorted `(name, value)` pairs of canonical strings.
+
+        Requests filtering the same raffles get the same key, e.g. for
+        `?name=Summer%20fair&total_tickets=10.0` and `?total_tickets=10&name=summer+fair`.
+        The name is only stripped and lowercased: names without words, such as
+        `!` and `?`, fall back to `icontains` and match different raffles.
+        """
+        values = {}
+        for name, value in self.form.cleaned_data.items():
+            if value in (None, ''):
+                continue
+            if name == 'name':
+                value = value.strip().lower()
+            values[name] = normalise_filter_value(value)
+        return tuple(sorted(values.items()))
+
+    def filter_name(self, queryset, name, value):
+        """Prefix-match every word of the name, most relevant raffles first."""
+        return filter_by_name(queryset, value, ranked=True)
+
+    def filter_winners_drawn(self, queryset, name, value):
+        drawn = Exists(Winner.objects.filter(raffle=OuterRef('pk')))
+        return queryset.filter(drawn if value else ~drawn)
+
 class WinnerFilter(django_filters.FilterSet):
     class Meta:
         model = Winner
@@ -0,0 +1,262 @@
+"""
+Bulk import of raffle definitions from CSV or NDJSON.
+
+Each row defines one raffle: `name`, `total_tickets`, `prizes` and
+optionally `tickets`, a list of pre-claimed tickets
+(`{"ticket_number": 3, "participant_ip": "1.2.3.4", "verification_code": "..."}`).
+In CSV, `prizes` and `tickets` are JSON-encoded columns.
+
+Rows are read lazily, validated with the same rules as the API
+(`RaffleSerializer` and `Raffle.validate_prizes`) and written in batches,
+one transaction per batch, with `bulk_create` for raffles and tickets.
+Invalid rows are reported and skipped.
+"""
+import csv
+import io
+import json
+import random
+import time
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework.exceptions import APIException
+
+from .digests import make_digest
+from .fields import pack_ip
+from .invalidation import KEY, invalidation_bus
+from .models import Raffle, Ticket
+from .serializers import RaffleSerializer
+
+FORMATS = ('csv', 'ndjson')
+RAFFLE_BATCH_SIZE = 100
+TICKET_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+    """Counts and errors of an import run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.raffles = 0
+        self.tickets = 0
+        self.errors = []
+        self.error_count = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'raffles_imported': self.raffles,
+            'tickets_created': self.tickets,
+            'errors': self.error_count,
+            'error_details': self.errors,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds else None,
+        }
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, or None."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'csv': 'csv', 'ndjson': 'ndjson', 'jsonl': 'ndjson'}.get(extension)
+
+
+def read_rows(lines, import_format):
+    """
+    Parse lines of an import file lazily.
+
+    Yields:
+        tuple: `(line_number, row)`, where row is a dict or a parse error message.
+    """
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            line = reader.line_num
+            row.pop(None, None)  # values beyond the header
+            try:
+                for field in ('prizes', 'tickets'):
+                    if row.get(field):
+                        row[field] = json.loads(row[field])
+                    else:
+                        row.pop(field, None)
+            except ValueError as e:
+                yield line, f'Invalid JSON: {e}'
+                continue
+            yield line, row
+        return
+
+    for line, text in enumerate(lines, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, f'Invalid JSON: {e}'
+            continue
+        yield line, row if isinstance(row, dict) else 'Each line must be a JSON object.'
+
+
+def validate_row(row):
+    """
+    Validate one raffle definition.
+
+    Returns:
+        tuple: `(raffle, tickets, errors)`; an unsaved `Raffle` and its
+            pre-claimed ticket dicts, or a list of error messages.
+    """
+    total_tickets = row.get('total_tickets')
+    if isinstance(total_tickets, str) and total_tickets.strip().isdigit():
+        row = {**row, 'total_tickets': int(total_tickets)}
+    elif not isinstance(total_tickets, int) or isinstance(total_tickets, bool):
+        return None, None, ['total_tickets: A valid integer is required.']
+
+    serializer = RaffleSerializer(data=row)
+    try:
+        if not serializer.is_valid():
+            return None, None, [f'{field}: {" ".join(map(str, messages))}'
+                                for field, messages in serializer.errors.items()]
+    except APIException as e:
+        return None, None, [str(e.detail)]
+
+    data = serializer.validated_data
+    prizes = [dict(prize) for prize in data['prizes']]
+    raffle = Raffle(name=data['name'], total_tickets=data['total_tickets'], prizes=prizes)
+    try:
+        raffle.validate_prizes()
+    except ValidationError as e:
+        return None, None, e.messages
+
+    tickets = row.get('tickets') or []
+    errors = validate_tickets(raffle, tickets)
+    return (None, None, errors) if errors else (raffle, tickets, [])
+
+
+def validate_tickets(raffle, tickets):
+    if not isinstance(tickets, list):
+        return ['tickets: Must be a list.']
+    errors, numbers, ips = [], set(), set()
+    for n, ticket in enumerate(tickets):
+        if not isinstance(ticket, dict):
+            errors.append(f'tickets[{n}]: Must be an object.')
+            continue
+        number, ip = ticket.get('ticket_number'), ticket.get('participant_ip')
+        if isinstance(number, bool) or not isinstance(number, int) or not 1 <= number <= raffle.total_tickets:
+            errors.append(f'tickets[{n}]: ticket_number must be between 1 and {raffle.total_tickets}.')
+        elif number in numbers:
+            errors.append(f'tickets[{n}]: Duplicate ticket_number {number}.')
+        else:
+            numbers.add(number)
+        try:
+            # Compared packed, like the (raffle, participant_ip) unique constraint: '::1' and '0::1' are one IP
+            packed = pack_ip(ip.strip()) if isinstance(ip, str) else None
+        except ValueError:
+            packed = None
+        if packed is None:
+            errors.append(f'tickets[{n}]: Invalid participant_ip {ip!r}.')
+        elif packed in ips:
+            errors.append(f'tickets[{n}]: Duplicate participant_ip {ip}.')
+        else:
+            ips.add(packed)
+    return errors
+
+
+def build_tickets(raffle, claimed):
+    """
+    Yield the ticket rows of an imported raffle.
+
+    Row-storage raffles get every ticket, in shuffled order like
+    `Raffle.generate_tickets`; compact raffles only their claimed tickets.
+    Codes are stored as salted digests like claimed ones (see
+    `raffle.digests`), so a batch costs microseconds per ticket rather than
+    a password hash each. Claimed tickets without a verification code get a
+    random one nobody knows, as `Raffle.get_random_ticket` does.
+    """
+    claimed = {ticket['ticket_number']: ticket for ticket in claimed}
+    numbers = list(claimed) if raffle.is_compact else list(range(1, raffle.total_tickets + 1))
+    random.shuffle(numbers)
+    for number in numbers:
+        ticket = claimed.get(number)
+        if ticket is None:
+            yield Ticket(raffle=raffle, ticket_number=number)
+        else:
+            yield Ticket(raffle=raffle, ticket_number=number, participant_ip=ticket['participant_ip'],
+                         verification_code=make_digest(ticket.get('verification_code') or uuid.uuid4()))
+
+
+def save_batch(batch, report):
+    """Write a batch of validated raffles and their tickets in one transaction."""
+    with transaction.atomic():
+        raffles = []
+        for raffle, claimed in batch:
+            if claimed:
+                # Compact numbering cannot absorb arbitrary pre-claimed numbers
+                raffle.ticket_storage = Raffle.ROW_STORAGE
+                raffle.participant_count = len(claimed)
+            else:
+                raffle.choose_ticket_storage()
+            raffles.append(raffle)
+        Raffle.objects.bulk_create(raffles)
+
+        for raffle, claimed in batch:
+            tickets = build_tickets(raffle, claimed)
+            while True:
+                chunk = [ticket for _, ticket in zip(range(TICKET_BATCH_SIZE), tickets)]
+                if not chunk:
+                    break
+                Ticket.objects.bulk_create(chunk)
+                report.tickets += len(chunk)
+    report.raffles += len(batch)
+
+
+def import_raffles(lines, import_format, batch_size=RAFFLE_BATCH_SIZE, dry_run=False):
+    """
+    Import raffle definitions.
+
+    Args:
+        lines (iterable): Text lines of the file.
+        import_format (str): 'csv' or 'ndjson'.
+        batch_size (int): Raffles written per transaction.
+        dry_run (bool): Only validate.
+
+    Returns:
+        ImportReport: Counts, errors and throughput of the run.
+    """
+    report = ImportReport()
+    batch = []
+    for line, row in read_rows(lines, import_format):
+        report.rows += 1
+        if isinstance(row, str):
+            report.add_error(line, [row])
+            continue
+        raffle, claimed, errors = validate_row(row)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        if not dry_run:
+            batch.append((raffle, claimed))
+            if len(batch) >= batch_size:
+                save_batch(batch, report)
+                batch = []
+    if batch:
+        save_batch(batch, report)
+    if report.raffles:
+        # bulk_create sends no post_save signals
+        invalidation_bus.publish(KEY, 'raffle_list')
+    report.finish()
+    return report
+
+
+def open_text(binary_file):
+    """Wrap an uploaded or opened binary file for line-by-line text reading."""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
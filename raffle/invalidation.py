@@ -0,0 +1,260 @@
+"""
+Cross-process cache invalidation.
+
+The default `LocMemCache` and `raffle_cache`'s local copies live in each
+worker process, so deleting a key or dropping a raffle only affects the
+process that does it. `invalidation_bus` carries these invalidations to
+every worker:
+
+- `publish(kind, key, version)` runs this process's subscribers for the
+  event at once. Once the current transaction commits, it runs them again
+  and appends the event to a log shared by all workers.
+- `poll()` reads the events other processes appended since the last poll, at
+  most once per `RAFFLE_INVALIDATION_POLL_INTERVAL` seconds, and runs the
+  subscribers for each of them. `raffle_cache` and the raffle list poll
+  before they read their caches.
+
+Events are either `KEY` (a cache key to delete from the local Django cache)
+or `RAFFLE` (a raffle whose version changed, with the new version if known);
+other modules subscribe with `subscribe(kind, callback)`. A worker that falls
+so far behind that events it has not seen were pruned gets a `RESET` instead,
+and drops everything it holds locally.
+
+The log is a SQLite file (`RAFFLE_INVALIDATION_PATH`), which every worker on
+one host can share; it stands in for a message broker. Events are kept for
+`RAFFLE_INVALIDATION_RETENTION` seconds. `RAFFLE_INVALIDATION_BACKEND =
+'local'` keeps the events in the process, for single-process deployments.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .logging_utils import logger
+
+KEY = 'key'
+RAFFLE = 'raffle'
+RESET = 'reset'
+
+DEFAULT_BACKEND = 'sqlite'
+DEFAULT_POLL_INTERVAL = 0.5  # seconds between polls of the shared log
+DEFAULT_RETENTION = 60 * 60  # seconds events are kept
+PRUNE_EVERY = 100  # events appended between prunes
+
+
+class SQLiteBackend:
+    """The event log in a SQLite file shared by the workers of one host."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, '
+            'kind TEXT NOT NULL, key TEXT NOT NULL, version INTEGER, created_at REAL NOT NULL)'
+        )
+
+    def append(self, origin, kind, key, version, retention):
+        cursor = self.connection.execute(
+            'INSERT INTO events (origin, kind, key, version, created_at) VALUES (?, ?, ?, ?, ?)',
+            (origin, kind, key, version, time.time()),
+        )
+        if cursor.lastrowid % PRUNE_EVERY == 0:
+            self.connection.execute('DELETE FROM events WHERE created_at < ?', (time.time() - retention,))
+
+    def latest(self):
+        return self.connection.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    def read(self, after):
+        """The events after id `after`, oldest first, as `(id, origin, kind, key, version)` rows."""
+        return self.connection.execute(
+            'SELECT id, origin, kind, key, version FROM events WHERE id > ? ORDER BY id', (after,)
+        ).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+class LocalBackend:
+    """The event log in this process only; nothing reaches other workers."""
+
+    def __init__(self, path=None):
+        self.events = []
+
+    def append(self, origin, kind, key, version, retention):
+        self.events.append((len(self.events) + 1, origin, kind, key, version))
+
+    def latest(self):
+        return len(self.events)
+
+    def read(self, after):
+        return self.events[after:]
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'local': LocalBackend,
+}
+
+
+def delete_cached_key(key, version=None):
+    cache.delete(key)
+
+
+def clear_local_cache():
+    # A shared cache saw every deletion directly; only a per-process one can miss any
+    if isinstance(caches['default'], LocMemCache):
+        cache.clear()
+
+
+class InvalidationBus:
+    """Publishes invalidation events to the shared log and runs local subscribers for them."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.subscribers = defaultdict(list)
+        self.backend = None
+        self.reset()
+
+    def reset(self):
+        """Close the log; the next poll or publish reopens it and starts at its end."""
+        with self.lock:
+            if self.backend is not None:
+                self.backend.close()
+            self.pid = os.getpid()
+            self.origin = f'{socket.gethostname()}:{self.pid}'
+            self.backend = None
+            self.config = None
+            self.cursor = None
+            self.next_poll = 0.0
+
+    @property
+    def poll_interval(self):
+        return getattr(settings, 'RAFFLE_INVALIDATION_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+
+    @property
+    def retention(self):
+        return getattr(settings, 'RAFFLE_INVALIDATION_RETENTION', DEFAULT_RETENTION)
+
+    def subscribe(self, kind, callback):
+        """
+        Run `callback` for every event of a kind.
+
+        Args:
+            kind (str): `KEY` or `RAFFLE`, called with `(key, version)`, or
+                `RESET`, called without arguments.
+            callback (callable): The subscriber.
+        """
+        if callback not in self.subscribers[kind]:
+            self.subscribers[kind].append(callback)
+
+    def get_backend(self):
+        """
+        The backend for the current settings, opened on first use and after a fork. Call with the lock held.
+
+        Raises:
+            ImproperlyConfigured: If `RAFFLE_INVALIDATION_BACKEND` is unknown.
+        """
+        name = getattr(settings, 'RAFFLE_INVALIDATION_BACKEND', DEFAULT_BACKEND)
+        path = getattr(settings, 'RAFFLE_INVALIDATION_PATH', None) or os.path.join(settings.BASE_DIR,
+                                                                               'invalidation.sqlite3')
+        config = (name, str(path))
+        if self.pid != os.getpid():
+            # The parent's connection must not be used in a child; its cursor still applies
+            cursor, self.backend = self.cursor, None
+            self.reset()
+            self.cursor = cursor
+        if self.backend is None or self.config != config:
+            if name not in BACKENDS:
+                raise ImproperlyConfigured(
+                    f'Unknown RAFFLE_INVALIDATION_BACKEND {name!r}, expected one of {", ".join(BACKENDS)}')
+            if self.backend is not None:
+                self.backend.close()
+                self.cursor = None
+            self.backend, self.config = BACKENDS[name](config[1]), config
+        if self.cursor is None:
+            # Nothing is cached locally yet, so earlier events do not matter
+            self.cursor = self.backend.latest()
+        return self.backend
+
+    def publish(self, kind, key, version=None):
+        """
+        Invalidate a key or raffle in this process now and in every process once the transaction commits.
+
+        Args:
+            kind (str): `KEY` or `RAFFLE`.
+            key (str): The cache key or the raffle's primary key.
+            version (int): The raffle's new version, if known.
+        """
+        key = str(key)
+        self.dispatch(kind, key, version)
+
+        def send():
+            self.dispatch(kind, key, version)
+            with self.lock:
+                try:
+                    self.get_backend().append(self.origin, kind, key, version, self.retention)
+                except sqlite3.Error as e:
+                    logger.error(f'Invalidation of {kind} {key} not published: {e}')
+
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(send)
+        else:
+            send()
+
+    def poll(self, force=False):
+        """
+        Run the subscribers for the events other processes published since the last poll.
+
+        Args:
+            force (bool): Poll even if the last poll was less than
+                `RAFFLE_INVALIDATION_POLL_INTERVAL` seconds ago.
+
+        Returns:
+            int: Number of events applied.
+        """
+        now = time.monotonic()
+        if not force and now < self.next_poll and self.pid == os.getpid():
+            return 0
+        with self.lock:
+            self.next_poll = now + self.poll_interval
+            try:
+                backend = self.get_backend()
+                if backend.latest() == self.cursor:
+                    return 0
+                events = backend.read(self.cursor)
+            except sqlite3.Error as e:
+                logger.error(f'Invalidation events not read: {e}')
+                return 0
+            if events and events[0][0] > self.cursor + 1:
+                # Events this process never saw were pruned
+                logger.warning(f'Invalidation log pruned past event {self.cursor}, dropping local caches')
+                self.dispatch(RESET)
+            applied = 0
+            for event_id, origin, kind, key, version in events:
+                self.cursor = event_id
+                if origin != self.origin:
+                    self.dispatch(kind, key, version)
+                    applied += 1
+            return applied
+
+    def dispatch(self, kind, *args):
+        for callback in self.subscribers[kind]:
+            callback(*args)
+
+
+invalidation_bus = InvalidationBus()
+invalidation_bus.subscribe(KEY, delete_cached_key)
+invalidation_bus.subscribe(RESET, clear_local_cache)
@@ -0,0 +1,205 @@
+"""
+Live raffle availability for Server-Sent Events subscribers.
+
+One `AvailabilityPublisher` per process fans raffle state out to every SSE
+subscriber. Claims and draws only mark a raffle as changed
+(`publisher.notify`); a ticker task on the event loop then reads the state of
+each changed raffle at most once per `RAFFLE_LIVE_INTERVAL` and pushes it to
+all of that raffle's subscribers, so thousands of viewers cost one read per
+tick instead of one count query per poll. Raffles that were not notified are
+re-read every `RAFFLE_LIVE_REFRESH` seconds to pick up claims handled by
+other worker processes.
+
+Each subscriber queue holds only the latest state: a slow client skips
+intermediate updates instead of buffering them. Streams end after
+`RAFFLE_LIVE_MAX_AGE` seconds and the client's EventSource reconnects, which
+bounds how long the subscription of a silently disconnected client lives.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Raffle, Winner
+
+DEFAULT_INTERVAL = 0.25  # seconds between ticks
+DEFAULT_REFRESH = 2.0  # seconds before an unnotified raffle is re-read
+DEFAULT_HEARTBEAT = 15.0  # seconds between keep-alive comments
+DEFAULT_MAX_AGE = 300.0  # seconds before a stream is closed
+
+
+def read_state(raffle_id):
+    """
+    Read the live state of a raffle.
+
+    Returns:
+        dict | None: `available_tickets` and `winners_drawn`, or None if the
+            raffle no longer exists.
+    """
+    raffle = Raffle.objects.filter(pk=raffle_id).first()
+    if raffle is None:
+        return None
+    return {
+        'available_tickets': raffle.count_available_tickets(),
+        'winners_drawn': Winner.objects.filter(raffle_id=raffle_id).exists(),
+    }
+
+
+def format_event(state, event='availability'):
+    """Encode a state as one SSE message."""
+    return f'event: {event}\ndata: {json.dumps(state, separators=(",", ":"))}\n\n'
+
+
+class AvailabilityPublisher:
+    """Coalesces raffle changes and fans them out to SSE subscribers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.states = {}
+        self.read_at = {}
+        self.dirty = set()
+        self.loop = None
+        self.task = None
+        self.reads = 0
+
+    @property
+    def interval(self):
+        return getattr(settings, 'RAFFLE_LIVE_INTERVAL', DEFAULT_INTERVAL)
+
+    @property
+    def refresh(self):
+        return getattr(settings, 'RAFFLE_LIVE_REFRESH', DEFAULT_REFRESH)
+
+    def notify(self, raffle_id):
+        """
+        Mark a raffle as changed. Safe to call from any thread.
+
+        Args:
+            raffle_id (UUID | str): The changed raffle.
+        """
+        with self.lock:
+            if str(raffle_id) in self.subscribers:
+                self.dirty.add(str(raffle_id))
+
+    async def subscribe(self, raffle_id):
+        """
+        Register a subscriber and send it the current state.
+
+        Returns:
+            asyncio.Queue: Receives the raffle state on every change.
+        """
+        raffle_id = str(raffle_id)
+        queue = asyncio.Queue(maxsize=1)
+        with self.lock:
+            self.subscribers.setdefault(raffle_id, set()).add(queue)
+            state = self.states.get(raffle_id)
+        if state is None:
+            state = await self.read(raffle_id)
+        if state is not None:
+            self.offer(queue, state)
+        self.ensure_ticker()
+        return queue
+
+    def unsubscribe(self, raffle_id, queue):
+        raffle_id = str(raffle_id)
+        with self.lock:
+            queues = self.subscribers.get(raffle_id)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[raffle_id]
+                self.states.pop(raffle_id, None)
+                self.read_at.pop(raffle_id, None)
+                self.dirty.discard(raffle_id)
+
+    def subscriber_count(self, raffle_id=None):
+        with self.lock:
+            if raffle_id is not None:
+                return len(self.subscribers.get(str(raffle_id), ()))
+            return sum(len(queues) for queues in self.subscribers.values())
+
+    @staticmethod
+    def offer(queue, state):
+        """Replace whatever the subscriber has not consumed yet with `state`."""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(state)
+
+    async def read(self, raffle_id):
+        state = await sync_to_async(read_state)(raffle_id)
+        with self.lock:
+            self.reads += 1
+            if raffle_id in self.subscribers:
+                self.states[raffle_id] = state
+                self.read_at[raffle_id] = time.monotonic()
+        return state
+
+    def ensure_ticker(self):
+        """Start the ticker on the running loop unless it is already running there."""
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.task = loop.create_task(self.run())
+
+    def due(self):
+        """Raffles to re-read this tick: notified ones and those not read recently."""
+        now = time.monotonic()
+        with self.lock:
+            due = {raffle_id for raffle_id in self.subscribers
+                   if raffle_id in self.dirty or now - self.read_at.get(raffle_id, 0) >= self.refresh}
+            self.dirty -= due
+            return due
+
+    async def tick(self):
+        for raffle_id in self.due():
+            previous = self.states.get(raffle_id)
+            state = await self.read(raffle_id)
+            if state == previous:
+                continue
+            with self.lock:
+                queues = list(self.subscribers.get(raffle_id, ()))
+            for queue in queues:
+                self.offer(queue, state)
+
+    async def run(self):
+        while self.subscriber_count():
+            await asyncio.sleep(self.interval)
+            await self.tick()
+
+
+publisher = AvailabilityPublisher()
+
+
+async def stream_availability(raffle_id):
+    """
+    Yield the SSE messages of one subscriber.
+
+    The stream ends when the client disconnects, after `RAFFLE_LIVE_MAX_AGE`
+    seconds, or with a `deleted` event when the raffle is removed.
+    """
+    heartbeat = getattr(settings, 'RAFFLE_LIVE_HEARTBEAT', DEFAULT_HEARTBEAT)
+    closes_at = time.monotonic() + getattr(settings, 'RAFFLE_LIVE_MAX_AGE', DEFAULT_MAX_AGE)
+    queue = await publisher.subscribe(raffle_id)
+    try:
+        yield f'retry: {int(publisher.refresh * 1000)}\n\n'
+        while True:
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                state = await asyncio.wait_for(queue.get(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                if time.monotonic() < closes_at:
+                    yield ': keep-alive\n\n'
+                continue
+            if state is None:
+                yield format_event({}, 'deleted')
+                return
+            yield format_event(state)
+    finally:
+        publisher.unsubscribe(raffle_id, queue)
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from django.conf import settings
 from django.shortcuts import render
 import logging
+import math
 
 from .exceptions import *
 
@@ -69,6 +70,24 @@ def custom_exception_handler(exc, context):
     elif isinstance(exc, TooManyPrizesException):
         error_message = exc.default_detail
         status_code = exc.status_code
+    elif isinstance(exc, RateLimitedException):
+        error_message = exc.default_detail
+        status_code = exc.status_code
+    elif isinstance(exc, InvalidCursorException):
+        error_message = exc.default_detail
+        status_code = exc.status_code
+    elif isinstance(exc, InvalidFilterException):
+        error_message = exc.default_detail
+        status_code = exc.status_code
+    elif isinstance(exc, ExportNotManagerException):
+        error_message = exc.default_detail
+        status_code = exc.status_code
+    elif isinstance(exc, ImportNotManagerException):
+        error_message = exc.default_detail
+        status_code = exc.status_code
+    elif isinstance(exc, InvalidImportFileException):
+        error_message = exc.default_detail
+        status_code = exc.status_code
     else:
         error_message = "An unexpected error occurred."
         status_code = 500
@@ -76,9 +95,13 @@ def custom_exception_handler(exc, context):
     logger.error(f"Error response rendered: {error_message} with status code {status_code}")
 
     if request.accepted_renderer.format == 'html':
-        return render(request, template_name, {
+        response = render(request, template_name, {
             'raffle': raffle,
             'error_message': error_message
         }, status=status_code)
+    else:
+        response = Response({"detail": error_message}, status=status_code)
 
-    return Response({"detail": error_message}, status=status_code)
+    if getattr(exc, 'wait', None) is not None:
+        response['Retry-After'] = str(math.ceil(exc.wait))
+    return response
@@ -0,0 +1,47 @@
+"""
+Import raffles from a CSV or NDJSON file.
+
+Usage:
+    python manage.py import_raffles raffles.ndjson
+    python manage.py import_raffles - --format csv < raffles.csv
+"""
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from raffle.imports import FORMATS, RAFFLE_BATCH_SIZE, detect_format, import_raffles, open_text
+
+
+class Command(BaseCommand):
+    help = 'Import raffle definitions (name, total_tickets, prizes, optional tickets) from CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=RAFFLE_BATCH_SIZE,
+                            help=f'Raffles written per transaction (default: {RAFFLE_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or detect_format(path)
+        if import_format is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+
+        try:
+            source = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+        with open_text(source) as lines:
+            report = import_raffles(lines, import_format, options['batch_size'], options['dry_run'])
+
+        for error in report.errors:
+            self.stderr.write(f'line {error["line"]}: {"; ".join(error["errors"])}')
+        summary = report.as_dict()
+        self.stdout.write(
+            f'{summary["rows"]} rows, {summary["raffles_imported"]} raffles and {summary["tickets_created"]} tickets '
+            f'imported, {summary["errors"]} errors in {summary["seconds"]}s ({summary["rows_per_second"]} rows/s)'
+        )
+        if options['verbosity'] > 1:
+            self.stdout.write(json.dumps(summary, indent=2))
@@ -0,0 +1,21 @@
+"""
+Recount Raffle.participant_count from the claimed tickets.
+
+Run after a worker crash, before starting the workers again, to restore
+claims whose write-behind deltas were lost. Do not run it while workers are
+serving claims: their unflushed deltas would be counted twice.
+
+Usage:
+    python manage.py reconcile_participant_counts
+"""
+from django.core.management.base import BaseCommand
+
+from raffle.counters import reconcile_participant_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount the participants of every raffle from its claimed tickets.'
+
+    def handle(self, *args, **options):
+        corrected = reconcile_participant_counts()
+        self.stdout.write(f'{corrected} raffle counts corrected')
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0012_alter_ticket_verification_code"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="raffle",
+            index=models.Index(fields=["-created_at", "id"], name="raffle_created_at_id_idx"),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:40
+
+from django.db import migrations
+
+from raffle.search import install_search_index, remove_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def remove(apps, schema_editor):
+    remove_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0013_raffle_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, remove),
+    ]
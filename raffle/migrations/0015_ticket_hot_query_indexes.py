@@ -0,0 +1,41 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:52
+
+from django.db import migrations, models
+
+
+def create_covering_index(apps, schema_editor):
+    """
+    Covering index for ticket verification lookups.
+
+    Only PostgreSQL supports INCLUDE; elsewhere the (raffle, ticket_number)
+    unique index already serves the lookup and a copy would only cost writes.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS ticket_verification_idx ON raffle_ticket "
+            "(raffle_id, ticket_number) INCLUDE (id, verification_code, is_winner)"
+        )
+
+
+def drop_covering_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS ticket_verification_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0014_raffle_name_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("participant_ip__isnull", True)),
+                fields=["raffle", "ticket_number"],
+                name="ticket_unclaimed_idx",
+            ),
+        ),
+        migrations.RunPython(create_covering_index, drop_covering_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0015_ticket_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="lease_owner",
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="leased_until",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
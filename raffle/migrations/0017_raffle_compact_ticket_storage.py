@@ -0,0 +1,38 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0016_ticket_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="raffle",
+            name="issued_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="raffle",
+            name="permutation_multiplier",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="raffle",
+            name="permutation_offset",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="raffle",
+            name="ticket_storage",
+            field=models.CharField(
+                choices=[("rows", "One row per ticket"), ("compact", "Rows for claimed tickets only")],
+                default="rows",
+                editable=False,
+                max_length=8,
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_participants(apps, schema_editor):
+    Raffle = apps.get_model("raffle", "Raffle")
+    Ticket = apps.get_model("raffle", "Ticket")
+    claimed = (
+        Ticket.objects.filter(raffle=OuterRef("pk"), participant_ip__isnull=False)
+        .order_by().values("raffle").annotate(count=Count("*")).values("count")
+    )
+    Raffle.objects.update(participant_count=Coalesce(Subquery(claimed), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0017_raffle_compact_ticket_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="raffle",
+            name="participant_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_participants, migrations.RunPython.noop),
+    ]
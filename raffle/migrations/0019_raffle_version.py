@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0018_raffle_participant_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="raffle",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.1 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+import raffle.fields
+
+BATCH_SIZE = 2000
+
+
+def copy_ips(apps, source, target):
+    Ticket = apps.get_model("raffle", "Ticket")
+    claimed = Ticket.objects.filter(**{f"{source}__isnull": False}).order_by().values_list("pk", source)
+    batch = []
+    for pk, ip in claimed.iterator(chunk_size=BATCH_SIZE):
+        batch.append(Ticket(pk=pk, **{target: ip}))
+        if len(batch) == BATCH_SIZE:
+            Ticket.objects.bulk_update(batch, [target])
+            batch = []
+    Ticket.objects.bulk_update(batch, [target])
+
+
+def pack_ips(apps, schema_editor):
+    copy_ips(apps, "participant_ip", "participant_ip_packed")
+
+
+def unpack_ips(apps, schema_editor):
+    copy_ips(apps, "participant_ip_packed", "participant_ip")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0019_raffle_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="participant_ip_packed",
+            field=raffle.fields.PackedIPAddressField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_ips, unpack_ips),
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together={("raffle", "ticket_number")},
+        ),
+        migrations.RemoveIndex(
+            model_name="ticket",
+            name="ticket_unclaimed_idx",
+        ),
+        migrations.RemoveField(
+            model_name="ticket",
+            name="participant_ip",
+        ),
+        migrations.RenameField(
+            model_name="ticket",
+            old_name="participant_ip_packed",
+            new_name="participant_ip",
+        ),
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together={("raffle", "ticket_number"), ("raffle", "participant_ip")},
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("participant_ip__isnull", True)),
+                fields=["raffle", "ticket_number"],
+                name="ticket_unclaimed_idx",
+            ),
+        ),
+    ]
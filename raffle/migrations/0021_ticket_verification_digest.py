@@ -0,0 +1,70 @@
+# Generated by Django 4.2.1 on 2026-10-19 03:05
+
+from django.db import migrations
+
+import raffle.fields
+
+BATCH_SIZE = 2000
+
+
+def copy_codes(apps, source, target):
+    Ticket = apps.get_model("raffle", "Ticket")
+    claimed = Ticket.objects.filter(**{f"{source}__isnull": False}).order_by().values_list("pk", source)
+    batch = []
+    for pk, code in claimed.iterator(chunk_size=BATCH_SIZE):
+        batch.append(Ticket(pk=pk, **{target: code}))
+        if len(batch) == BATCH_SIZE:
+            Ticket.objects.bulk_update(batch, [target])
+            batch = []
+    Ticket.objects.bulk_update(batch, [target])
+
+
+def pack_codes(apps, schema_editor):
+    # Existing password hashes become version 0 records
+    copy_codes(apps, "verification_code", "verification_digest")
+
+
+def unpack_codes(apps, schema_editor):
+    # Version 1 digests come back as their 104-character string form
+    copy_codes(apps, "verification_digest", "verification_code")
+
+
+def create_covering_index(apps, schema_editor):
+    """The PostgreSQL covering index of 0015, which INCLUDEs the verification code column."""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS ticket_verification_idx ON raffle_ticket "
+            "(raffle_id, ticket_number) INCLUDE (id, verification_code, is_winner)"
+        )
+
+
+def drop_covering_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS ticket_verification_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("raffle", "0020_ticket_packed_participant_ip"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="verification_digest",
+            field=raffle.fields.VerificationDigestField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_codes, unpack_codes),
+        migrations.RunPython(drop_covering_index, create_covering_index),
+        migrations.RemoveField(
+            model_name="ticket",
+            name="verification_code",
+        ),
+        migrations.RenameField(
+            model_name="ticket",
+            old_name="verification_digest",
+            new_name="verification_code",
+        ),
+        migrations.RunPython(create_covering_index, drop_covering_index),
+    ]
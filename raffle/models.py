@@ -5,22 +5,54 @@ The `Raffle` model represents a single raffle event, defining its properties and
 The `Ticket` model represents a single ticket in a raffle, with unique ticket number and verification code.
 The `Winner` model represents a participant who has won a prize in a raffle.
 """
+from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from django.contrib.auth.hashers import make_password, check_password
+import math
 import random
 import uuid
-from django.db import transaction
+from django.db import IntegrityError, transaction
+
+from .exceptions import AlreadyParticipatedException
+from .digests import check_digest, make_digest
+from .fields import PackedIPAddressField, VerificationDigestField
+
+# Unclaimed tickets tried per round when claiming a ticket
+CLAIM_CANDIDATES = 8
 
 
 class Raffle(models.Model):
     """Represents a single raffle event."""
+    ROW_STORAGE = 'rows'
+    COMPACT_STORAGE = 'compact'
+    COUNTER_FIELDS = ('issued_count', 'participant_count')
+    TICKET_STORAGE_CHOICES = [
+        (ROW_STORAGE, 'One row per ticket'),
+        (COMPACT_STORAGE, 'Rows for claimed tickets only'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255, unique=False)
     total_tickets = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     prizes = models.JSONField(default=list)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Compact storage: the n-th claimed ticket gets number (n * multiplier + offset) % total_tickets + 1
+    ticket_storage = models.CharField(max_length=8, choices=TICKET_STORAGE_CHOICES, default=ROW_STORAGE,
+                                      editable=False)
+    permutation_multiplier = models.BigIntegerField(null=True, blank=True, editable=False)
+    permutation_offset = models.BigIntegerField(null=True, blank=True, editable=False)
+    issued_count = models.PositiveIntegerField(default=0, editable=False)
+    # Claimed tickets, written behind by raffle.counters.participant_counter
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped by every save and by bump_version; keys the cached JSON fragments of the raffle
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves the list ordering and keyset pagination
+            models.Index(fields=['-created_at', 'id'], name='raffle_created_at_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -50,12 +82,98 @@ class Raffle(models.Model):
             if not isinstance(prize["amount"], int) or prize["amount"] <= 0:
                 raise ValidationError("The 'amount' key of each prize must be a positive integer.")
 
+    def bump_version(self):
+        """
+        Mark the cached representations of the raffle as stale.
+
+        `save()` does this itself; call it after changing the raffle's
+        winners or fields with queryset updates.
+        """
+        from .caching import raffle_cache
+
+        Raffle.objects.filter(pk=self.pk).update(version=models.F('version') + 1)
+        self.version += 1
+        raffle_cache.invalidate(self.pk, self.version)
+
+    @property
+    def is_compact(self):
+        return self.ticket_storage == self.COMPACT_STORAGE
+
     def save(self, *args, **kwargs):
-        """Generate tickets after raffle creation."""
+        """
+        Generate tickets after raffle creation.
+
+        Raffles of at least `RAFFLE_COMPACT_TICKETS_THRESHOLD` tickets use
+        compact storage: no rows are generated, only the permutation that
+        numbers the claimed tickets.
+        """
+        if self._state.adding:
+            self.choose_ticket_storage()
+        version = None
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The counters only change through F() updates; never write back a stale copy
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.COUNTER_FIELDS]
+            version, self.version = self.version, models.F('version') + 1
         super().save(*args, **kwargs)
-        if not self.tickets.exists():
+        if version is not None:
+            self.version = version + 1  # The stored version may be ahead after concurrent saves
+        if not self.is_compact and not self.tickets.exists():
             self.generate_tickets()
 
+    def choose_ticket_storage(self):
+        """Switch a new raffle to compact storage if it is large enough."""
+        threshold = getattr(settings, 'RAFFLE_COMPACT_TICKETS_THRESHOLD', None)
+        if threshold is not None and self.total_tickets >= threshold:
+            self.ticket_storage = self.COMPACT_STORAGE
+        if self.is_compact and self.permutation_multiplier is None:
+            self.choose_permutation()
+
+    def choose_permutation(self):
+        """
+        Pick the permutation that numbers the tickets of a compact raffle.
+
+        `n -> (n * multiplier + offset) % total_tickets` is a bijection on
+        `[0, total_tickets)` whenever the multiplier is coprime with
+        `total_tickets`, so every ticket number is issued exactly once.
+        """
+        total = min(self.total_tickets, 2**31 - 1)
+        multiplier = random.randrange(1, total) if total > 1 else 1
+        while math.gcd(multiplier, total) != 1:
+            multiplier = random.randrange(1, total)
+        self.permutation_multiplier = multiplier
+        self.permutation_offset = random.randrange(total)
+
+    def get_ticket_number(self, position):
+        """Ticket number of the `position`-th (0-based) claimed ticket of a compact raffle."""
+        total = min(self.total_tickets, 2**31 - 1)
+        return (position * self.permutation_multiplier + self.permutation_offset) % total + 1
+
+    def count_available_tickets(self):
+        """
+        Count the tickets still available.
+
+        Returns:
+            int: Unclaimed tickets; for compact raffles worked out from the
+                current issued count, otherwise from the loaded participant
+                count plus this process's unflushed claims. Claims of other
+                processes show up once they flush, so use
+                `has_available_tickets` where the answer must be exact.
+        """
+        from .counters import participant_counter
+
+        if self.is_compact:
+            issued = Raffle.objects.filter(pk=self.pk).values_list('issued_count', flat=True).first() or 0
+            return max(self.total_tickets - issued, 0)
+        claimed = self.participant_count + participant_counter.get_pending(self.pk)
+        return max(self.total_tickets - claimed, 0)
+
+    def has_available_tickets(self):
+        """Check if any ticket is still available."""
+        if self.is_compact:
+            return self.count_available_tickets() > 0
+        return self.tickets.filter(participant_ip=None).exists()
+
     def generate_tickets(self):
         """Generate and shuffle tickets for the raffle."""
         max_ticket_number = min(self.total_tickets, 2**31 - 1)  # Limiting to 2^31 - 1 for SQLite compatibility
@@ -72,27 +190,100 @@ class Raffle(models.Model):
         # Creating tickets in bulk to optimize database operations   
         Ticket.objects.bulk_create(tickets)
 
-    def get_random_ticket(self, participant_ip):
-        """Get a random available ticket for the given participant IP."""
-        with transaction.atomic():
-            available_ticket = self.tickets.select_related('raffle').filter(participant_ip__isnull=True).order_by('?').select_for_update().first()#to ensure non-sequential distribution of tickets
-            if available_ticket:
-                available_ticket.participant_ip = participant_ip
-                available_ticket.save()
-                self.refresh_from_db()
-        return available_ticket
+    def get_random_ticket(self, participant_ip, verification_code=None):
+        """
+        Claim a random available ticket for the given participant IP.
+
+        The claim itself is made by the strategy in `raffle.claims` that fits
+        the database backend, or by `CompactClaim` for compact raffles. Either way two concurrent claimers never get the
+        same ticket, and the raffle is not reloaded.
+
+        Args:
+            participant_ip (str): The participant's IP address.
+            verification_code (str): The plain verification code to store digested.
+                A random one is used if omitted.
+
+        Returns:
+            Ticket: The claimed ticket, or None if no tickets are left.
+
+        Raises:
+            AlreadyParticipatedException: If the IP already holds a ticket for this raffle.
+        """
+        from .claims import CompactClaim, get_claim_strategy
+        from .counters import participant_counter
+
+        hashed_code = make_digest(verification_code or uuid.uuid4())
+        strategy = CompactClaim() if self.is_compact else get_claim_strategy()
+        ticket = strategy.claim(self, participant_ip, hashed_code)
+        if ticket is not None:
+            participant_counter.add(self.pk)
+        return ticket
+
+    def get_ticket_candidates(self, count=CLAIM_CANDIDATES):
+        """
+        Pick a few unclaimed tickets from a random point of the raffle.
+
+        Starts at a random ticket number and wraps around, walking the
+        ticket_unclaimed_idx index. The candidates are shuffled so concurrent
+        claimers starting at the same point rarely collide.
+
+        Returns:
+            list: `(id, ticket_number)` pairs, empty if no tickets are left.
+        """
+        unclaimed = self.tickets.filter(participant_ip__isnull=True).order_by('ticket_number')
+        start = random.randint(1, self.total_tickets)
+        candidates = list(unclaimed.filter(ticket_number__gte=start).values_list('id', 'ticket_number')[:count])
+        if not candidates:
+            candidates = list(unclaimed.values_list('id', 'ticket_number')[:count])
+        random.shuffle(candidates)
+        return candidates
+
+    def claim_ticket(self, ticket_id, participant_ip, hashed_code):
+        """
+        Claim one ticket if it is still unclaimed.
+
+        Returns:
+            bool: True if this call claimed the ticket.
+
+        Raises:
+            AlreadyParticipatedException: If the IP already holds a ticket for this raffle.
+        """
+        claim = Ticket.objects.filter(id=ticket_id, participant_ip__isnull=True)
+        values = {'participant_ip': participant_ip, 'verification_code': hashed_code,
+                  'lease_owner': None, 'leased_until': None}
+        try:
+            if transaction.get_connection().in_atomic_block:
+                # A savepoint, so a unique violation leaves the caller's transaction usable
+                with transaction.atomic():
+                    return claim.update(**values) == 1
+            return claim.update(**values) == 1
+        except IntegrityError:
+            raise AlreadyParticipatedException()
 
 
 class Ticket(models.Model):
     """Represents a single ticket in a raffle."""
     raffle = models.ForeignKey('Raffle', on_delete=models.CASCADE, related_name='tickets')
     ticket_number = models.BigIntegerField(validators=[MinValueValidator(1)])
-    verification_code = models.CharField(max_length=128, unique=True, editable=False, null=True, blank=True)
-    participant_ip = models.GenericIPAddressField(null=True, blank=True, unique=False)
+    # A versioned binary digest, see raffle.digests
+    verification_code = VerificationDigestField(null=True, blank=True)
+    # Stored as 16 packed bytes, read and filtered as strings
+    participant_ip = PackedIPAddressField(null=True, blank=True, unique=False)
     is_winner = models.BooleanField(default=False, editable=False)
+    # Advisory lease of an unclaimed ticket by a worker's ticket pool, see raffle.claims.TicketPool
+    lease_owner = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    leased_until = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = [('raffle', 'ticket_number'), ('raffle', 'participant_ip')]
+        indexes = [
+            # Unclaimed tickets of a raffle in ticket number order, for claiming
+            models.Index(
+                fields=['raffle', 'ticket_number'],
+                condition=models.Q(participant_ip__isnull=True),
+                name='ticket_unclaimed_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Ticket number: {self.ticket_number} for {self.raffle.name}"
@@ -105,12 +296,12 @@ class Ticket(models.Model):
         super().save(*args, **kwargs)
 
     def set_verification_code(self, code):
-        """Hash and set the verification code."""
-        self.verification_code = make_password(str(code))
+        """Digest and set the verification code."""
+        self.verification_code = make_digest(code)
 
     def check_verification_code(self, code):
-        """Check if the provided code matches the hashed verification code."""
-        return check_password(str(code), self.verification_code)
+        """Check if the provided code matches the verification code digest."""
+        return check_digest(code, self.verification_code)
 
     
 
@@ -0,0 +1,158 @@
+"""
+Pagination classes for the raffle list.
+
+Page-number pagination stays the default. Clients can opt in to keyset
+pagination with `?pagination=cursor`, which walks the raffles ordered by
+`(-created_at, id)` using opaque cursors, never counts the table and never
+uses `OFFSET`, so every page costs the same no matter how deep it is.
+"""
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .exceptions import InvalidCursorException
+
+
+class RaffleKeysetPagination(BasePagination):
+    """
+    Keyset pagination over `(-created_at, id)`.
+
+    The cursor encodes the boundary row and the direction; the next page is
+    `created_at < c OR (created_at = c AND id > i)`, which is a range scan on
+    the matching `(-created_at, id)` index.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor[2])
+
+        if cursor:
+            created_at, raffle_id = cursor[0], cursor[1]
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__lt=raffle_id))
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__gt=raffle_id))
+                )
+
+        ordering = ('created_at', '-id') if reverse else ('-created_at', 'id')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        self.first = rows[0] if rows else None
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def encode_cursor(self, raffle, reverse):
+        """
+        Build the opaque cursor URL pointing past `raffle`.
+
+        Args:
+            raffle (Raffle | dict): The boundary raffle of the current page.
+            reverse (bool): True to page backwards from `raffle`.
+
+        Returns:
+            str: The URL of the adjacent page.
+        """
+        if isinstance(raffle, dict):  # a values() row
+            created_at, raffle_id = raffle['created_at'], raffle['id']
+        else:
+            created_at, raffle_id = raffle.created_at, raffle.id
+        token = f'{created_at.isoformat()}|{raffle_id.hex}|{int(reverse)}'
+        encoded = base64.urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Parse the cursor query parameter.
+
+        Returns:
+            tuple | None: `(created_at, id, reverse)`, or None on the first page.
+
+        Raises:
+            InvalidCursorException: If the cursor is malformed.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            created_at, raffle_id, reverse = token.split('|')
+            return datetime.fromisoformat(created_at), uuid.UUID(hex=raffle_id), reverse == '1'
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursorException
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class RafflePagination(PageNumberPagination):
+    """
+    Page-number pagination with opt-in keyset mode.
+
+    Keyset mode is used when the request has `?pagination=cursor` or carries a
+    cursor from a previous keyset page.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = RaffleKeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+
+    def use_keyset(self, request):
+        return (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.keyset_class.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_links(self):
+        """
+        The adjacent page URLs of the last paginated request, in either mode.
+
+        Returns:
+            tuple: `(previous, next)`, each None at the ends of the list.
+        """
+        paginator = self if self.keyset is None else self.keyset
+        return paginator.get_previous_link(), paginator.get_next_link()
@@ -1,19 +1,131 @@
+"""
+Manager access checks for the RESTful Raffle application.
+
+`MANAGER_IPS` is a comma separated list of IP addresses and CIDR ranges,
+e.g. `123.123.123.123,10.0.0.0/8,2001:db8::/32`. The list is compiled once
+into a sorted interval table per IP version and recompiled whenever the
+setting changes, so a lookup is a single binary search.
+"""
+import bisect
+import ipaddress
+import logging
+
 from django.conf import settings
+from django.core.signals import setting_changed
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CACHE_ATTR = '_is_manager_ip'
+
+
+class ManagerIpMatcher:
+    """
+    Matches IP addresses against a fixed set of IPv4/IPv6 networks.
+
+    Networks are merged into non-overlapping `(first, last)` integer intervals
+    kept sorted by `first`, one table per IP version.
+    """
+
+    def __init__(self, entries):
+        self.starts = {4: [], 6: []}
+        self.ends = {4: [], 6: []}
+        intervals = {4: [], 6: []}
+
+        for entry in entries:
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                logger.warning(f'Ignoring invalid MANAGER_IPS entry: {entry!r}')
+                continue
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        for version, ranges in intervals.items():
+            for first, last in sorted(ranges):
+                ends = self.ends[version]
+                if ends and first <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], last)
+                else:
+                    self.starts[version].append(first)
+                    ends.append(last)
+
+    @classmethod
+    def from_setting(cls, value):
+        """
+        Build a matcher from the raw `MANAGER_IPS` setting value.
+
+        Args:
+            value (str | list | None): Comma separated string or iterable of entries.
 
+        Returns:
+            ManagerIpMatcher: The compiled matcher.
+        """
+        if not value:
+            return cls([])
+        if isinstance(value, str):
+            value = value.split(',')
+        return cls(value)
 
+    def __contains__(self, ip):
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
 
+        value = int(address)
+        starts = self.starts[address.version]
+        index = bisect.bisect_right(starts, value) - 1
+        return index >= 0 and value <= self.ends[address.version][index]
+
+
+_matcher = None
+
+
+def get_manager_ip_matcher():
+    """
+    Return the compiled matcher for the current `MANAGER_IPS` setting.
+
+    Returns:
+        ManagerIpMatcher: The compiled matcher, built on first use.
+    """
+    global _matcher
+    if _matcher is None:
+        _matcher = ManagerIpMatcher.from_setting(getattr(settings, 'MANAGER_IPS', None))
+    return _matcher
+
+
+def reload_manager_ips(*args, **kwargs):
+    """Drop the compiled matcher when `MANAGER_IPS` changes."""
+    global _matcher
+    if kwargs.get('setting') in (None, 'MANAGER_IPS'):
+        _matcher = None
+
+
+setting_changed.connect(reload_manager_ips)
 
 
 def is_manager_ip(request):
     """
     Check if the request IP is a manager IP.
 
+    The result is memoised on the underlying `HttpRequest`, so repeated checks
+    within one request are free.
+
     Args:
         request (Request): The current request object.
 
     Returns:
         bool: True if the request IP is a manager IP, False otherwise.
     """
-    manager_ips = settings.MANAGER_IPS.split(',')
-    request_ip = request.META.get('REMOTE_ADDR')
-    return request_ip in manager_ips
+    http_request = getattr(request, '_request', request)
+    cached = getattr(http_request, REQUEST_CACHE_ATTR, None)
+    if cached is None:
+        cached = http_request.META.get('REMOTE_ADDR') in get_manager_ip_matcher()
+        setattr(http_request, REQUEST_CACHE_ATTR, cached)
+    return cached
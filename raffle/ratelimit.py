@@ -0,0 +1,302 @@
+"""
+Token-bucket rate limiting for the public raffle endpoints.
+
+Each endpoint has up to two buckets: one keyed on the client IP and one keyed
+on the raffle. Buckets are stored in the Django cache so every worker shares
+them; when the cache is unavailable the limiter falls back to per-process
+buckets. Limits are read from the `RAFFLE_RATE_LIMITS` setting (per endpoint)
+and `RAFFLE_RATE_LIMIT_OVERRIDES` (per raffle), e.g.::
+
+    RAFFLE_RATE_LIMITS = {
+        'verify_ticket': {'ip': {'rate': 2.0, 'burst': 30}, 'raffle': None},
+    }
+    RAFFLE_RATE_LIMIT_OVERRIDES = {
+        '<raffle uuid>': {'participate': {'raffle': {'rate': 2000.0, 'burst': 5000}}},
+    }
+
+`rate` is the refill rate in requests per second, `burst` the bucket size and
+`None` disables a bucket.
+
+Taking a token reads and writes the bucket state, so every take holds a lock
+on its own buckets in the shared cache (`cache.add`, which is atomic on the
+memcached, Redis and database backends) for the two round trips; workers
+never overwrite each other's takes and the limits hold across all of them.
+Nothing else is locked, so requests for other buckets never wait. A request
+that cannot get a lock within `LOCK_WAIT` seconds is let through uncounted
+rather than failed (`lock_timeouts`). With the default `LocMemCache`, which
+every worker has for itself, the buckets and so the limits are per process.
+"""
+import math
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .exceptions import RateLimitedException
+from .logging_utils import logger
+
+DEFAULT_RATE_LIMITS = {
+    'participate': {
+        'ip': {'rate': 1.0, 'burst': 10},
+        'raffle': {'rate': 500.0, 'burst': 1000},
+    },
+    'verify_ticket': {
+        'ip': {'rate': 2.0, 'burst': 30},
+        'raffle': {'rate': 100.0, 'burst': 200},
+    },
+}
+
+KEY_PREFIX = 'ratelimit'
+LOCK_TIMEOUT = 1  # seconds before the lock of a crashed worker expires
+LOCK_WAIT = 0.05  # seconds to wait for a bucket lock
+
+
+class BucketBusy(Exception):
+    """A bucket stayed locked by other workers for longer than `LOCK_WAIT`."""
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at `rate` tokens per second.
+
+    The bucket state is a `(tokens, timestamp)` tuple so that it can be stored
+    in any cache backend.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+
+    @property
+    def timeout(self):
+        """Seconds after which an untouched bucket is full again and can expire."""
+        return math.ceil(self.burst / self.rate) + 1
+
+    def take(self, state, now):
+        """
+        Try to take one token.
+
+        Args:
+            state (tuple | None): The stored `(tokens, timestamp)` state.
+            now (float): The current time in seconds.
+
+        Returns:
+            tuple: `(allowed, new_state, wait)` where `wait` is the number of
+                seconds until a token is available when not allowed.
+        """
+        tokens, stamp = state if state else (self.burst, now)
+        tokens = min(self.burst, tokens + max(0.0, now - stamp) * self.rate)
+        if tokens >= 1.0:
+            return True, (tokens - 1.0, now), 0.0
+        return False, (tokens, now), (1.0 - tokens) / self.rate
+
+
+class CacheBucketStore:
+    """Bucket storage shared between workers through the Django cache."""
+
+    @contextmanager
+    def locked(self, keys):
+        """
+        Hold the locks of the given buckets, taken in a fixed order.
+
+        Raises:
+            BucketBusy: If a lock is not free within `LOCK_WAIT` seconds.
+        """
+        owner, held = uuid.uuid4().hex, []
+        try:
+            for key in sorted(keys):
+                lock = f'{key}:lock'
+                deadline = time.monotonic() + LOCK_WAIT
+                while not cache.add(lock, owner, LOCK_TIMEOUT):
+                    if time.monotonic() > deadline:
+                        raise BucketBusy(key)
+                    time.sleep(0.001)
+                held.append(lock)
+            yield
+        finally:
+            for lock in held:
+                if cache.get(lock) == owner:
+                    cache.delete(lock)
+
+    def get_many(self, keys):
+        return cache.get_many(keys)
+
+    def set_many(self, states, timeout):
+        cache.set_many(states, timeout)
+
+    def clear(self):
+        pass
+
+
+class LocalBucketStore:
+    """In-process bucket storage used when the shared cache is unavailable."""
+
+    def __init__(self):
+        self.states = {}
+        self.lock = threading.RLock()
+
+    @contextmanager
+    def locked(self, keys):
+        # Only this process uses the buckets
+        with self.lock:
+            yield
+
+    def get_many(self, keys):
+        now = time.time()
+        with self.lock:
+            found = {}
+            for key in keys:
+                entry = self.states.get(key)
+                if entry and entry[1] > now:
+                    found[key] = entry[0]
+            return found
+
+    def set_many(self, states, timeout):
+        expires = time.time() + timeout
+        with self.lock:
+            for key, state in states.items():
+                self.states[key] = (state, expires)
+
+    def clear(self):
+        with self.lock:
+            self.states.clear()
+
+
+class RateLimiter:
+    """
+    Applies the configured buckets for an endpoint and keeps monitoring counters.
+    """
+
+    def __init__(self, store=None, fallback=None):
+        self.store = store or CacheBucketStore()
+        self.fallback = fallback or LocalBucketStore()
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def get_buckets(self, endpoint, raffle_id):
+        """
+        Resolve the buckets that apply to a request.
+
+        Args:
+            endpoint (str): The endpoint name, e.g. 'participate'.
+            raffle_id: The raffle primary key from the URL.
+
+        Returns:
+            dict: Mapping of scope ('ip' or 'raffle') to `TokenBucket`.
+        """
+        limits = dict(DEFAULT_RATE_LIMITS.get(endpoint, {}))
+        limits.update(getattr(settings, 'RAFFLE_RATE_LIMITS', {}).get(endpoint, {}))
+        overrides = getattr(settings, 'RAFFLE_RATE_LIMIT_OVERRIDES', {})
+        limits.update(overrides.get(str(raffle_id), {}).get(endpoint, {}))
+        return {
+            scope: TokenBucket(config['rate'], config['burst'])
+            for scope, config in limits.items() if config
+        }
+
+    def check(self, endpoint, ip, raffle_id):
+        """
+        Take a token from every bucket that applies to the request.
+
+        Tokens are only taken when all buckets allow the request, so a request
+        rejected by the raffle bucket does not drain the client's IP bucket.
+
+        Args:
+            endpoint (str): The endpoint name.
+            ip (str): The client IP address.
+            raffle_id: The raffle primary key from the URL.
+
+        Returns:
+            float | None: Seconds to wait before retrying, or None if allowed.
+        """
+        buckets = self.get_buckets(endpoint, raffle_id)
+        if not buckets:
+            return None
+        keys = {
+            scope: f'{KEY_PREFIX}:{endpoint}:{scope}:{ip if scope == "ip" else raffle_id}'
+            for scope in buckets
+        }
+
+        try:
+            with self.store.locked(keys.values()):
+                wait = self.take(self.store, endpoint, buckets, keys)
+        except BucketBusy as e:
+            logger.warning(f'Rate limit bucket {e} busy, allowing the request')
+            self.count('lock_timeouts', f'{endpoint}.allowed')
+            return None
+        except Exception as e:
+            logger.error(f'Rate limit cache unavailable, using local buckets: {e}')
+            self.count('cache_errors')
+            with self.fallback.locked(keys.values()):
+                wait = self.take(self.fallback, endpoint, buckets, keys)
+
+        if wait:
+            self.count(f'{endpoint}.rejected')
+            return wait
+        self.count(f'{endpoint}.allowed')
+        return None
+
+    def take(self, store, endpoint, buckets, keys):
+        """
+        Take a token from every bucket in `store` if all of them have one. Call with the buckets locked.
+
+        Returns:
+            float: Seconds to wait before retrying, 0.0 if the tokens were taken.
+        """
+        states = store.get_many(list(keys.values()))
+        now = time.time()
+        new_states = {}
+        wait = 0.0
+        for scope, bucket in buckets.items():
+            allowed, new_states[keys[scope]], bucket_wait = bucket.take(states.get(keys[scope]), now)
+            if not allowed:
+                wait = max(wait, bucket_wait)
+                self.count(f'{endpoint}.rejected.{scope}')
+        if not wait:
+            store.set_many(new_states, max(bucket.timeout for bucket in buckets.values()))
+        return wait
+
+    def count(self, *names):
+        with self.lock:
+            self.counters.update(names)
+
+    def get_counters(self):
+        """Return a snapshot of the allowed/rejected counters for monitoring."""
+        with self.lock:
+            return dict(self.counters)
+
+    def reset(self):
+        """Forget all local bucket state and counters."""
+        with self.lock:
+            self.counters.clear()
+            self.fallback.clear()
+            self.store.clear()
+
+
+rate_limiter = RateLimiter()
+
+
+def enforce_rate_limit(endpoint, request, raffle_id):
+    """
+    Reject the request if it exceeds the limits configured for the endpoint.
+
+    Intended to be called first thing in a view, before any database or
+    hashing work is done.
+
+    Args:
+        endpoint (str): The endpoint name, e.g. 'participate'.
+        request (Request): The current request object.
+        raffle_id: The raffle primary key from the URL.
+
+    Raises:
+        RateLimitedException: If any bucket is exhausted.
+    """
+    if not getattr(settings, 'RAFFLE_RATE_LIMITING_ENABLED', True):
+        return
+    wait = rate_limiter.check(endpoint, request.META.get('REMOTE_ADDR'), raffle_id)
+    if wait is not None:
+        logger.info(f'Rate limited {endpoint} for IP {request.META.get("REMOTE_ADDR")} on raffle {raffle_id}')
+        raise RateLimitedException(wait=wait)
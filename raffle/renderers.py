@@ -0,0 +1,155 @@
+"""
+JSON rendering with pre-encoded fragments.
+
+A `Fragment` holds JSON that is already encoded. `FragmentJSONRenderer`
+splices fragments verbatim into the response wherever they appear in the
+data, so payloads that only change with their object, such as the winners
+of a drawn raffle, are encoded once per object version (`set_fragment`,
+`get_fragment`) instead of on every request.
+
+The encoder backend is chosen with `RAFFLE_JSON_ENCODER`: 'json' (the
+standard library, producing the same bytes as DRF's `JSONRenderer`) or
+'orjson' (requires the orjson package). Responses asking for an indent are
+always encoded with the standard library.
+"""
+import json
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULT_FRAGMENT_TIMEOUT = 60 * 60  # seconds
+
+_encoder = JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+
+class Fragment:
+    """Pre-encoded JSON, spliced as is into rendered responses."""
+    __slots__ = ('encoded',)
+
+    def __init__(self, encoded):
+        self.encoded = encoded
+
+    @classmethod
+    def encode(cls, data):
+        """Encode data once with the configured backend."""
+        return cls(encode(data))
+
+    def __eq__(self, other):
+        return isinstance(other, Fragment) and self.encoded == other.encoded
+
+    def __repr__(self):
+        return f'Fragment({self.encoded!r})'
+
+
+def encode_json(data, default, indent=None):
+    if indent is None:
+        return json.dumps(data, cls=JSONEncoder, default=default, ensure_ascii=False, allow_nan=False,
+                          separators=(',', ':')).encode()
+    return json.dumps(data, cls=JSONEncoder, default=default, ensure_ascii=False, allow_nan=False,
+                      indent=indent, separators=(',', ': ')).encode()
+
+
+def encode_orjson(data, default, indent=None):
+    import orjson
+
+    # Dates go through DRF's encoder so they are formatted the same under both backends
+    return orjson.dumps(data, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+ENCODERS = {'json': encode_json, 'orjson': encode_orjson}
+
+
+def get_encoder():
+    """
+    Get the `RAFFLE_JSON_ENCODER` backend.
+
+    Raises:
+        ImproperlyConfigured: If the backend is unknown or its package is missing.
+    """
+    name = getattr(settings, 'RAFFLE_JSON_ENCODER', 'json')
+    if name not in ENCODERS:
+        raise ImproperlyConfigured(f"Unknown RAFFLE_JSON_ENCODER '{name}', choose from {', '.join(ENCODERS)}")
+    if name == 'orjson':
+        try:
+            import orjson  # noqa: F401
+        except ImportError:
+            raise ImproperlyConfigured("RAFFLE_JSON_ENCODER 'orjson' requires the orjson package")
+    return ENCODERS[name]
+
+
+def encode(data, indent=None):
+    """
+    Encode data to JSON bytes, splicing in the fragments it contains.
+
+    Fragments are first encoded as unique placeholder strings, which are then
+    replaced by their bytes in a single pass.
+
+    Args:
+        data: The data to encode; may contain `Fragment`s at any depth.
+        indent (int): Indent the output with the standard library encoder.
+
+    Returns:
+        bytes: The encoded JSON, with U+2028 and U+2029 escaped as DRF does.
+    """
+    backend = encode_json if indent is not None else get_encoder()
+    fragments = []
+    marker = uuid.uuid4().hex
+
+    def default(obj):
+        if isinstance(obj, Fragment):
+            fragments.append(obj.encoded)
+            return f'{marker}:{len(fragments) - 1}'
+        return _encoder.default(obj)
+
+    encoded = backend(data, default, indent)
+    encoded = encoded.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+    if fragments:
+        encoded = re.sub(rb'"%s:(\d+)"' % marker.encode(), lambda match: fragments[int(match[1])], encoded)
+    return encoded
+
+
+def get_fragment(key, version):
+    """
+    Get the cached fragment of an object version.
+
+    Args:
+        key (str): Identifies the payload, e.g. `winners:<raffle id>`.
+        version (int): The object version; a new version never sees older fragments.
+
+    Returns:
+        Fragment: The encoded payload, or None if it is not cached.
+    """
+    encoded = cache.get(f'fragment:{key}:{version}')
+    return None if encoded is None else Fragment(encoded)
+
+
+def set_fragment(key, version, data):
+    """
+    Encode and cache the payload of an object version.
+
+    Returns:
+        Fragment: The encoded payload.
+    """
+    fragment = Fragment.encode(data)
+    cache.set(f'fragment:{key}:{version}', fragment.encoded,
+              getattr(settings, 'RAFFLE_FRAGMENT_CACHE_TIMEOUT', DEFAULT_FRAGMENT_TIMEOUT))
+    return fragment
+
+
+class FragmentJSONRenderer(JSONRenderer):
+    """`JSONRenderer` that splices `Fragment`s and uses the `RAFFLE_JSON_ENCODER` backend."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type or '', renderer_context or {})
+        if isinstance(data, Fragment):
+            if indent is None:
+                return data.encoded
+            data = json.loads(data.encoded)
+        return encode(data, indent)
@@ -0,0 +1,181 @@
+"""
+Indexed name search for raffles.
+
+- SQLite: an FTS5 table `raffle_raffle_fts(name, raffle_id)` kept in sync with
+  `raffle_raffle.name` by triggers. Table rebuilds done by later schema
+  migrations drop those triggers, so they are re-installed (and the index
+  rebuilt) on `post_migrate`.
+- PostgreSQL: a GIN index over `to_tsvector('simple', name)` for prefix
+  queries, plus a `pg_trgm` GIN index that serves the `icontains` fallback.
+- Anything else, or an SQLite build without FTS5: `name__icontains`.
+
+Search terms are split into words and every word is matched as a prefix, so
+`"sum fai"` finds "Summer fair".
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'raffle_raffle_fts'
+RAFFLE_TABLE = 'raffle_raffle'
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {RAFFLE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(name, raffle_id) VALUES (new.name, new.id);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {RAFFLE_TABLE} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE raffle_id = old.id;
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name ON {RAFFLE_TABLE}
+        WHEN old.name IS NOT new.name BEGIN
+            UPDATE {FTS_TABLE} SET name = new.name WHERE raffle_id = old.id;
+        END
+    """,
+}
+
+POSTGRES_STATEMENTS = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS raffle_name_trgm_idx ON {RAFFLE_TABLE} USING gin (name gin_trgm_ops)',
+    f"CREATE INDEX IF NOT EXISTS raffle_name_tsv_idx ON {RAFFLE_TABLE} USING gin (to_tsvector('simple', name))",
+]
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+_available = {}
+
+
+def get_search_terms(term):
+    """Split a search term into the words matched as prefixes."""
+    return WORD_PATTERN.findall(term or '')
+
+
+def install_search_index(connection):
+    """
+    Create the search index for the connection's backend.
+
+    Idempotent: existing tables, triggers and indexes are left alone, except
+    that the SQLite index is rebuilt from the raffle table whenever triggers
+    had to be (re)created, since rows written without them are missing.
+
+    Args:
+        connection: The database connection.
+    """
+    _available.pop(connection.alias, None)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(name, raffle_id UNINDEXED)'
+                )
+            except DatabaseError as e:
+                logger.warning(f'SQLite FTS5 unavailable, raffle search falls back to icontains: {e}')
+                return
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [RAFFLE_TABLE]
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if existing.issuperset(SQLITE_TRIGGERS):
+                return
+            for name, sql in SQLITE_TRIGGERS.items():
+                cursor.execute(sql)
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'INSERT INTO {FTS_TABLE}(name, raffle_id) SELECT name, id FROM {RAFFLE_TABLE}')
+    elif connection.vendor == 'postgresql':
+        for sql in POSTGRES_STATEMENTS:
+            try:
+                with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                    cursor.execute(sql)
+            except DatabaseError as e:
+                logger.warning(f'Could not create raffle search index: {e}')
+
+
+def remove_search_index(connection):
+    """Drop everything created by `install_search_index`."""
+    _available.pop(connection.alias, None)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS raffle_name_tsv_idx')
+            cursor.execute('DROP INDEX IF EXISTS raffle_name_trgm_idx')
+
+
+def repair_search_index(sender, using='default', **kwargs):
+    """`post_migrate` receiver re-installing triggers dropped by table rebuilds."""
+    connection = connections[using]
+    if RAFFLE_TABLE in connection.introspection.table_names():
+        install_search_index(connection)
+
+
+def search_available(connection):
+    """
+    Check whether the indexed search can be used on the connection.
+
+    The answer is cached per connection alias.
+    """
+    if connection.alias not in _available:
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                    [FTS_TABLE, *SQLITE_TRIGGERS],
+                )
+                _available[connection.alias] = cursor.fetchone()[0] == 1 + len(SQLITE_TRIGGERS)
+        else:
+            _available[connection.alias] = connection.vendor == 'postgresql'
+    return _available[connection.alias]
+
+
+def filter_by_name(queryset, term, ranked=False):
+    """
+    Filter a raffle queryset by name using the search index when available.
+
+    Args:
+        queryset (QuerySet): A `Raffle` queryset.
+        term (str): The search term; every word is matched as a prefix.
+        ranked (bool): Order the results by relevance, best match first,
+            then by creation date.
+
+    Returns:
+        QuerySet: The filtered queryset.
+    """
+    words = get_search_terms(term)
+    connection = connections[queryset.db]
+    if not words or not search_available(connection):
+        return queryset.filter(name__icontains=term)
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+        if ranked:
+            return queryset.extra(
+                select={'search_rank': f'bm25({FTS_TABLE})'},
+                tables=[FTS_TABLE],
+                where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.raffle_id = {RAFFLE_TABLE}.id'],
+                params=[match],
+            ).order_by('search_rank', '-created_at')
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT raffle_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        )
+
+    query = ' & '.join(f'{word}:*' for word in words)
+    queryset = queryset.extra(
+        where=[f"to_tsvector('simple', {RAFFLE_TABLE}.name) @@ to_tsquery('simple', %s)"],
+        params=[query],
+    )
+    if ranked:
+        queryset = queryset.extra(
+            select={'search_rank': f"-ts_rank(to_tsvector('simple', {RAFFLE_TABLE}.name), to_tsquery('simple', %s))"},
+            select_params=[query],
+        ).order_by('search_rank', '-created_at')
+    return queryset
@@ -6,6 +6,70 @@ from .models import Raffle, Ticket, Winner
 from collections import OrderedDict
 from .exceptions import TooManyPrizesException, NoPrizesException
 
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_fieldset(query_params):
+    """
+    Read a sparse fieldset from `?fields=a,b` and `?exclude=c`.
+
+    Returns:
+        tuple: `(fields, exclude)` as sorted tuples of names; `fields` is None
+            when every field is wanted.
+    """
+    def names(param):
+        value = query_params.get(param)
+        return tuple(sorted({name.strip() for name in value.split(',') if name.strip()})) if value else None
+
+    return names(FIELDS_PARAM), names(EXCLUDE_PARAM) or ()
+
+
+def select_fields(names, fields=None, exclude=()):
+    """Filter field names by a sparse fieldset, keeping their order."""
+    return [name for name in names if (fields is None or name in fields) and name not in exclude]
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients choose the fields of a response with `?fields=` and `?exclude=`.
+
+    Fields left out are removed before serialisation, so their getters, e.g.
+    the `SerializerMethodField`s, never run. The fieldset comes from the
+    `fields`/`exclude` keyword arguments or else from the request's query
+    parameters, and only applies to the top-level serializer (or the child of
+    a top-level `many=True` list), never to nested ones. Serializers bound to
+    input data keep all their fields.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        self.fieldset = None if fields is None and exclude is None else (fields, tuple(exclude or ()))
+        super().__init__(*args, **kwargs)
+
+    def get_fieldset(self):
+        if self.fieldset is not None:
+            return self.fieldset
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            if parent.parent is not None:
+                return None
+        elif parent is not None:
+            return None
+        request = self.context.get('request')
+        if request is None or hasattr(self.root, 'initial_data'):
+            return None
+        return parse_fieldset(request.query_params)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            keep = set(select_fields(fields, *fieldset))
+            for name in list(fields):
+                if name not in keep:
+                    del fields[name]
+        return fields
+
 
 class PrizeSerializer(serializers.Serializer):
     """
@@ -18,7 +82,7 @@ class PrizeSerializer(serializers.Serializer):
     amount = serializers.IntegerField(min_value=1)
 
 
-class RaffleSerializer(serializers.ModelSerializer):
+class RaffleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Raffle model.
 
@@ -38,7 +102,7 @@ class RaffleSerializer(serializers.ModelSerializer):
         """
         Calculates and returns the number of tickets still available for the raffle.
         """
-        return obj.tickets.filter(participant_ip=None).count()
+        return obj.count_available_tickets()
 
     def get_winners_drawn(self, obj):
         """
@@ -77,7 +141,7 @@ class RaffleSerializer(serializers.ModelSerializer):
         return prizes_data
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Ticket model.
 
@@ -85,7 +149,7 @@ class TicketSerializer(serializers.ModelSerializer):
     Some fields are read-only as they are automatically generated.
     """
     verification_code = serializers.CharField(help_text="The verification code for the ticket e.g., 'ABC123')")
-    raffle_id = serializers.UUIDField(source='raffle.id', read_only=True)
+    raffle_id = serializers.UUIDField(read_only=True)
     ticket_number = serializers.IntegerField(help_text="Enter your ticket number (e.g., '3')")
 
     class Meta:
@@ -94,7 +158,7 @@ class TicketSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'raffle_id', 'ticket_number', 'verification_code', 'participant_ip']
 
 
-class WinnerSerializer(serializers.ModelSerializer):
+class WinnerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Winner model.
 
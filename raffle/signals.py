@@ -1,6 +1,7 @@
-from django.core.cache import cache
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from .caching import raffle_cache
+from .invalidation import KEY, invalidation_bus
 from .models import Raffle
 
 
@@ -14,4 +15,8 @@ def invalidate_raffle_cache(sender, instance, **kwargs):
     and the latest data is fetched from the database.
     """
    
-    cache.delete('raffle_list')
+    invalidation_bus.publish(KEY, 'raffle_list')
+    # While an update saves, the version is still the pending F('version') + 1;
+    # no version drops every copy of the raffle
+    version = instance.version if isinstance(instance.version, int) else None
+    raffle_cache.invalidate(instance.pk, None if kwargs['signal'] is post_delete else version)
@@ -1,15 +1,44 @@
-from django.urls import path
+from django.urls import path, register_converter
 from .views import (
     RaffleListCreateView, RaffleDetailView, ParticipateView, 
-     RaffleWinnersView, VerifyTicketView
+     RaffleWinnersView, VerifyTicketView, RateLimitStatsView, RaffleExportView,
+     RaffleImportView, RaffleEventsView,
 )
 
+
+class ChoiceConverter:
+    """A path segment that must be one of a fixed set of words."""
+    regex = None
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+class ExportDatasetConverter(ChoiceConverter):
+    regex = 'tickets|participants|winners'
+
+
+class ExportFormatConverter(ChoiceConverter):
+    regex = 'csv|ndjson'
+
+
+register_converter(ExportDatasetConverter, 'export_dataset')
+register_converter(ExportFormatConverter, 'export_format')
+
 urlpatterns = [
     path('', RaffleListCreateView.as_view(), name='raffle-list-create'),
     path('<uuid:pk>/', RaffleDetailView.as_view(), name='raffle-detail'),
     path('<uuid:pk>/participate/', ParticipateView.as_view(), name='raffle-participate'),
     path('<uuid:pk>/winners/', RaffleWinnersView.as_view(), name='winner-list'),
+    path('<uuid:pk>/events/', RaffleEventsView.as_view(), name='raffle-events'),
     path('<uuid:pk>/verify-ticket/', VerifyTicketView.as_view(), name='verify-ticket'),
+    path('<uuid:pk>/export/<export_dataset:dataset>.<export_format:export_format>', RaffleExportView.as_view(),
+         name='raffle-export'),
+    path('import/', RaffleImportView.as_view(), name='raffle-import'),
+    path('rate-limits/', RateLimitStatsView.as_view(), name='rate-limit-stats'),
 ]
 
 
@@ -1,5 +1,10 @@
 # Django imports
-from django.shortcuts import get_object_or_404, render
+from django.http import Http404, HttpResponseBase, StreamingHttpResponse
+from django.utils.http import urlencode
+from django.core.handlers.asgi import ASGIRequest
+from django.views import View
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
 from django.views.generic import ListView
 from django.db import transaction
 
@@ -12,24 +17,38 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from .exceptions import *
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
 
 # Project-specific imports
 from .models import Raffle, Ticket, Winner
 
 from .permissions import is_manager_ip
+from .ratelimit import enforce_rate_limit, rate_limiter
 from .logging_utils import custom_exception_handler
-from .serializers import RaffleSerializer, TicketSerializer, WinnerSerializer
+from .serializers import (EXCLUDE_PARAM, FIELDS_PARAM, RaffleSerializer, TicketSerializer, WinnerSerializer,
+                          parse_fieldset)
 from .logging_utils import logger
 from .filters import RaffleFilter, WinnerFilter
+from .pagination import RafflePagination
+from .exports import CONTENT_TYPES, astream_export, stream_export
+from .imports import FORMATS, detect_format, import_raffles, open_text
+from .live import format_event, publisher, read_state, stream_availability
 from .forms import RaffleForm
+from .fast_serializers import raffle_values_serializer, winner_values_serializer
+from .renderers import get_fragment, set_fragment
+from .caching import raffle_cache
+from .invalidation import invalidation_bus
 
 # Python standard library imports
+import hashlib
 import random
 import uuid
 
+LIST_CACHE_KEY = 'raffle_list'  # holds the generation of the cached list responses
+LIST_CACHE_TIMEOUT = 60 * 15
+
 
 class RaffleListCreateView(generics.ListCreateAPIView, ListView):
     """
@@ -37,6 +56,7 @@ class RaffleListCreateView(generics.ListCreateAPIView, ListView):
 
     - GET: Returns a paginated list of all raffles, ordered by creation date (latest first).
           Supports filtering by 'name', 'total_tickets', 'created_at', and 'winners_drawn' using query parameters.
+          Pass '?pagination=cursor' for keyset pagination without a total count.
     - POST: Creates a new raffle. Only accessible by manager IPs defined in settings.
     """
 
@@ -44,40 +64,65 @@ class RaffleListCreateView(generics.ListCreateAPIView, ListView):
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RaffleFilter
-    pagination_class = PageNumberPagination
+    pagination_class = RafflePagination
     template_name = 'raffle_list.html'
     context_object_name = 'raffles'
+    # Columns of the HTML raffle cards; the version keys each card's cached fragment
+    card_fields = ('id', 'name', 'created_at', 'version')
 
 
 
     def get_queryset(self):
         """
-        Get the queryset for the raffle list view.
+        Get the queryset for the raffle list view, latest first.
+
+        Filters are applied by `filter_queryset`.
         """
-        queryset = Raffle.objects.all()
-        name = self.request.query_params.get('name',None)
-        filter_mapping = {
-            'total_tickets': lambda value: queryset.filter(total_tickets=value).distinct(),
-            'created_at': lambda value: queryset.filter(created_at__date=value).distinct()  if value else queryset,
-            'winners_drawn': lambda value: queryset.filter(winner__isnull=not (value.lower() == 'true')).distinct(),
-        }
+        return Raffle.objects.order_by('-created_at')
 
-        if name:
-            queryset = queryset.filter(name__icontains=name)
+    def get_filterset(self):
+        """
+        The validated `RaffleFilter` of the request, built once per request.
+        """
+        if getattr(self, 'filterset', None) is None:
+            self.filterset = self.filterset_class.from_request(self.request)
+        return self.filterset
 
-        for param, value in self.request.query_params.items():
-            if param in filter_mapping:
-                queryset = filter_mapping[param](value)
+    def filter_queryset(self, queryset):
+        """
+        Apply the request's filters in one pass, without joins.
 
-        return queryset.order_by('-created_at')
+        Raises:
+            InvalidFilterException: If a filter value does not parse.
+        """
+        return self.get_filterset().filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List raffles from `values()` rows instead of model instances.
+
+        Renders the same JSON as `RaffleSerializer`, see `raffle.fast_serializers`.
+        """
+        fieldset = parse_fieldset(request.query_params)
+        queryset = raffle_values_serializer.get_rows(self.filter_queryset(self.get_queryset()), fieldset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(raffle_values_serializer.serialize(page, fieldset))
+        return Response(raffle_values_serializer.serialize(queryset, fieldset))
 
 
     def get_context_data(self, **kwargs):
         """
         Get the context data for the raffle list view.
+
+        The raffles are filtered and paginated like the API list, so a page
+        only reads and renders `page_size` rows of the `card_fields`.
         """
-        context = super().get_context_data(**kwargs)
-        context['raffles'] = self.get_queryset()
+        rows = self.object_list.values(*self.card_fields)
+        page = self.paginate_queryset(rows)
+        context = super().get_context_data(object_list=rows if page is None else page, **kwargs)
+        context['previous_url'], context['next_url'] = self.paginator.get_links()
+        context['card_cache_timeout'] = getattr(settings, 'RAFFLE_FRAGMENT_CACHE_TIMEOUT', 60 * 60)
         context['is_manager'] = is_manager_ip(self.request)
         if context['is_manager']:
             context['raffle_form'] = RaffleForm()
@@ -86,34 +131,85 @@ class RaffleListCreateView(generics.ListCreateAPIView, ListView):
     def get(self, request, *args, **kwargs):
         """
         Handle GET requests for the raffle list view.
+
+        Responses are cached for 15 minutes, one key per variant (see
+        `get_cache_key`), so invalidating the 'raffle_list' key clears them
+        all. Invalidations published by other workers are applied first.
         """
-        if not getattr(settings, 'DISABLE_TEST_CACHING', False):
-            key = 'raffle_list'
-            response = cache.get(key)
-            if response is None:
-                is_manager = is_manager_ip(request)
-                if request.accepted_renderer.format == 'html':
-                    self.object_list = self.get_queryset()
-                    context = self.get_context_data()
-                    context['is_manager'] = is_manager
-                    if is_manager:
-                        context['raffle_form'] = RaffleForm()
-                    response = self.render_to_response(context)
-                    cache.set(key, response, 60 * 15)  # Cache for 15 minutes
-                else:
-                    response = super().get(request, *args, **kwargs)
-                    cache.set(key, response, 60 * 15)  # Cache for 15 minutes
-            return response
-        else:
-            is_manager = is_manager_ip(request)
-            if request.accepted_renderer.format == 'html':
-                self.object_list = self.get_queryset()
-                context = self.get_context_data()
-                context['is_manager'] = is_manager
-                if is_manager:
-                    context['raffle_form'] = RaffleForm()
-                return self.render_to_response(context)
-            return super().get(request, *args, **kwargs)
+        if getattr(settings, 'DISABLE_TEST_CACHING', False):
+            return self.get_response(request, *args, **kwargs)
+
+        invalidation_bus.poll()
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached if isinstance(cached, HttpResponseBase) else Response(cached)
+
+        response = self.get_response(request, *args, **kwargs)
+        # Template responses are cached rendered, API responses as their data
+        cache.set(key, response.render() if request.accepted_renderer.format == 'html' else response.data,
+                  LIST_CACHE_TIMEOUT)
+        return response
+
+    def get_response(self, request, *args, **kwargs):
+        """
+        Build the list response, as HTML or through the API renderers.
+        """
+        if request.accepted_renderer.format == 'html':
+            self.object_list = self.filter_queryset(self.get_queryset())
+            return self.render_to_response(self.get_context_data())
+        return super().get(request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        """
+        The cache key of the request's list response.
+
+        Keys combine the current generation, stored under 'raffle_list', with
+        a digest of the variant. Deleting 'raffle_list' starts a new
+        generation, so the previous entries are never read again and expire.
+        Read the generation before the raffles, so a response built from rows
+        that change meanwhile is stored under the generation that is dropped.
+
+        Raises:
+            InvalidFilterException: If a filter value does not parse.
+        """
+        generation = cache.get(LIST_CACHE_KEY)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            if not cache.add(LIST_CACHE_KEY, generation, None):
+                generation = cache.get(LIST_CACHE_KEY) or generation
+        variant = hashlib.sha256(self.get_cache_variant(request).encode()).hexdigest()
+        return f'{LIST_CACHE_KEY}:{generation}:{variant}'
+
+    def get_cache_variant(self, request):
+        """
+        Identify the cached variant of a list response.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            str: The renderer format, whether the client is a manager (the
+                HTML page differs), and the pagination, filter and sparse
+                fieldset parameters, normalised so `?fields=name,id` and
+                `?fields=id,name` share an entry. Other parameters, such as
+                cache busters, do not change the response and are left out.
+
+        Raises:
+            InvalidFilterException: If a filter value does not parse.
+        """
+        fields, exclude = parse_fieldset(request.query_params)
+        paginator = self.pagination_class
+        pagination_params = (paginator.page_query_param, paginator.page_size_query_param,
+                             paginator.mode_query_param, paginator.keyset_class.cursor_query_param)
+        params = {key: request.query_params[key] for key in pagination_params
+                  if key and key in request.query_params}
+        params.update(self.get_filterset().filter_key)
+        if fields is not None:
+            params[FIELDS_PARAM] = ','.join(fields)
+        if exclude:
+            params[EXCLUDE_PARAM] = ','.join(exclude)
+        return f'{request.accepted_renderer.format}|{is_manager_ip(request)}|{urlencode(sorted(params.items()))}'
 
 
     def handle_unauthorized_request(self, request):
@@ -178,6 +274,19 @@ class RaffleDetailView(generics.RetrieveAPIView, ListView):
             return ListView.get(self, request, *args, **kwargs)
         return super().get(request, *args, **kwargs)
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return the raffle from a single `values()` row.
+
+        Renders the same JSON as `RaffleSerializer`, see `raffle.fast_serializers`.
+        """
+        fieldset = parse_fieldset(request.query_params)
+        rows = raffle_values_serializer.get_rows(self.get_queryset().filter(pk=self.kwargs['pk']), fieldset)
+        row = next(iter(rows), None)
+        if row is None:
+            raise Http404
+        return Response(raffle_values_serializer.serialize_row(row, fieldset))
+
     def get_serializer_context(self):
         """
         Add additional context to the serializer for dynamic fields.
@@ -227,6 +336,7 @@ class ParticipateView(generics.CreateAPIView):
         Handle POST requests by allowing a user to participate in the raffle.
         The user is identified by their IP address and can claim one ticket per raffle.
         """
+        enforce_rate_limit('participate', request, self.kwargs['pk'])
         raffle = self.get_raffle() # get_object_or_404(Raffle, pk=self.kwargs['pk'])
         participant_ip = self.get_participant_ip(request)#request.META.get('REMOTE_ADDR')
 
@@ -253,7 +363,7 @@ class ParticipateView(generics.CreateAPIView):
         Returns:
             Raffle: The raffle instance.
         """
-        return get_object_or_404(Raffle, pk=self.kwargs['pk'])
+        return raffle_cache.get_or_404(self.kwargs['pk'])
 
     def get_participant_ip(self, request):
         """
@@ -277,7 +387,7 @@ class ParticipateView(generics.CreateAPIView):
         Returns:
             bool: True if tickets are available, False otherwise.
         """
-        return raffle.tickets.filter(participant_ip=None).exists()
+        return raffle.has_available_tickets()
          
 
     def has_already_participated(self, raffle, participant_ip):
@@ -307,26 +417,16 @@ class ParticipateView(generics.CreateAPIView):
         Returns:
             Response: A success response with the ticket information, or an error response if no tickets are available.
         """
+        verification_code = str(uuid.uuid4())
+        context = {'request': request, 'raffle': raffle, 'template_name': 'participate.html'}
         try:
-            ticket = raffle.get_random_ticket(participant_ip)
-            #ticket = raffle.tickets.filter(participant_ip__isnull=True).select_for_update().first()
-            if ticket:
-                verification_code = str(uuid.uuid4())
-                ticket.set_verification_code(verification_code)
-                #ticket.participant_ip = participant_ip
-                ticket.save()
-                return self.handle_successful_participation(request, raffle, ticket, verification_code)             
-        except AlreadyParticipatedException() as e:
-            context = {'request': request, 'raffle': raffle, 'template_name': 'participate.html'}
+            ticket = raffle.get_random_ticket(participant_ip, verification_code)
+        except AlreadyParticipatedException as e:
             return custom_exception_handler(e, context)
-    
-        except NoAvailableTicketsException() as e:
-             context = {'request': request, 'raffle': raffle, 'template_name': 'participate.html'}
-             return custom_exception_handler(e, context)
-        except Exception as e:
-             context = {'request': request, 'raffle': raffle, 'template_name': 'participate.html'}
-             return custom_exception_handler(e, context)
-           
+
+        if ticket is None:
+            return custom_exception_handler(NoAvailableTicketsException(), context)
+        return self.handle_successful_participation(request, raffle, ticket, verification_code)
 
     def handle_successful_participation(self, request, raffle, ticket, verification_code):
         """
@@ -341,9 +441,11 @@ class ParticipateView(generics.CreateAPIView):
         Returns:
             Response: A success response rendered in HTML or JSON.
         """
+        publisher.notify(raffle.pk)
         serializer = self.get_serializer(ticket)
         data = serializer.data
-        data['verification_code'] = verification_code
+        if 'verification_code' in serializer.fields:  # unless left out with ?fields=/?exclude=
+            data['verification_code'] = verification_code
 
         if request.accepted_renderer.format == 'html':
             logger.info(f'IP {ticket.participant_ip} successfully participated in raffle {raffle.pk}')
@@ -385,8 +487,8 @@ class RaffleWinnersView(APIView):
         Returns:
             Response: A list of winners for the specified raffle.
         """
-        raffle = get_object_or_404(Raffle, pk=pk)
-        winners = Winner.objects.filter(raffle=raffle)
+        raffle = raffle_cache.get_or_404(pk)
+        winners = self.get_winners(raffle)
         is_manager = is_manager_ip(request)
 
         if request.accepted_renderer.format == 'html':
@@ -396,8 +498,29 @@ class RaffleWinnersView(APIView):
                 'is_manager': is_manager
             })
 
-        serializer = WinnerSerializer(winners, many=True)
-        return Response(serializer.data)
+        fieldset = parse_fieldset(request.query_params)
+        fields, exclude = fieldset
+        key = f"winners:{raffle.pk}:{','.join(fields or '*')}:{','.join(exclude)}"
+        fragment = get_fragment(key, raffle.version)
+        if fragment is not None:
+            return Response(fragment)
+        data = winner_values_serializer.serialize(winner_values_serializer.get_rows(winners, fieldset), fieldset)
+        if data:
+            # Drawn winners never change without a version bump; nothing is cached before the draw
+            return Response(set_fragment(key, raffle.version, data))
+        return Response(data)
+
+    def get_winners(self, raffle):
+        """
+        Get the winners of the given raffle with their tickets in one query.
+
+        Args:
+            raffle (Raffle): The raffle instance.
+
+        Returns:
+            QuerySet: The winners in draw order, with `ticket`, `ticket.raffle` and `raffle` loaded.
+        """
+        return Winner.objects.filter(raffle=raffle).select_related('raffle', 'ticket__raffle').order_by('id')
 
     def post(self, request, pk):
         """
@@ -414,7 +537,7 @@ class RaffleWinnersView(APIView):
         if not is_manager:
             return self.handle_unauthorized_request(request)
 
-        raffle = get_object_or_404(Raffle, pk=pk)
+        raffle = raffle_cache.get_or_404(pk)
 
         if self.has_available_tickets(raffle):
              context = {'request': request, 'raffle': raffle, 'template_name': 'draw_winners.html'}
@@ -456,7 +579,7 @@ class RaffleWinnersView(APIView):
         Returns:
             bool: True if there are available tickets, False otherwise.
         """
-        return raffle.tickets.filter(participant_ip__isnull=True).exists()
+        return raffle.has_available_tickets()
 
     
     def winners_already_drawn(self, raffle):
@@ -484,7 +607,7 @@ class RaffleWinnersView(APIView):
         """
         eligible_tickets = raffle.tickets.filter(participant_ip__isnull=False, is_winner=False)
         total_prizes =sum(prize.get('amount', 0) for prize in raffle.prizes)
-        return len(eligible_tickets) >= total_prizes
+        return eligible_tickets.count() >= total_prizes
 
     
     def draw_winners(self, raffle):
@@ -496,39 +619,31 @@ class RaffleWinnersView(APIView):
         The winners are randomly selected from the pool of eligible tickets (tickets that have been claimed
         and are not already winners).
 
+        The draw takes a fixed number of queries however many prizes there are: the eligible ticket ids,
+        the winning tickets, one bulk insert of the winners and one update of the tickets.
+
         Args:
             raffle (Raffle): The raffle instance.
 
         Returns:
-            list: A list of drawn winners.
-        """
-        eligible_tickets = list(raffle.tickets.filter(participant_ip__isnull=False, is_winner=False))
-        total_prizes = sum(prize['amount'] for prize in raffle.prizes)
-        winning_tickets = random.sample(eligible_tickets, total_prizes)
-        winners = []
-        prizes_awarded = {prize_data['name']: 0 for prize_data in raffle.prizes}  # Initialize count for each prize
-
-        for i in range(total_prizes):
-            if winning_tickets:
-                ticket = winning_tickets.pop()
-
-                # Find the next available prize to award
-                for prize_data in raffle.prizes:
-                    prize_name = prize_data['name']
-                    if prizes_awarded[prize_name] < prize_data['amount']:
-                        prize_to_award = prize_name
-                        prizes_awarded[prize_name] += 1
-                        break
-
-                winner = Winner.objects.create(
-                    raffle=raffle,
-                    ticket=ticket,
-                    prize=prize_to_award
-                )
-                ticket.is_winner = True
-                ticket.save()
-                winners.append(winner)
-
+            list: A list of drawn winners, with their tickets attached.
+        """
+        eligible_ids = list(raffle.tickets.filter(participant_ip__isnull=False, is_winner=False)
+                            .values_list('id', flat=True))
+        prizes = [prize['name'] for prize in raffle.prizes for _ in range(prize['amount'])]
+        winning_ids = random.sample(eligible_ids, len(prizes))
+        tickets = Ticket.objects.in_bulk(winning_ids)
+
+        with transaction.atomic():
+            winners = Winner.objects.bulk_create([
+                Winner(raffle=raffle, ticket=tickets[ticket_id], prize=prize)
+                for ticket_id, prize in zip(winning_ids, prizes)
+            ])
+            raffle.tickets.filter(winner__isnull=False, is_winner=False).update(is_winner=True)
+
+        for ticket in tickets.values():
+            ticket.raffle = raffle
+            ticket.is_winner = True
         return winners
 
     def handle_successful_draw(self, request, raffle, winners):
@@ -543,10 +658,9 @@ class RaffleWinnersView(APIView):
         Returns:
             Response: A list of drawn winners with their ticket numbers.
         """
-        serializer = WinnerSerializer(winners, many=True)
+        publisher.notify(raffle.pk)
+        serializer = WinnerSerializer(winners, many=True, context={'request': request})
         data = serializer.data
-        for item in data:
-            item['ticket_number'] = Winner.objects.get(id=item['id']).ticket.ticket_number
 
         if request.accepted_renderer.format == 'html':
             return render(request, self.template_names[1], {
@@ -575,6 +689,8 @@ class VerifyTicketView(APIView):
     permission_classes = [AllowAny]
     template_name = 'verify_ticket.html'
     context_object_name = 'ticket'
+    # Columns covered by the ticket_verification_idx index
+    ticket_fields = ['id', 'raffle', 'ticket_number', 'verification_code', 'is_winner']
 
     def post(self, request, pk):
         """
@@ -587,6 +703,7 @@ class VerifyTicketView(APIView):
         Returns:
             Response: The winning status of the ticket or an error message.
         """
+        enforce_rate_limit('verify_ticket', request, pk)
         ticket_number = request.data.get('ticket_number')
         verification_code = request.data.get('verification_code')
 
@@ -642,7 +759,7 @@ class VerifyTicketView(APIView):
         Returns:
             Raffle: The raffle instance.
         """
-        return get_object_or_404(Raffle, pk=pk)
+        return raffle_cache.get_or_404(pk)
 
     def winners_drawn(self, raffle):
         """
@@ -654,8 +771,8 @@ class VerifyTicketView(APIView):
         Returns:
             bool: True if winners have been drawn, False otherwise.
         """
-        #return Winner.objects.filter(raffle=raffle).exists()
-        return RaffleSerializer(raffle).data.get('winners_drawn')
+        # Not through RaffleSerializer, which would also count the available tickets
+        return Winner.objects.filter(raffle=raffle).exists()
         
 
    
@@ -671,7 +788,7 @@ class VerifyTicketView(APIView):
             Ticket: The ticket instance, or None if not found.
         """
         try:
-            return Ticket.objects.get(raffle=raffle, ticket_number=ticket_number)
+            return Ticket.objects.only(*self.ticket_fields).get(raffle=raffle, ticket_number=ticket_number)
         except Ticket.DoesNotExist:
             return None
 
@@ -700,6 +817,8 @@ class VerifyTicketView(APIView):
         Returns:
             Winner: The winner instance, or None if the ticket is not a winner.
         """
+        if not ticket.is_winner:
+            return None
         try:
             return Winner.objects.get(ticket=ticket)
         except Winner.DoesNotExist:
@@ -756,4 +875,136 @@ class VerifyTicketView(APIView):
         return self.render_response(request, raffle, success_message, has_won, prize)
 
 
-#3 c05928d6-8e3e-451f-8eab-2984e654708f
\ No newline at end of file
+#3 c05928d6-8e3e-451f-8eab-2984e654708f
+
+
+class RateLimitStatsView(APIView):
+    """
+    API view exposing the rate limiter counters of the current worker process.
+
+    - GET: Returns allowed/rejected counts per endpoint (Manager only).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        """
+        Handle GET requests to read the rate limiter counters.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            Response: The counters, or an error message for non-managers.
+        """
+        if not is_manager_ip(request):
+            context = {'request': request, 'raffle': None}
+            return custom_exception_handler(PermissionDeniedException(), context)
+        return Response(rate_limiter.get_counters())
+
+
+class RaffleExportView(APIView):
+    """
+    API view streaming a raffle's tickets, participants or winners.
+
+    - GET: Streams the dataset as CSV or NDJSON (Manager only).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk, dataset, export_format):
+        """
+        Handle GET requests to export a raffle dataset.
+
+        Args:
+            request (Request): The current request.
+            pk (str): The primary key of the raffle.
+            dataset (str): 'tickets', 'participants' or 'winners'.
+            export_format (str): 'csv' or 'ndjson'.
+
+        Returns:
+            StreamingHttpResponse: The export, or an error message for non-managers.
+        """
+        if not is_manager_ip(request):
+            context = {'request': request, 'raffle': None}
+            return custom_exception_handler(ExportNotManagerException(), context)
+
+        raffle = raffle_cache.get_or_404(pk)
+        logger.info(f'Raffle {raffle.pk} {dataset} exported as {export_format} by IP: {request.META.get("REMOTE_ADDR")}')
+        # ASGI would buffer a sync iterator whole, see `astream_export`
+        streamer = astream_export if isinstance(request._request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(streamer(raffle, dataset, export_format),
+                                         content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="raffle-{raffle.pk}-{dataset}.{export_format}"'
+        return response
+
+
+class RaffleImportView(APIView):
+    """
+    API view to bulk import raffles from an uploaded CSV or NDJSON file.
+
+    - POST: Imports the raffle definitions in the 'file' upload (Manager only).
+    """
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        """
+        Handle POST requests to import raffles.
+
+        The format comes from the 'import_format' field or the file extension.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            Response: The import report, or an error message.
+        """
+        if not is_manager_ip(request):
+            context = {'request': request, 'raffle': None}
+            return custom_exception_handler(ImportNotManagerException(), context)
+
+        upload = request.FILES.get('file')
+        import_format = request.data.get('import_format') or (upload and detect_format(upload.name))
+        if upload is None or import_format not in FORMATS:
+            context = {'request': request, 'raffle': None}
+            return custom_exception_handler(InvalidImportFileException(), context)
+
+        with open_text(upload) as lines:
+            report = import_raffles(lines, import_format)
+        logger.info(f'{report.raffles} raffles imported by IP: {request.META.get("REMOTE_ADDR")}')
+        response_status = status.HTTP_201_CREATED if report.raffles else status.HTTP_400_BAD_REQUEST
+        return Response(report.as_dict(), status=response_status)
+
+
+class RaffleEventsView(View):
+    """
+    Server-Sent Events stream of a raffle's live availability.
+
+    - GET: Streams `availability` events carrying `available_tickets` and
+      `winners_drawn` whenever they change, at most once per
+      `RAFFLE_LIVE_INTERVAL`. Under WSGI, where a connection cannot be held
+      open without tying up a worker, it sends the current state once and
+      the client's EventSource reconnects after the `retry` delay.
+    """
+
+    async def get(self, request, pk):
+        """
+        Handle GET requests to subscribe to a raffle.
+
+        Args:
+            request (HttpRequest): The current request.
+            pk (UUID): The primary key of the raffle.
+
+        Returns:
+            StreamingHttpResponse: The `text/event-stream` response.
+        """
+        if not await Raffle.objects.filter(pk=pk).aexists():
+            raise Http404
+        if isinstance(request, ASGIRequest):
+            stream = stream_availability(pk)
+        else:
+            state = await sync_to_async(read_state)(pk)
+            stream = iter([f'retry: {int(publisher.refresh * 1000)}\n\n', format_event(state)])
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -3,7 +3,6 @@ from django.urls import reverse
 from rest_framework import status
 from raffle.models import Raffle, Ticket, Winner
 from .conftest import unexpected_response_error
-from django.contrib.auth.hashers import check_password
 
 
 def test_ticket_numbers_sequential(client, default_raffle, manager_ip):
@@ -49,7 +48,7 @@ def test_verification_code_storage(client, raffle, get_ticket):
     ticket = get_ticket(raffle['id'])
     ticket_obj = Ticket.objects.get(ticket_number=ticket['ticket_number'])
     assert ticket['verification_code'] != ticket_obj.verification_code
-    assert check_password(ticket['verification_code'],ticket_obj.verification_code)
+    assert ticket_obj.check_verification_code(ticket['verification_code'])
 
 def test_unique_ticket_numbers(client, raffle):
     """
@@ -95,7 +94,7 @@ def test_one_prize_per_ticket(client, raffle, get_ticket, manager_ip):
     assert len(winners) == len(set(winners.values_list('ticket__ticket_number', flat=True)))
 
     for winner in winners:
-        assert check_password(tickets[winner.ticket.ticket_number]['verification_code'], winner.ticket.verification_code)
+        assert winner.ticket.check_verification_code(tickets[winner.ticket.ticket_number]['verification_code'])
 
 #$env:MANAGER_IPS = "123.123.123.123,127.0.0.2"
 #git checkout -b finalversion commithash
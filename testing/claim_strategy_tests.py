@@ -0,0 +1,153 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from raffle.claims import ConditionalUpdateClaim, SkipLockedClaim, TicketPool, get_claim_strategy, ticket_pool
+from raffle.exceptions import AlreadyParticipatedException
+from raffle.models import Raffle, Ticket
+
+
+def test_auto_strategy_follows_backend_support(settings, monkeypatch):
+    settings.RAFFLE_CLAIM_STRATEGY = 'auto'
+    monkeypatch.setattr(connection.features, 'has_select_for_update_skip_locked', False)
+    assert isinstance(get_claim_strategy(), ConditionalUpdateClaim)
+
+    monkeypatch.setattr(connection.features, 'has_select_for_update_skip_locked', True)
+    assert isinstance(get_claim_strategy(), SkipLockedClaim)
+
+
+def test_strategy_can_be_forced(settings):
+    settings.RAFFLE_CLAIM_STRATEGY = 'skip_locked'
+    assert isinstance(get_claim_strategy(), SkipLockedClaim)
+
+
+@pytest.fixture
+def pooled(settings):
+    settings.RAFFLE_TICKET_POOL_ENABLED = True
+    settings.RAFFLE_TICKET_POOL_SIZE = 5
+    yield
+    ticket_pool.reset()
+
+
+@pytest.mark.parametrize('strategy', ['skip_locked', 'conditional_update'])
+def test_strategies_hand_out_every_ticket_once(settings, raffle, strategy):
+    settings.RAFFLE_CLAIM_STRATEGY = strategy
+    raffle = Raffle.objects.get(id=raffle['id'])
+
+    numbers = [raffle.get_random_ticket(f'10.0.0.{n}').ticket_number for n in range(raffle.total_tickets - 1)]
+    with pytest.raises(AlreadyParticipatedException):
+        raffle.get_random_ticket('10.0.0.1')
+    numbers.append(raffle.get_random_ticket('10.0.0.99').ticket_number)
+
+    assert sorted(numbers) == list(range(1, raffle.total_tickets + 1))
+    assert raffle.get_random_ticket('10.0.1.1') is None
+
+
+def test_pool_leases_a_block_and_claims_with_one_write(pooled, raffle):
+    raffle = Raffle.objects.get(id=raffle['id'])
+    assert get_claim_strategy() is ticket_pool
+
+    first = raffle.get_random_ticket('10.0.0.1')
+    with CaptureQueriesContext(connection) as queries:
+        second = raffle.get_random_ticket('10.0.0.2')
+
+    statements = [query['sql'] for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']]
+    assert len(statements) == 1 and statements[0].startswith('UPDATE'), statements
+    leased = Ticket.objects.filter(lease_owner=ticket_pool.owner)
+    assert leased.count() == 3
+    assert not leased.filter(id__in=[first.id, second.id]).exists()
+
+    ticket_pool.release_all()
+    assert not Ticket.objects.filter(lease_owner__isnull=False).exists()
+
+
+def test_pools_of_different_workers_do_not_overlap(pooled, raffle):
+    raffle = Raffle.objects.get(id=raffle['id'])
+    other_worker = TicketPool()
+
+    mine = raffle.get_random_ticket('10.0.0.1')
+    theirs = other_worker.claim(raffle, '10.0.0.2', 'code')
+
+    assert mine.id != theirs.id
+    assert Ticket.objects.filter(lease_owner=ticket_pool.owner).count() == 4
+    assert Ticket.objects.filter(lease_owner=other_worker.owner).count() == 4
+
+
+def test_pool_falls_back_when_everything_is_leased(pooled, raffle):
+    """Tickets leased by other workers are still sold; their owner just skips them"""
+    raffle = Raffle.objects.get(id=raffle['id'])
+    other_worker = TicketPool()
+    Ticket.objects.filter(raffle=raffle).update(lease_owner=other_worker.owner,
+                                                leased_until=timezone.now() + timedelta(minutes=1))
+
+    numbers = [raffle.get_random_ticket(f'10.0.0.{n}').ticket_number for n in range(raffle.total_tickets)]
+
+    assert sorted(numbers) == list(range(1, raffle.total_tickets + 1))
+    assert other_worker.claim(raffle, '10.0.1.1', 'code') is None
+
+
+def test_expired_pool_is_released_and_leased_again(pooled, settings, raffle):
+    settings.RAFFLE_TICKET_POOL_LEASE = 0
+    raffle = Raffle.objects.get(id=raffle['id'])
+
+    raffle.get_random_ticket('10.0.0.1')
+    raffle.get_random_ticket('10.0.0.2')
+
+    assert raffle.tickets.filter(participant_ip__isnull=False).count() == 2
+    assert Ticket.objects.filter(lease_owner=ticket_pool.owner).count() == 4
+
+
+def test_pooled_claim_from_same_ip_is_rejected(pooled, raffle):
+    raffle = Raffle.objects.get(id=raffle['id'])
+    raffle.get_random_ticket('10.0.0.1')
+
+    with pytest.raises(AlreadyParticipatedException):
+        raffle.get_random_ticket('10.0.0.1')
+    assert raffle.tickets.filter(participant_ip='10.0.0.1').count() == 1
+    assert Ticket.objects.filter(lease_owner=ticket_pool.owner).count() == 4
+
+
+def claim_concurrently(raffle, workers, claims_per_worker, first_ip):
+    errors, numbers = [], []
+
+    def work(worker):
+        try:
+            for n in range(claims_per_worker):
+                ip = f'10.{first_ip + worker}.{n >> 8}.{n & 255}'
+                numbers.append(raffle.get_random_ticket(ip).ticket_number)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors, numbers, workers * claims_per_worker / (time.perf_counter() - start)
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason='Needs PostgreSQL: set RAFFLE_POSTGRES_DB and the PG* variables')
+@pytest.mark.django_db(transaction=True)
+def test_skip_locked_claims_scale_with_workers(settings):
+    settings.RAFFLE_CLAIM_STRATEGY = 'auto'
+    assert isinstance(get_claim_strategy(), SkipLockedClaim)
+    raffle = Raffle.objects.create(name='Flash sale', total_tickets=4000, prizes=[{'name': 'hug', 'amount': 1}])
+
+    throughput = {}
+    claimed = []
+    for workers in (1, 4, 16):
+        errors, numbers, throughput[workers] = claim_concurrently(raffle, workers, 800 // workers, len(claimed))
+        assert errors == []
+        claimed += numbers
+
+    assert len(claimed) == len(set(claimed)) == 2400
+    assert throughput[16] > throughput[4] > throughput[1], throughput
@@ -0,0 +1,70 @@
+import pytest
+
+from raffle.exceptions import AlreadyParticipatedException
+from raffle.models import Raffle, Ticket
+from .conftest import unexpected_response_error
+
+
+@pytest.fixture
+def compact(settings):
+    settings.RAFFLE_COMPACT_TICKETS_THRESHOLD = 1
+
+
+def test_large_raffles_store_no_unclaimed_tickets():
+    raffle = Raffle.objects.create(name='Mega', total_tickets=1_000_000, prizes=[{'name': 'car', 'amount': 1}])
+
+    assert raffle.is_compact
+    assert not Ticket.objects.filter(raffle=raffle).exists()
+    assert raffle.count_available_tickets() == 1_000_000
+
+
+def test_compact_raffle_lifecycle(compact, client, raffle, manager_ip, get_ticket):
+    assert Raffle.objects.get(id=raffle['id']).is_compact
+    assert client.get(f"/raffles/{raffle['id']}/").json()['available_tickets'] == raffle['total_tickets']
+
+    tickets = {ticket['ticket_number']: ticket for ticket in
+               [get_ticket(raffle['id']) for _ in range(raffle['total_tickets'])]}
+
+    assert sorted(tickets) == list(range(1, raffle['total_tickets'] + 1))
+    assert Ticket.objects.filter(raffle_id=raffle['id']).count() == raffle['total_tickets']
+    assert client.get(f"/raffles/{raffle['id']}/").json()['available_tickets'] == 0
+    resp = client.post(f"/raffles/{raffle['id']}/participate/", REMOTE_ADDR='10.9.9.9')
+    assert resp.status_code == 410, unexpected_response_error(resp)
+
+    wins = client.post(f"/raffles/{raffle['id']}/winners/", REMOTE_ADDR=manager_ip).json()
+    assert len(wins) == 9
+    resp = client.post(f"/raffles/{raffle['id']}/verify-ticket/", {
+        'ticket_number': wins[0]['ticket_number'],
+        'verification_code': tickets[wins[0]['ticket_number']]['verification_code'],
+    })
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    assert resp.json()['has_won'] is True
+
+
+def test_compact_claim_from_same_ip_is_rolled_back(compact, raffle):
+    raffle = Raffle.objects.get(id=raffle['id'])
+    raffle.get_random_ticket('10.0.0.1')
+
+    with pytest.raises(AlreadyParticipatedException):
+        raffle.get_random_ticket('10.0.0.1')
+    assert raffle.count_available_tickets() == raffle.total_tickets - 1
+
+
+def test_saving_a_stale_raffle_keeps_the_issued_count(compact, raffle):
+    stale = Raffle.objects.get(id=raffle['id'])
+    Raffle.objects.get(id=raffle['id']).get_random_ticket('10.0.0.1')
+
+    stale.name = 'Renamed'
+    stale.save()
+
+    assert Raffle.objects.get(id=raffle['id']).issued_count == 1
+
+
+@pytest.mark.parametrize('total_tickets', [1, 2, 12, 97, 1000])
+def test_ticket_number_permutation_is_a_bijection(total_tickets):
+    raffle = Raffle(total_tickets=total_tickets)
+    raffle.choose_permutation()
+
+    numbers = {raffle.get_ticket_number(position) for position in range(total_tickets)}
+
+    assert numbers == set(range(1, total_tickets + 1))
@@ -2,8 +2,14 @@ import ipaddress
 import os
 
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
+from raffle.caching import raffle_cache
+from raffle.counters import participant_counter
+from raffle.invalidation import invalidation_bus
+from raffle.ratelimit import rate_limiter
+
 
 
 MANAGER_IP = os.environ.get('MANAGER_IPS', '123.123.123.123,127.0.0.2').split(',')[0]
@@ -100,4 +106,23 @@ DISABLE_TEST_CACHING = True
 
 @pytest.fixture(autouse=True)
 def disable_test_caching(settings):
-    settings.DISABLE_TEST_CACHING = True
\ No newline at end of file
+    settings.DISABLE_TEST_CACHING = True
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    rate_limiter.reset()
+    cache.clear()
+    raffle_cache.clear()
+
+@pytest.fixture(autouse=True)
+def invalidation_log(settings, tmp_path):
+    settings.RAFFLE_INVALIDATION_PATH = str(tmp_path / 'invalidation.sqlite3')
+    settings.RAFFLE_INVALIDATION_POLL_INTERVAL = 0
+    invalidation_bus.reset()
+    return settings.RAFFLE_INVALIDATION_PATH
+
+@pytest.fixture(autouse=True)
+def reset_participant_counter(settings):
+    # A flush timer thread cannot see the test transaction; tests flush explicitly
+    settings.RAFFLE_PARTICIPANT_COUNT_FLUSH_INTERVAL = None
+    participant_counter.reset()
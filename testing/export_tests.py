@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from .conftest import unexpected_response_error
+
+
+def export(client, raffle, path, manager_ip):
+    resp = client.get(f"/raffles/{raffle['id']}/export/{path}", REMOTE_ADDR=manager_ip)
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    assert resp.streaming
+    return b''.join(resp.streaming_content).decode()
+
+
+def test_export_tickets_csv(client, raffle, manager_ip, get_ticket):
+    claimed = get_ticket(raffle['id'])
+
+    rows = list(csv.DictReader(io.StringIO(export(client, raffle, 'tickets.csv', manager_ip))))
+
+    assert [int(row['ticket_number']) for row in rows] == list(range(1, raffle['total_tickets'] + 1))
+    assert [row['ticket_number'] for row in rows if row['participant_ip']] == [str(claimed['ticket_number'])]
+    assert set(rows[0]) == {'ticket_number', 'participant_ip', 'is_winner'}
+
+
+def test_export_participants_and_winners_ndjson(client, raffle, manager_ip, get_ticket):
+    tickets = [get_ticket(raffle['id']) for _ in range(raffle['total_tickets'])]
+    wins = client.post(f"/raffles/{raffle['id']}/winners/", REMOTE_ADDR=manager_ip).json()
+
+    participants = [json.loads(line) for line in export(client, raffle, 'participants.ndjson', manager_ip).splitlines()]
+    winners = [json.loads(line) for line in export(client, raffle, 'winners.ndjson', manager_ip).splitlines()]
+
+    assert {row['participant_ip'] for row in participants} == {ticket['participant_ip'] for ticket in tickets}
+    assert sorted((row['ticket_number'], row['prize']) for row in winners) == \
+        sorted((win['ticket_number'], win['prize']) for win in wins)
+
+
+def test_export_streams_under_asgi(raffle, get_ticket, settings):
+    claimed = get_ticket(raffle['id'])
+    settings.MANAGER_IPS = '127.0.0.1'  # the AsyncClient's address
+
+    async def export_async():
+        resp = await AsyncClient().get(f"/raffles/{raffle['id']}/export/participants.ndjson")
+        return resp, [chunk async for chunk in resp.streaming_content]
+
+    resp, chunks = async_to_sync(export_async)()
+
+    assert resp.status_code == 200
+    assert resp.is_async
+    assert [json.loads(line) for line in b''.join(chunks).decode().splitlines()] == [
+        {'ticket_number': claimed['ticket_number'], 'participant_ip': claimed['participant_ip']}]
+
+
+def test_export_is_manager_only(client, raffle):
+    resp = client.get(f"/raffles/{raffle['id']}/export/winners.csv")
+    assert resp.status_code == 403, unexpected_response_error(resp)
+    assert b'Only managers can export raffle data' in resp.content
+
+
+@pytest.mark.parametrize('pk', ['-' * 36, 'g' * 36, '123'])
+def test_export_rejects_malformed_ids(client, manager_ip, pk):
+    resp = client.get(f"/raffles/{pk}/export/winners.csv", REMOTE_ADDR=manager_ip)
+    assert resp.status_code == 404, unexpected_response_error(resp)
@@ -0,0 +1,74 @@
+"""
+The values-based serializers must render byte-identical JSON to the DRF ones.
+"""
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from raffle.fast_serializers import raffle_values_serializer, winner_values_serializer
+from raffle.models import Raffle, Ticket, Winner
+from raffle.serializers import RaffleSerializer, WinnerSerializer
+from .conftest import unexpected_response_error
+
+render = JSONRenderer().render
+
+
+@pytest.fixture
+def raffles(settings, client, manager_ip):
+    settings.RAFFLE_COMPACT_TICKETS_THRESHOLD = 1000
+
+    drawn = Raffle.objects.create(name='Drawn ✓ "quoted"', total_tickets=12,
+                                  prizes=[{'name': 'hug', 'amount': 2}, {'name': 'Ünïcode', 'amount': 3}])
+    for n in range(12):
+        drawn.get_random_ticket(f'10.0.0.{n}' if n % 2 else f'2001:db8::{n:x}')
+    Ticket.objects.filter(raffle=drawn, ticket_number=1).update(verification_code=None)
+    resp = client.post(f'/raffles/{drawn.id}/winners/', REMOTE_ADDR=manager_ip)
+    assert resp.status_code == 201, unexpected_response_error(resp)
+
+    compact = Raffle.objects.create(name='Compact', total_tickets=5000, prizes=[{'name': 'car', 'amount': 1}])
+    compact.get_random_ticket('10.1.0.1')
+
+    pending = Raffle.objects.create(name='Pending', total_tickets=7, prizes=[{'name': 'pen', 'amount': 7}])
+    pending.get_random_ticket('10.2.0.1')
+    return drawn, compact, pending
+
+
+def test_raffles_render_identically(raffles):
+    queryset = Raffle.objects.order_by('created_at', 'id')
+
+    fast = raffle_values_serializer.serialize(raffle_values_serializer.get_rows(queryset))
+
+    assert render(fast) == render(RaffleSerializer(queryset, many=True).data)
+
+
+def test_winners_render_identically(raffles):
+    queryset = Winner.objects.order_by('id')
+
+    fast = winner_values_serializer.serialize(winner_values_serializer.get_rows(queryset))
+
+    assert len(fast) == 5
+    assert render(fast) == render(WinnerSerializer(queryset, many=True).data)
+
+
+def test_endpoints_render_identically(client, raffles):
+    drawn = raffles[0]
+
+    detail = client.get(f'/raffles/{drawn.id}/')
+    winners = client.get(f'/raffles/{drawn.id}/winners/')
+    listing = client.get('/raffles/')
+
+    assert detail.content == render(RaffleSerializer(drawn).data)
+    assert winners.content == render(WinnerSerializer(Winner.objects.filter(raffle=drawn).order_by('id'),
+                                                      many=True).data)
+    assert listing.json()['results'] == RaffleSerializer(Raffle.objects.order_by('-created_at'), many=True).data
+
+
+def test_keyset_pages_link_from_values_rows(client, raffles):
+    for n in range(10):
+        Raffle.objects.create(name=f'Filler {n}', total_tickets=1, prizes=[{'name': 'pen', 'amount': 1}])
+    first = client.get('/raffles/?pagination=cursor').json()
+    assert first['next'] is not None
+
+    second = client.get(first['next']).json()
+
+    assert [raffle['id'] for raffle in first['results'] + second['results']] == [
+        str(raffle.id) for raffle in Raffle.objects.order_by('-created_at', 'id')]
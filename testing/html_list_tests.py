@@ -0,0 +1,72 @@
+"""
+The HTML raffle list is paginated like the API and caches each raffle card per raffle version.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer, TemplateHTMLRenderer
+
+from raffle.models import Raffle
+from raffle.views import RaffleListCreateView
+
+
+@pytest.fixture
+def html_client(client, monkeypatch):
+    monkeypatch.setattr(RaffleListCreateView, 'renderer_classes', [TemplateHTMLRenderer, JSONRenderer])
+    return client
+
+
+def create_raffles(count):
+    return [Raffle.objects.create(name=f'Raffle {n:02}', total_tickets=2, prizes=[{'name': 'hug', 'amount': 1}])
+            for n in range(count)]
+
+
+def get_page(client, url='/raffles/'):
+    resp = client.get(url, HTTP_ACCEPT='text/html')
+    assert resp.status_code == 200
+    return resp.content.decode()
+
+
+def test_pages_match_the_api(html_client):
+    create_raffles(25)
+
+    first = get_page(html_client)
+    last = get_page(html_client, '/raffles/?page=3')
+
+    assert first.count('class="card-title"') == 10
+    assert 'Raffle 24' in first and 'Raffle 14' not in first
+    assert '?page=2' in first
+    assert last.count('class="card-title"') == 5
+
+
+def test_queries_do_not_grow_with_raffles(html_client):
+    counts = []
+    for total in (5, 30):
+        create_raffles(total - Raffle.objects.count())
+        with CaptureQueriesContext(connection) as queries:
+            get_page(html_client)
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1]
+
+
+def test_keyset_pages_link_by_cursor(html_client):
+    create_raffles(12)
+
+    page = get_page(html_client, '/raffles/?pagination=cursor')
+
+    assert page.count('class="card-title"') == 10
+    assert 'cursor=' in page
+
+
+def test_cards_are_cached_per_version(html_client):
+    raffle = create_raffles(1)[0]
+    get_page(html_client)
+
+    Raffle.objects.filter(pk=raffle.pk).update(name='Not bumped')
+    assert 'Raffle 00' in get_page(html_client)
+
+    raffle.name = 'Renamed'
+    raffle.save()
+    page = get_page(html_client)
+    assert 'Renamed' in page and 'Raffle 00' not in page
@@ -0,0 +1,109 @@
+"""
+Invalidations published by one process reach the local caches of every other process.
+"""
+import multiprocessing
+import sqlite3
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from raffle.caching import raffle_cache
+from raffle.invalidation import KEY, RAFFLE, invalidation_bus
+from raffle.models import Raffle
+from . import invalidation_workers
+
+spawn = multiprocessing.get_context('spawn')
+
+
+def run(target, *args):
+    process = spawn.Process(target=target, args=args)
+    process.start()
+    process.join(invalidation_workers.TIMEOUT * 2)
+    assert process.exitcode == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_saves_reach_other_processes(invalidation_log):
+    ready, results = spawn.Event(), spawn.Queue()
+    workers = [spawn.Process(target=invalidation_workers.wait_for_invalidation, args=(invalidation_log, ready, results))
+               for _ in range(3)]
+    for worker in workers:
+        ready.clear()
+        worker.start()
+        assert ready.wait(invalidation_workers.TIMEOUT * 2)
+
+    Raffle.objects.create(name='Shared', total_tickets=1, prizes=[])
+    invalidation_bus.publish(RAFFLE, 'r1', 2)
+
+    assert [results.get(timeout=invalidation_workers.TIMEOUT * 2) for _ in workers] == [(None, None)] * 3
+    for worker in workers:
+        worker.join(invalidation_workers.TIMEOUT)
+        assert worker.exitcode == 0
+
+
+def test_events_from_other_processes_are_applied(invalidation_log):
+    invalidation_bus.poll()
+    cache.set('raffle_list', 'stale')
+    raffle_cache.set_local('r1', 1, object(), 0.0)
+
+    run(invalidation_workers.publish, invalidation_log, KEY, 'raffle_list')
+    run(invalidation_workers.publish, invalidation_log, RAFFLE, 'r1', 2)
+
+    assert invalidation_bus.poll() == 2
+    assert cache.get('raffle_list') is None
+    assert 'r1' not in raffle_cache.entries
+
+
+def test_uncommitted_changes_are_not_published(invalidation_log, db):
+    invalidation_bus.poll()
+    raffle = Raffle.objects.create(name='Local', total_tickets=1, prizes=[])
+
+    # The test transaction never commits, so only this process saw the save
+    with sqlite3.connect(invalidation_log) as log:
+        assert log.execute('SELECT COUNT(*) FROM events').fetchone()[0] == 0
+    assert raffle_cache.get(raffle.pk).name == 'Local'
+
+
+def test_current_local_copies_are_kept():
+    raffle_cache.set_local('r1', 3, 'raffle', 0.0)
+
+    raffle_cache.drop('r1', 3)
+    assert 'r1' in raffle_cache.entries
+    raffle_cache.drop('r1', 4)
+    assert 'r1' not in raffle_cache.entries
+
+
+def test_pruned_events_reset_local_caches(invalidation_log):
+    invalidation_bus.poll()
+    cache.set('unrelated', 1)
+    raffle_cache.set_local('r1', 1, 'raffle', 0.0)
+    for n in range(3):
+        run(invalidation_workers.publish, invalidation_log, KEY, f'key{n}')
+    with sqlite3.connect(invalidation_log) as log:
+        log.execute('DELETE FROM events WHERE key = ?', ['key0'])
+
+    invalidation_bus.poll()
+
+    assert cache.get('unrelated') is None
+    assert raffle_cache.entries == {}
+
+
+def test_unknown_backend_is_rejected(settings):
+    settings.RAFFLE_INVALIDATION_BACKEND = 'carrier-pigeon'
+
+    with pytest.raises(ImproperlyConfigured):
+        invalidation_bus.poll()
+
+
+def test_updates_are_published(invalidation_log, db, django_capture_on_commit_callbacks):
+    raffle = Raffle.objects.create(name='Before', total_tickets=1, prizes=[])
+    invalidation_bus.poll()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        raffle.name = 'After'
+        raffle.save()
+
+    with sqlite3.connect(invalidation_log) as log:
+        events = log.execute('SELECT kind, key, version FROM events ORDER BY id').fetchall()
+    assert events == [(KEY, 'raffle_list', None), (RAFFLE, str(raffle.pk), None)]
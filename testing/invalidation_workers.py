@@ -0,0 +1,45 @@
+"""
+Worker processes for the invalidation bus tests.
+
+They run in freshly spawned interpreters, so Django is set up here and not
+imported at module level.
+"""
+import time
+
+TIMEOUT = 10.0  # seconds a worker waits for an invalidation
+
+
+def setup(path):
+    import django
+    django.setup()
+    from django.conf import settings
+    settings.RAFFLE_INVALIDATION_PATH = path
+    settings.RAFFLE_INVALIDATION_POLL_INTERVAL = 0
+
+
+def wait_for_invalidation(path, ready, results):
+    """Cache a raffle list and a raffle stamp, then report once other processes invalidated both."""
+    setup(path)
+    from django.core.cache import cache
+    from raffle.caching import stamp_key
+    from raffle.invalidation import invalidation_bus
+
+    cache.set('raffle_list', 'stale')
+    cache.set(stamp_key('r1'), 1)
+    invalidation_bus.poll()
+    ready.set()
+    deadline = time.monotonic() + TIMEOUT
+    while cache.get('raffle_list') is not None or cache.get(stamp_key('r1')) is not None:
+        if time.monotonic() > deadline:
+            break
+        invalidation_bus.poll()
+        time.sleep(0.01)
+    results.put((cache.get('raffle_list'), cache.get(stamp_key('r1'))))
+
+
+def publish(path, kind, key, version=None):
+    """Publish one event from another process."""
+    setup(path)
+    from raffle.invalidation import invalidation_bus
+
+    invalidation_bus.publish(kind, key, version)
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+
+from raffle.live import publisher, stream_availability
+from raffle.models import Raffle
+from .conftest import unexpected_response_error
+
+
+@pytest.fixture
+def live_settings(settings):
+    settings.RAFFLE_LIVE_INTERVAL = 0.01
+    settings.RAFFLE_LIVE_REFRESH = 60
+    return settings
+
+
+@pytest.fixture
+def raffle_obj():
+    return Raffle.objects.create(name='Live', total_tickets=10, prizes=[{'name': 'hug', 'amount': 1}])
+
+
+def parse_event(message):
+    lines = dict(line.split(': ', 1) for line in message.strip().splitlines())
+    return lines['event'], json.loads(lines['data'])
+
+
+async def next_event(stream):
+    return parse_event(await asyncio.wait_for(stream.__anext__(), 5))
+
+
+async def subscribe(raffle_id):
+    """Start a stream and consume its retry line and initial state."""
+    stream = stream_availability(raffle_id)
+    assert (await stream.__anext__()).startswith('retry: ')
+    return stream, await next_event(stream)
+
+
+def test_events_under_wsgi_send_one_snapshot(client, raffle_obj):
+    resp = client.get(f'/raffles/{raffle_obj.id}/events/')
+
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    assert resp['Content-Type'] == 'text/event-stream'
+    retry, event = b''.join(resp.streaming_content).decode().strip().split('\n\n')
+    assert retry.startswith('retry: ')
+    assert parse_event(event) == ('availability', {'available_tickets': 10, 'winners_drawn': False})
+
+
+def test_events_under_asgi_stream(raffle_obj):
+    async def get():
+        return await AsyncClient().get(f'/raffles/{raffle_obj.id}/events/')
+
+    resp = async_to_sync(get)()
+
+    assert resp.status_code == 200
+    assert resp['Content-Type'] == 'text/event-stream'
+    assert resp.is_async
+
+
+def test_events_for_unknown_raffle(client):
+    assert client.get(f'/raffles/{uuid.uuid4()}/events/').status_code == 404
+
+
+def test_claims_are_coalesced_into_one_read_per_tick(live_settings, raffle_obj):
+    """Many subscribers and several claims in one tick cost a single state read"""
+
+    async def scenario():
+        reads = publisher.reads
+        subscriptions = [await subscribe(raffle_obj.id) for _ in range(50)]
+        assert {state['available_tickets'] for _, (_, state) in subscriptions} == {10}
+        assert publisher.subscriber_count(raffle_obj.id) == 50
+        assert publisher.reads == reads + 1
+
+        def claim_three():
+            for n in range(3):
+                raffle_obj.get_random_ticket(f'10.0.0.{n}', 'code')
+
+        await sync_to_async(claim_three)()
+        for _ in range(3):
+            publisher.notify(raffle_obj.id)
+        events = [await next_event(stream) for stream, _ in subscriptions]
+
+        assert publisher.reads == reads + 2
+        assert all(event == ('availability', {'available_tickets': 7, 'winners_drawn': False}) for event in events)
+
+        for stream, _ in subscriptions:
+            await stream.aclose()
+        assert publisher.subscriber_count(raffle_obj.id) == 0
+
+    async_to_sync(scenario)()
+
+
+def test_unnotified_raffles_are_refreshed(live_settings, raffle_obj):
+    """Claims handled by another process show up after RAFFLE_LIVE_REFRESH"""
+    live_settings.RAFFLE_LIVE_REFRESH = 0.05
+
+    async def scenario():
+        stream, _ = await subscribe(raffle_obj.id)
+        await sync_to_async(raffle_obj.get_random_ticket)('10.0.0.1', 'code')
+
+        assert await next_event(stream) == ('availability', {'available_tickets': 9, 'winners_drawn': False})
+        await stream.aclose()
+
+    async_to_sync(scenario)()
+
+
+def test_streams_close_after_max_age(live_settings, raffle_obj):
+    live_settings.RAFFLE_LIVE_MAX_AGE = 0.05
+
+    async def scenario():
+        stream, _ = await subscribe(raffle_obj.id)
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(stream.__anext__(), 5)
+        assert publisher.subscriber_count(raffle_obj.id) == 0
+
+    async_to_sync(scenario)()
@@ -0,0 +1,89 @@
+"""
+Participant IPs are stored packed but read and filtered as strings.
+"""
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from raffle.exceptions import AlreadyParticipatedException
+from raffle.fields import pack_ip, unpack_ip
+from raffle.models import Raffle, Ticket
+
+BEFORE = [('raffle', '0019_raffle_version')]
+AFTER = [('raffle', '0020_ticket_packed_participant_ip')]
+
+
+@pytest.fixture
+def raffle_obj():
+    return Raffle.objects.create(name='Packed', total_tickets=10, prizes=[{'name': 'hug', 'amount': 1}])
+
+
+def stored_bytes(ticket):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT participant_ip FROM raffle_ticket WHERE id = %s', [ticket.pk])
+        return bytes(cursor.fetchone()[0])
+
+
+@pytest.mark.parametrize('ip, length, canonical', [
+    ('10.0.0.1', 4, '10.0.0.1'),
+    ('::ffff:10.0.0.1', 4, '10.0.0.1'),
+    ('2001:DB8:0:0::1', 16, '2001:db8::1'),
+    ('::1', 16, '::1'),
+])
+def test_pack_round_trip(ip, length, canonical):
+    assert len(pack_ip(ip)) == length
+    assert unpack_ip(pack_ip(ip)) == canonical
+
+
+def test_ips_are_stored_packed_and_read_as_strings(raffle_obj):
+    ticket = raffle_obj.get_random_ticket('2001:db8::1')
+
+    assert stored_bytes(ticket) == pack_ip('2001:db8::1')
+    assert Ticket.objects.get(pk=ticket.pk).participant_ip == '2001:db8::1'
+    assert list(raffle_obj.tickets.filter(participant_ip__isnull=False).values_list('participant_ip', flat=True)) == [
+        '2001:db8::1']
+
+
+def test_lookups_accept_any_spelling(raffle_obj):
+    raffle_obj.get_random_ticket('10.0.0.1')
+    raffle_obj.get_random_ticket('2001:db8::1')
+
+    assert raffle_obj.tickets.filter(participant_ip='::ffff:10.0.0.1').exists()
+    assert raffle_obj.tickets.filter(participant_ip__in=['2001:0db8::0:1', '10.9.9.9']).count() == 1
+    with pytest.raises(AlreadyParticipatedException):
+        raffle_obj.get_random_ticket('2001:DB8:0::1')
+
+
+def test_invalid_ips_are_rejected(raffle_obj):
+    with pytest.raises(ValidationError):
+        list(raffle_obj.tickets.filter(participant_ip='not an ip'))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_packs_existing_ips():
+    executor = MigrationExecutor(connection)
+    latest = executor.loader.graph.leaf_nodes('raffle')
+    executor.migrate(BEFORE)
+    apps = executor.loader.project_state(BEFORE).apps
+    OldRaffle, OldTicket = apps.get_model('raffle', 'Raffle'), apps.get_model('raffle', 'Ticket')
+    raffle = OldRaffle.objects.create(name='Old', total_tickets=3, prizes=[{'name': 'hug', 'amount': 1}])
+    for number, ip in enumerate(['10.0.0.1', '2001:db8::1', None], start=1):
+        OldTicket.objects.create(raffle=raffle, ticket_number=number, participant_ip=ip)
+
+    try:
+        executor = MigrationExecutor(connection)
+        executor.migrate(AFTER)
+        executor.loader.build_graph()
+        tickets = executor.loader.project_state(AFTER).apps.get_model('raffle', 'Ticket').objects.order_by('ticket_number')
+
+        assert [ticket.participant_ip for ticket in tickets] == ['10.0.0.1', '2001:db8::1', None]
+        assert stored_bytes(tickets[1]) == pack_ip('2001:db8::1')
+
+        executor.migrate(BEFORE)
+        executor.loader.build_graph()
+        assert list(OldTicket.objects.order_by('ticket_number').values_list('participant_ip', flat=True)) == [
+            '10.0.0.1', '2001:db8::1', None]
+    finally:
+        executor = MigrationExecutor(connection)
+        executor.migrate(latest)
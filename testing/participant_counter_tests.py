@@ -0,0 +1,146 @@
+import time
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from raffle.counters import participant_counter, reconcile_on_startup, reconcile_participant_counts
+from raffle.models import Raffle
+from .conftest import unexpected_response_error
+
+
+@pytest.fixture
+def raffle_obj():
+    return Raffle.objects.create(name='Counted', total_tickets=10, prizes=[{'name': 'hug', 'amount': 1}])
+
+
+def stored_count(raffle):
+    return Raffle.objects.values_list('participant_count', flat=True).get(pk=raffle.pk)
+
+
+def test_claims_do_not_write_the_raffle_row(raffle_obj):
+    with CaptureQueriesContext(connection) as queries:
+        for n in range(3):
+            raffle_obj.get_random_ticket(f'10.0.0.{n}')
+
+    assert not [query for query in queries if 'UPDATE "raffle_raffle"' in query['sql']]
+    assert stored_count(raffle_obj) == 0
+    assert participant_counter.get_pending(raffle_obj.pk) == 3
+    assert raffle_obj.count_available_tickets() == 7
+
+
+def test_flush_writes_one_update_per_raffle(raffle_obj):
+    other = Raffle.objects.create(name='Other', total_tickets=5, prizes=[{'name': 'hug', 'amount': 1}])
+    for n in range(3):
+        raffle_obj.get_random_ticket(f'10.0.0.{n}')
+    other.get_random_ticket('10.0.0.1')
+
+    with CaptureQueriesContext(connection) as queries:
+        assert participant_counter.flush() == 4
+
+    assert len([query for query in queries if query['sql'].startswith('UPDATE')]) == 2
+    assert (stored_count(raffle_obj), stored_count(other)) == (3, 1)
+    assert participant_counter.get_pending(raffle_obj.pk) == 0
+    raffle_obj.refresh_from_db()
+    assert raffle_obj.count_available_tickets() == 7
+
+
+def test_detail_view_counts_unflushed_claims(client, raffle, get_ticket):
+    get_ticket(raffle['id'])
+    get_ticket(raffle['id'])
+
+    resp = client.get(f"/raffles/{raffle['id']}/")
+
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    assert resp.json()['available_tickets'] == raffle['total_tickets'] - 2
+
+
+def test_batch_size_triggers_a_flush(settings, raffle_obj):
+    settings.RAFFLE_PARTICIPANT_COUNT_FLUSH_BATCH = 2
+    raffle_obj.get_random_ticket('10.0.0.1')
+    assert stored_count(raffle_obj) == 0
+
+    raffle_obj.get_random_ticket('10.0.0.2')
+    assert stored_count(raffle_obj) == 2
+
+
+def test_failed_flush_keeps_the_deltas(raffle_obj):
+    raffle_obj.get_random_ticket('10.0.0.1')
+
+    with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError('locked')):
+        assert participant_counter.flush() == 0
+    assert participant_counter.get_pending(raffle_obj.pk) == 1
+
+    assert participant_counter.flush() == 1
+    assert stored_count(raffle_obj) == 1
+
+
+def test_save_does_not_overwrite_the_count(raffle_obj):
+    raffle_obj.get_random_ticket('10.0.0.1')
+    participant_counter.flush()
+
+    raffle_obj.name = 'Renamed'
+    raffle_obj.save()
+
+    assert stored_count(raffle_obj) == 1
+
+
+def test_reconcile_recounts_drifted_raffles(raffle_obj, capsys):
+    for n in range(4):
+        raffle_obj.get_random_ticket(f'10.0.0.{n}')
+    participant_counter.reset()  # the worker died before flushing
+    untouched = Raffle.objects.create(name='Untouched', total_tickets=5, prizes=[{'name': 'hug', 'amount': 1}])
+
+    assert reconcile_participant_counts() == 1
+    assert (stored_count(raffle_obj), stored_count(untouched)) == (4, 0)
+
+    call_command('reconcile_participant_counts')
+    assert '0 raffle counts corrected' in capsys.readouterr().out
+
+
+def test_reconcile_flushes_pending_claims_first(raffle_obj):
+    for n in range(3):
+        raffle_obj.get_random_ticket(f'10.0.0.{n}')
+
+    reconcile_participant_counts()
+    participant_counter.flush()
+
+    assert stored_count(raffle_obj) == 3
+
+
+def test_reconcile_on_startup_follows_the_setting(settings, raffle_obj):
+    raffle_obj.get_random_ticket('10.0.0.1')
+    participant_counter.reset()
+
+    settings.RAFFLE_RECONCILE_ON_STARTUP = False
+    assert reconcile_on_startup() == 0
+    settings.RAFFLE_RECONCILE_ON_STARTUP = True
+    assert reconcile_on_startup() == 1
+    assert stored_count(raffle_obj) == 1
+
+
+def test_counts_are_only_reconciled_on_request(raffle_obj):
+    # Stands in for a claim still pending in another live worker
+    raffle_obj.get_random_ticket('10.0.0.1')
+    participant_counter.reset()
+
+    assert reconcile_on_startup() == 0
+    call_command('migrate', verbosity=0)
+    assert stored_count(raffle_obj) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_interval_flush_runs_in_the_background(settings, raffle_obj):
+    settings.RAFFLE_PARTICIPANT_COUNT_FLUSH_INTERVAL = 0.05
+    raffle_obj.get_random_ticket('10.0.0.1')
+    raffle_obj.get_random_ticket('10.0.0.2')
+
+    deadline = time.monotonic() + 5
+    while stored_count(raffle_obj) != 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert stored_count(raffle_obj) == 2
+    assert participant_counter.get_pending(raffle_obj.pk) == 0
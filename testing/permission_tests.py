@@ -0,0 +1,47 @@
+from django.test import RequestFactory
+
+from raffle import permissions
+from raffle.permissions import ManagerIpMatcher, is_manager_ip
+
+
+def test_matcher_exact_and_cidr_ranges():
+    """Exact IPs and IPv4/IPv6 CIDR ranges are matched"""
+    matcher = ManagerIpMatcher.from_setting('123.123.123.123, 10.0.0.0/8,2001:db8::/32')
+
+    assert '123.123.123.123' in matcher
+    assert '123.123.123.124' not in matcher
+    assert '10.200.3.4' in matcher
+    assert '11.0.0.0' not in matcher
+    assert '2001:db8::1' in matcher
+    assert '2001:db9::1' not in matcher
+    assert '::ffff:10.1.1.1' in matcher
+
+
+def test_matcher_merges_overlapping_ranges_and_skips_invalid_entries():
+    matcher = ManagerIpMatcher.from_setting('10.0.0.0/24,10.0.0.128/25,10.0.1.0/24,not-an-ip,')
+
+    assert matcher.starts[4] == [int(permissions.ipaddress.ip_address('10.0.0.0'))]
+    assert '10.0.1.255' in matcher
+    assert 'garbage' not in matcher
+    assert None not in matcher
+
+
+def test_matcher_recompiled_on_setting_change(settings):
+    request = RequestFactory().get('/', REMOTE_ADDR='192.168.1.20')
+    settings.MANAGER_IPS = '192.168.1.0/24'
+    assert is_manager_ip(request) is True
+
+    settings.MANAGER_IPS = '127.0.0.2'
+    assert is_manager_ip(RequestFactory().get('/', REMOTE_ADDR='192.168.1.20')) is False
+
+
+def test_is_manager_ip_memoised_per_request(settings, monkeypatch):
+    settings.MANAGER_IPS = '127.0.0.2'
+    request = RequestFactory().get('/', REMOTE_ADDR='127.0.0.2')
+    calls = []
+    matcher = permissions.get_manager_ip_matcher()
+    monkeypatch.setattr(permissions, 'get_manager_ip_matcher', lambda: calls.append(1) or matcher)
+
+    assert is_manager_ip(request) is True
+    assert is_manager_ip(request) is True
+    assert len(calls) == 1
@@ -0,0 +1,65 @@
+"""
+EXPLAIN-based checks that the hot raffle queries use their intended indexes.
+"""
+import re
+
+import pytest
+from django.db import connection
+
+from raffle.models import Raffle, Ticket, Winner
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite', reason='Query plans are checked on SQLite')
+
+RAFFLE_PARTICIPANT_IP_UNIQUE = r'raffle_ticket_raffle_id_participant_ip_\w+_uniq'
+RAFFLE_TICKET_NUMBER_UNIQUE = r'raffle_ticket_raffle_id_ticket_number_\w+_uniq'
+
+
+@pytest.fixture
+def claimed_raffle():
+    raffle = Raffle.objects.create(name='Plans', total_tickets=200, prizes=[{'name': 'hug', 'amount': 1}])
+    for n, ticket_id in enumerate(raffle.tickets.values_list('id', flat=True)[:100]):
+        Ticket.objects.filter(id=ticket_id).update(participant_ip=f'10.0.0.{n}')
+    return raffle
+
+
+def assert_uses_index(queryset, index_pattern):
+    plan = queryset.explain()
+    assert re.search(rf'USING (COVERING )?INDEX {index_pattern}\b', plan), plan
+    assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_available_tickets_use_unique_participant_index(claimed_raffle):
+    """(raffle, participant_ip IS NULL): the NULL range of the unique index is the unclaimed set"""
+    assert_uses_index(claimed_raffle.tickets.filter(participant_ip=None), RAFFLE_PARTICIPANT_IP_UNIQUE)
+
+
+def test_already_participated_uses_unique_participant_index(claimed_raffle):
+    assert_uses_index(claimed_raffle.tickets.filter(participant_ip='10.0.0.1'), RAFFLE_PARTICIPANT_IP_UNIQUE)
+
+
+def test_claim_window_uses_unclaimed_partial_index(claimed_raffle):
+    queryset = claimed_raffle.tickets.filter(
+        participant_ip__isnull=True, ticket_number__gte=100,
+    ).order_by('ticket_number')[:8]
+    assert_uses_index(queryset, 'ticket_unclaimed_idx')
+
+
+def test_eligible_tickets_use_unique_participant_index(claimed_raffle):
+    """(raffle, participant_ip IS NOT NULL, is_winner) is a range scan of the unique index"""
+    queryset = claimed_raffle.tickets.filter(participant_ip__isnull=False, is_winner=False)
+    assert_uses_index(queryset, RAFFLE_PARTICIPANT_IP_UNIQUE)
+
+
+def test_verification_lookup_uses_ticket_number_index(claimed_raffle):
+    from raffle.views import VerifyTicketView
+
+    queryset = Ticket.objects.only(*VerifyTicketView.ticket_fields).filter(raffle=claimed_raffle, ticket_number=5)
+    assert_uses_index(queryset, RAFFLE_TICKET_NUMBER_UNIQUE)
+
+
+def test_winners_by_raffle_use_foreign_key_index(claimed_raffle):
+    assert_uses_index(Winner.objects.filter(raffle=claimed_raffle), r'raffle_winner_raffle_id_\w+')
+
+
+def test_raffle_list_uses_created_at_index(claimed_raffle):
+    assert_uses_index(Raffle.objects.order_by('-created_at', 'id')[:10], 'raffle_created_at_id_idx')
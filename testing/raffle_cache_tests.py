@@ -0,0 +1,86 @@
+"""
+`raffle_cache` serves raffles from a per-process LRU, revalidated against version stamps in the shared cache.
+"""
+import uuid
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test.utils import CaptureQueriesContext
+
+from raffle.caching import raffle_cache, stamp_key
+from raffle.counters import participant_counter
+from raffle.models import Raffle
+
+
+@pytest.fixture
+def raffle_obj():
+    return Raffle.objects.create(name='Cached', total_tickets=5, prizes=[{'name': 'hug', 'amount': 1}])
+
+
+def raffle_queries(queries):
+    return [query['sql'] for query in queries if 'FROM "raffle_raffle"' in query['sql']]
+
+
+def test_raffle_is_loaded_once(client, raffle_obj):
+    url = f'/raffles/{raffle_obj.pk}/verify-ticket/'
+    client.post(url, {'ticket_number': 1, 'verification_code': 'x'})
+
+    with CaptureQueriesContext(connection) as queries:
+        client.post(url, {'ticket_number': 1, 'verification_code': 'x'})
+
+    assert raffle_queries(queries) == []
+
+
+def test_copies_are_private(raffle_obj):
+    first = raffle_cache.get(raffle_obj.pk)
+    first.name = 'Changed'
+
+    assert raffle_cache.get(raffle_obj.pk).name == 'Cached'
+
+
+def test_save_and_bump_version_invalidate(raffle_obj):
+    raffle_cache.get(raffle_obj.pk)
+    raffle_obj.name = 'Renamed'
+    raffle_obj.save()
+    assert raffle_cache.get(raffle_obj.pk).name == 'Renamed'
+
+    raffle_obj.bump_version()
+    assert raffle_cache.get(raffle_obj.pk).version == raffle_obj.version
+
+
+def test_stamps_revalidate_local_copies(raffle_obj, settings):
+    settings.RAFFLE_OBJECT_CACHE_TTL = 0
+    raffle_cache.get(raffle_obj.pk)
+
+    with CaptureQueriesContext(connection) as queries:
+        raffle_cache.get(raffle_obj.pk)
+    assert len(queries) == 0
+
+    # Another process saved the raffle: its stamp is gone from the shared cache
+    Raffle.objects.filter(pk=raffle_obj.pk).update(name='Elsewhere')
+    cache.delete(stamp_key(raffle_obj.pk))
+    assert raffle_cache.get(raffle_obj.pk).name == 'Elsewhere'
+
+
+def test_local_copies_are_bounded(settings):
+    settings.RAFFLE_OBJECT_CACHE_SIZE = 2
+    raffles = [Raffle.objects.create(name=f'R{n}', total_tickets=1, prizes=[]) for n in range(3)]
+    for raffle in raffles:
+        raffle_cache.get(raffle.pk)
+
+    assert list(raffle_cache.entries) == [str(raffles[1].pk), str(raffles[2].pk)]
+
+
+def test_counters_are_read_fresh(raffle_obj):
+    raffle_cache.get(raffle_obj.pk)
+    raffle_obj.get_random_ticket('10.0.0.1')
+    participant_counter.flush()
+
+    assert raffle_cache.get(raffle_obj.pk).participant_count == 1
+
+
+def test_missing_raffles_raise_404():
+    with pytest.raises(Http404):
+        raffle_cache.get_or_404(uuid.uuid4())
@@ -0,0 +1,100 @@
+"""
+Raffle list filters compile to one query without joins and have a normalised cache key.
+"""
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from raffle import search
+from raffle.filters import RaffleFilter
+from raffle.models import Raffle, Ticket, Winner
+from .conftest import unexpected_response_error
+
+
+def names(resp):
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    return sorted(raffle['name'] for raffle in resp.json()['results'])
+
+
+def filter_key(query):
+    return RaffleFilter.from_request(Request(RequestFactory().get('/raffles/', query))).filter_key
+
+
+def draw(raffle, winners):
+    tickets = list(raffle.tickets.all()[:winners])
+    for n, ticket in enumerate(tickets):
+        ticket.participant_ip = f'10.0.0.{n}'
+    Ticket.objects.bulk_update(tickets, ['participant_ip'])
+    Winner.objects.bulk_create([Winner(raffle=raffle, ticket=ticket, prize='hug') for ticket in tickets])
+
+
+def test_winners_drawn_uses_exists_without_duplicates(client):
+    drawn = Raffle.objects.create(name='Drawn', total_tickets=5, prizes=[{'name': 'hug', 'amount': 3}])
+    Raffle.objects.create(name='Open', total_tickets=5, prizes=[{'name': 'hug', 'amount': 3}])
+    draw(drawn, 3)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert names(client.get('/raffles/?winners_drawn=true')) == ['Drawn']
+    sql = ' '.join(query['sql'] for query in queries).upper()
+    assert names(client.get('/raffles/?winners_drawn=false')) == ['Open']
+
+    assert 'EXISTS' in sql and 'DISTINCT' not in sql and 'JOIN "RAFFLE_WINNER"' not in sql
+
+
+def test_filters_combine(client, raffle_factory):
+    raffle_factory(name='Summer fair', total_tickets=10)
+    raffle_factory(name='Summer ball', total_tickets=20)
+    raffle_factory(name='Winter fair', total_tickets=10)
+    today = Raffle.objects.first().created_at.date().isoformat()
+
+    assert names(client.get(f'/raffles/?name=summer&total_tickets=10&created_at={today}')) == ['Summer fair']
+    assert names(client.get('/raffles/?created_at=2000-01-01')) == []
+
+
+def test_name_search_runs_once(client, raffle_factory):
+    raffle_factory(name='Summer fair')
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/raffles/?name=summer')
+
+    listing = [query['sql'] for query in queries if 'LIMIT' in query['sql']]
+    assert len(listing) == 1
+    if connection.vendor == 'sqlite' and search.search_available(connection):
+        assert listing[0].count(' MATCH ') == 1
+
+
+def test_invalid_filter_is_rejected(client):
+    resp = client.get('/raffles/?total_tickets=many')
+
+    assert resp.status_code == 400
+    assert resp.json() == {'detail': 'Invalid raffle filter.'}
+
+
+def test_filter_key_is_normalised():
+    assert filter_key({'name': 'Summer fair', 'total_tickets': '10.0', 'winners_drawn': 'True'}) == (
+        ('name', 'summer fair'), ('total_tickets', '10'), ('winners_drawn', 'true'))
+    assert filter_key({'total_tickets': '10', 'name': 'summer fair', 'created_at': ''}) == (
+        ('name', 'summer fair'), ('total_tickets', '10'))
+    assert filter_key({'page': '2'}) == ()
+
+
+def test_filter_key_keeps_names_without_words_apart(client, raffle_factory):
+    raffle_factory(name='Raffle!')
+    raffle_factory(name='Raffle?')
+    assert filter_key({'name': '!'}) != filter_key({'name': '?'})
+    assert filter_key({'name': ' '}) == ()
+    assert names(client.get('/raffles/', {'name': '!'})) == ['Raffle!']
+    assert names(client.get('/raffles/', {'name': '?'})) == ['Raffle?']
+
+
+def test_equivalent_filters_share_a_cache_entry(client, raffle_factory, settings):
+    settings.DISABLE_TEST_CACHING = False
+    raffle_factory(name='Summer fair', total_tickets=10)
+    first = client.get('/raffles/?name=Summer&total_tickets=10.0')
+
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get('/raffles/?total_tickets=10&name=summer')
+
+    assert second.json() == first.json()
+    assert len(queries) == 0
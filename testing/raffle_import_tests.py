@@ -0,0 +1,100 @@
+import json
+import sqlite3
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from raffle.imports import import_raffles
+from raffle.models import Raffle
+from .conftest import unexpected_response_error
+
+PRIZES = [{"name": "hug", "amount": 2}]
+
+
+def ndjson(*rows):
+    return ''.join((row if isinstance(row, str) else json.dumps(row)) + '\n' for row in rows)
+
+
+def test_import_command_loads_valid_rows_and_reports_errors(tmp_path, capsys):
+    path = tmp_path / 'raffles.ndjson'
+    path.write_text(ndjson(
+        {"name": "Plain", "total_tickets": 20, "prizes": PRIZES},
+        {"name": "Migrated", "total_tickets": 5, "prizes": PRIZES, "tickets": [
+            {"ticket_number": 2, "participant_ip": "10.0.0.1", "verification_code": "secret"},
+            {"ticket_number": 4, "participant_ip": "10.0.0.2"},
+        ]},
+        {"name": "Too many prizes", "total_tickets": 1, "prizes": PRIZES},
+        {"name": "Zero prize", "total_tickets": 5, "prizes": [{"name": "hug", "amount": 0}]},
+        {"name": "Duplicate ip", "total_tickets": 5, "prizes": PRIZES, "tickets": [
+            {"ticket_number": 1, "participant_ip": "10.0.0.1"},
+            {"ticket_number": 2, "participant_ip": "10.0.0.1"},
+        ]},
+        '{"name": broken',
+    ))
+
+    call_command('import_raffles', str(path), batch_size=1)
+
+    out, err = capsys.readouterr()
+    assert '6 rows, 2 raffles and 25 tickets imported, 4 errors' in out
+    assert [line.split(':')[0] for line in err.splitlines()] == ['line 3', 'line 4', 'line 5', 'line 6']
+    assert sorted(Raffle.objects.values_list('name', flat=True)) == ['Migrated', 'Plain']
+
+    migrated = Raffle.objects.get(name='Migrated')
+    assert migrated.count_available_tickets() == 3
+    assert migrated.tickets.get(ticket_number=2).check_verification_code('secret')
+    assert migrated.tickets.get(ticket_number=2).verification_code.startswith('sha256$')
+    assert not migrated.tickets.get(ticket_number=4).check_verification_code('')
+
+
+def test_import_endpoint_accepts_csv(client, manager_ip):
+    upload = SimpleUploadedFile('raffles.csv', (
+        'name,total_tickets,prizes\n'
+        f'"CSV raffle",10,"{json.dumps(PRIZES).replace(chr(34), chr(34) * 2)}"\n'
+    ).encode())
+
+    resp = client.post('/raffles/import/', {'file': upload}, format='multipart', REMOTE_ADDR=manager_ip)
+
+    assert resp.status_code == 201, unexpected_response_error(resp)
+    assert resp.json()['raffles_imported'] == 1
+    raffle = Raffle.objects.get(name='CSV raffle')
+    assert raffle.tickets.count() == 10
+    assert client.get(f'/raffles/{raffle.id}/').json()['available_tickets'] == 10
+
+
+def test_import_endpoint_is_manager_only(client):
+    upload = SimpleUploadedFile('raffles.ndjson', ndjson({"name": "x", "total_tickets": 1, "prizes": PRIZES}).encode())
+
+    resp = client.post('/raffles/import/', {'file': upload}, format='multipart')
+
+    assert resp.status_code == 403, unexpected_response_error(resp)
+    assert not Raffle.objects.exists()
+
+
+def test_imports_invalidate_the_raffle_list_of_every_process(db, invalidation_log, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        import_raffles(ndjson({"name": "Plain", "total_tickets": 2, "prizes": PRIZES}).splitlines(True), 'ndjson')
+
+    with sqlite3.connect(invalidation_log) as log:
+        assert log.execute("SELECT kind, key FROM events").fetchall() == [('key', 'raffle_list')]
+
+
+def test_import_endpoint_rejects_malformed_and_equivalent_tickets(client, manager_ip):
+    upload = SimpleUploadedFile('raffles.ndjson', ndjson(
+        {"name": "Nested", "total_tickets": 5, "prizes": PRIZES, "tickets": [
+            {"ticket_number": [1], "participant_ip": {"ip": "10.0.0.1"}},
+            {"ticket_number": {"n": 2}, "participant_ip": ["10.0.0.2"]},
+        ]},
+        {"name": "Same ip", "total_tickets": 5, "prizes": PRIZES, "tickets": [
+            {"ticket_number": 1, "participant_ip": "::1"},
+            {"ticket_number": 2, "participant_ip": "0::1"},
+        ]},
+    ).encode())
+
+    resp = client.post('/raffles/import/', {'file': upload}, format='multipart', REMOTE_ADDR=manager_ip)
+
+    assert resp.status_code == 400, unexpected_response_error(resp)
+    details = resp.json()['error_details']
+    assert [detail['line'] for detail in details] == [1, 2]
+    assert len(details[0]['errors']) == 4
+    assert details[1]['errors'] == ['tickets[1]: Duplicate participant_ip 0::1.']
+    assert not Raffle.objects.exists()
@@ -1,6 +1,17 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from raffle.exceptions import AlreadyParticipatedException
+from raffle.models import Raffle, Ticket
 from .conftest import unexpected_response_error
 
 
+@pytest.fixture
+def raffle_obj(raffle):
+    return Raffle.objects.get(id=raffle['id'])
+
+
 class TestParticipate:
     def test_get_ticket(self, client, raffle):
         """Get a ticket to participate in a raffle"""
@@ -48,3 +59,46 @@ class TestParticipate:
         resp2 = client.post(f"/raffles/{raffle2['id']}/participate/",
                             REMOTE_ADDR=participant_ip)
         assert resp2.status_code == 201, unexpected_response_error(resp2)
+
+
+def test_claims_hand_out_every_ticket_once(raffle_obj):
+    numbers = [raffle_obj.get_random_ticket(f'10.0.0.{n}').ticket_number for n in range(raffle_obj.total_tickets)]
+
+    assert sorted(numbers) == list(range(1, raffle_obj.total_tickets + 1))
+    assert raffle_obj.get_random_ticket('10.0.1.1') is None
+
+
+def test_claim_skips_tickets_taken_concurrently(raffle_obj, monkeypatch):
+    """A candidate claimed by someone else after it was picked is skipped"""
+    taken = raffle_obj.tickets.order_by('ticket_number').first()
+    Ticket.objects.filter(id=taken.id).update(participant_ip='10.9.9.9')
+    stale_rounds = iter([[(taken.id, taken.ticket_number)]])
+    get_ticket_candidates = Raffle.get_ticket_candidates
+    monkeypatch.setattr(Raffle, 'get_ticket_candidates',
+                        lambda self: next(stale_rounds, None) or get_ticket_candidates(self))
+
+    ticket = raffle_obj.get_random_ticket('10.0.0.1')
+
+    assert ticket.id != taken.id
+    assert Ticket.objects.get(id=ticket.id).participant_ip == '10.0.0.1'
+    assert Ticket.objects.get(id=taken.id).participant_ip == '10.9.9.9'
+
+
+def test_racing_claim_from_same_ip_is_rejected(raffle_obj):
+    """Without the view's pre-check the unique (raffle, participant_ip) constraint still holds"""
+    raffle_obj.get_random_ticket('10.0.0.1')
+
+    with pytest.raises(AlreadyParticipatedException):
+        raffle_obj.get_random_ticket('10.0.0.1')
+    assert raffle_obj.tickets.filter(participant_ip='10.0.0.1').count() == 1
+
+
+def test_claim_is_one_select_and_one_conditional_update(raffle_obj):
+    with CaptureQueriesContext(connection) as queries:
+        ticket = raffle_obj.get_random_ticket('10.0.0.1', 'code')
+
+    statements = [query['sql'] for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']]
+    assert len(statements) == 2, statements
+    assert statements[0].startswith('SELECT')
+    assert statements[1].startswith('UPDATE') and '"participant_ip" IS NULL' in statements[1]
+    assert Ticket.objects.get(id=ticket.id).check_verification_code('code')
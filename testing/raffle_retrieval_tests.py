@@ -1,3 +1,7 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from .conftest import unexpected_response_error
 
 
@@ -25,6 +29,23 @@ def test_raffle_list(client, raffle_factory):
 
 
 
+def test_raffle_list_cache_ignores_unknown_params(client, raffle_factory, settings):
+    """Cache busters share one entry per page, and each page is its own key"""
+    settings.DISABLE_TEST_CACHING = False
+    for n in range(12):
+        raffle_factory(name=f"Raffle {n}")
+    first = client.get("/raffles/?_=1")
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get("/raffles/?_=2&junk=x").json() == first.json()
+    assert len(queries) == 0
+    assert client.get("/raffles/?page=2").json()['results'] != first.json()['results']
+    assert isinstance(cache.get('raffle_list'), str)
+
+    raffle_factory(name="Newest")
+    assert client.get("/raffles/?_=3").json()['results'][0]['name'] == "Newest"
+
+
 def test_raffle_detail(client, raffle_factory, get_ticket):
     """Get raffle details by id counting available tickets"""
 
@@ -43,3 +64,33 @@ def test_raffle_detail(client, raffle_factory, get_ticket):
     assert data2["total_tickets"] == 20
     assert data2["available_tickets"] == 19
     assert data2['winners_drawn'] is False
+
+
+def test_raffle_list_cursor_pagination(client, raffle_factory, django_assert_max_num_queries):
+    """Keyset pagination walks every raffle exactly once without counting"""
+    names = [f"Raffle {n}" for n in range(23)]
+    for name in names:
+        raffle_factory(name=name, total_tickets=10)
+
+    seen = []
+    url = "/raffles/?pagination=cursor"
+    while url:
+        with django_assert_max_num_queries(1 + 2 * 10):
+            resp = client.get(url)
+        assert resp.status_code == 200, unexpected_response_error(resp)
+        data = resp.json()
+        assert 'count' not in data
+        seen.extend(raffle['name'] for raffle in data['results'])
+        url = data['next']
+
+    assert seen == list(reversed(names))
+
+    last_page = client.get("/raffles/?pagination=cursor").json()
+    second = client.get(last_page['next']).json()
+    back = client.get(second['previous']).json()
+    assert [r['id'] for r in back['results']] == [r['id'] for r in last_page['results']]
+
+
+def test_raffle_list_invalid_cursor(client):
+    resp = client.get("/raffles/?cursor=not-a-cursor")
+    assert resp.status_code == 400, unexpected_response_error(resp)
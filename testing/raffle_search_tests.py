@@ -0,0 +1,66 @@
+from django.db import connection
+
+from raffle import search
+from raffle.models import Raffle
+from .conftest import unexpected_response_error
+
+
+def names(resp):
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    return [raffle['name'] for raffle in resp.json()['results']]
+
+
+def test_name_search_prefix_matching(client, raffle_factory):
+    """Every word of the search term is matched as a prefix"""
+    raffle_factory(name="Summer fair")
+    raffle_factory(name="Winter fair")
+    raffle_factory(name="Summertime blues")
+
+    assert sorted(names(client.get("/raffles/?name=sum"))) == ["Summer fair", "Summertime blues"]
+    assert names(client.get("/raffles/?name=sum fai")) == ["Summer fair"]
+    assert names(client.get("/raffles/?name=FAIR win")) == ["Winter fair"]
+    assert names(client.get("/raffles/?name=ummer")) == []
+
+
+def test_name_search_ranks_best_match_first(client, raffle_factory):
+    raffle_factory(name="Car wash fundraiser for the school car park")
+    raffle_factory(name="Car")
+
+    assert names(client.get("/raffles/?name=car")) == ["Car", "Car wash fundraiser for the school car park"]
+
+
+def test_search_index_follows_renames_and_deletes(raffle_factory):
+    raffle = Raffle.objects.get(id=raffle_factory(name="Old name")['id'])
+    raffle.name = "Brand new"
+    raffle.save()
+
+    assert list(search.filter_by_name(Raffle.objects.all(), "brand")) == [raffle]
+    assert not search.filter_by_name(Raffle.objects.all(), "old").exists()
+
+    raffle.delete()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {search.FTS_TABLE}")
+        assert cursor.fetchone()[0] == 0
+
+
+def test_search_index_repaired_after_triggers_dropped(raffle_factory):
+    """Table rebuilds drop the triggers; post_migrate re-installs them and reindexes"""
+    with connection.cursor() as cursor:
+        for name in search.SQLITE_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER {name}")
+    search._available.clear()
+    raffle_factory(name="Written without triggers")
+    assert search.search_available(connection) is False
+    assert search.filter_by_name(Raffle.objects.all(), "written").count() == 1
+
+    search.repair_search_index(sender=None, using=connection.alias)
+
+    assert search.search_available(connection) is True
+    assert search.filter_by_name(Raffle.objects.all(), "without trig").count() == 1
+
+
+def test_search_falls_back_to_icontains(raffle_factory, monkeypatch):
+    raffle_factory(name="Summer fair")
+    monkeypatch.setitem(search._available, connection.alias, False)
+
+    assert search.filter_by_name(Raffle.objects.all(), "ummer").count() == 1
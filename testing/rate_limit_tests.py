@@ -0,0 +1,132 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+from raffle.ratelimit import KEY_PREFIX, CacheBucketStore, RateLimiter, TokenBucket, rate_limiter
+from .conftest import unexpected_response_error
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=2.0, burst=2)
+
+    allowed, state, _ = bucket.take(None, now=100.0)
+    assert allowed
+    allowed, state, _ = bucket.take(state, now=100.0)
+    assert allowed
+    allowed, state, wait = bucket.take(state, now=100.0)
+    assert not allowed
+    assert wait == 0.5
+    allowed, state, _ = bucket.take(state, now=100.5)
+    assert allowed
+
+
+def test_verify_ticket_rate_limited_before_database_work(client, raffle, settings, django_assert_num_queries):
+    """Over-limit requests are rejected with Retry-After without touching the database"""
+    settings.RAFFLE_RATE_LIMITS = {'verify_ticket': {'ip': {'rate': 0.1, 'burst': 1}}}
+    url = f"/raffles/{raffle['id']}/verify-ticket/"
+
+    resp1 = client.post(url, {'ticket_number': 1, 'verification_code': 'abc'})
+    assert resp1.status_code == 400, unexpected_response_error(resp1)
+
+    with django_assert_num_queries(0):
+        resp2 = client.post(url, {'ticket_number': 1, 'verification_code': 'abc'})
+    assert resp2.status_code == 429, unexpected_response_error(resp2)
+    assert resp2['Retry-After'] == '10'
+
+
+def test_participate_per_raffle_override(client, raffle, raffle_factory, settings, ip_factory):
+    """Per-raffle overrides only apply to the configured raffle"""
+    other = raffle_factory()
+    settings.RAFFLE_RATE_LIMIT_OVERRIDES = {
+        raffle['id']: {'participate': {'raffle': {'rate': 0.01, 'burst': 1}}},
+    }
+
+    resp = client.post(f"/raffles/{raffle['id']}/participate/", REMOTE_ADDR='10.0.0.1')
+    assert resp.status_code == 201, unexpected_response_error(resp)
+    resp = client.post(f"/raffles/{raffle['id']}/participate/", REMOTE_ADDR='10.0.0.2')
+    assert resp.status_code == 429, unexpected_response_error(resp)
+    resp = client.post(f"/raffles/{other['id']}/participate/", REMOTE_ADDR='10.0.0.2')
+    assert resp.status_code == 201, unexpected_response_error(resp)
+
+    counters = client.get("/raffles/rate-limits/", REMOTE_ADDR=settings.MANAGER_IPS.split(',')[0]).json()
+    assert counters['participate.allowed'] == 2
+    assert counters['participate.rejected'] == 1
+    assert counters['participate.rejected.raffle'] == 1
+
+
+def test_rate_limit_stats_manager_only(client):
+    resp = client.get("/raffles/rate-limits/", REMOTE_ADDR='8.8.8.8')
+    assert resp.status_code == 403, unexpected_response_error(resp)
+
+
+def test_falls_back_to_local_buckets_when_cache_fails(settings, monkeypatch):
+    settings.RAFFLE_RATE_LIMITS = {'participate': {'ip': {'rate': 0.1, 'burst': 1}, 'raffle': None}}
+
+    def broken(*args, **kwargs):
+        raise ConnectionError('cache down')
+
+    monkeypatch.setattr(rate_limiter.store, 'get_many', broken)
+    assert rate_limiter.check('participate', '10.1.1.1', 'r') is None
+    assert rate_limiter.check('participate', '10.1.1.1', 'r') > 0
+    assert rate_limiter.get_counters()['cache_errors'] == 2
+
+
+class SlowCacheBucketStore(CacheBucketStore):
+    def get_many(self, keys):
+        states = super().get_many(keys)
+        time.sleep(0.005)  # widen the window between reading and writing a bucket
+        return states
+
+
+def test_workers_sharing_the_cache_never_take_more_than_the_burst(settings):
+    settings.RAFFLE_RATE_LIMITS = {'participate': {'ip': {'rate': 0.001, 'burst': 3}, 'raffle': None}}
+    # Separate limiters stand in for worker processes: only the cache is shared between them
+    workers = [RateLimiter(store=SlowCacheBucketStore()) for _ in range(4)]
+    results = []
+
+    def claim(limiter):
+        for _ in range(3):
+            results.append(limiter.check('participate', '10.1.1.2', 'r'))
+
+    threads = [threading.Thread(target=claim, args=(limiter,)) for limiter in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(None) == 3
+    assert sum(limiter.get_counters().get('participate.rejected', 0) for limiter in workers) == 9
+
+
+def test_allows_while_another_worker_holds_the_bucket(settings):
+    settings.RAFFLE_RATE_LIMITS = {'participate': {'ip': {'rate': 1, 'burst': 5}, 'raffle': None}}
+    cache.add(f'{KEY_PREFIX}:participate:ip:10.1.1.3:lock', 'other', 60)
+    assert rate_limiter.check('participate', '10.1.1.3', 'r') is None
+    assert rate_limiter.get_counters()['lock_timeouts'] == 1
+
+
+class BlockingCacheBucketStore(CacheBucketStore):
+    def __init__(self, blocked_key):
+        self.blocked_key, self.entered, self.release = blocked_key, threading.Event(), threading.Event()
+
+    def get_many(self, keys):
+        if self.blocked_key in keys:
+            self.entered.set()
+            self.release.wait(5)
+        return super().get_many(keys)
+
+
+def test_requests_for_other_buckets_do_not_wait(settings):
+    settings.RAFFLE_RATE_LIMITS = {'participate': {'ip': {'rate': 1, 'burst': 5}, 'raffle': None}}
+    store = BlockingCacheBucketStore(f'{KEY_PREFIX}:participate:ip:10.1.1.4')
+    limiter = RateLimiter(store=store)
+    slow = threading.Thread(target=limiter.check, args=('participate', '10.1.1.4', 'r'))
+    slow.start()
+    try:
+        assert store.entered.wait(5)
+        started = time.monotonic()
+        assert limiter.check('participate', '10.1.1.5', 'r') is None
+        assert time.monotonic() - started < 1
+    finally:
+        store.release.set()
+        slow.join()
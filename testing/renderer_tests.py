@@ -0,0 +1,74 @@
+"""
+`FragmentJSONRenderer` renders the same bytes as DRF's `JSONRenderer` and splices cached fragments.
+"""
+import datetime
+import decimal
+import uuid
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from raffle.models import Raffle
+from raffle.renderers import Fragment, FragmentJSONRenderer, encode
+from .conftest import unexpected_response_error
+
+PAYLOAD = {
+    'id': uuid.UUID('6f1c1d34-9d8c-4f6e-9b8e-4e0c1f0b2a11'),
+    'name': 'Ünïcode "quoted" \u2028 \u2029 ✓',
+    'created_at': datetime.datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+    'amount': decimal.Decimal('1.50'),
+    'prizes': [{'name': 'hug', 'amount': 2}, {'name': None, 'amount': 0}],
+    'drawn': False,
+}
+
+
+@pytest.mark.parametrize('backend', ['json', 'orjson'])
+def test_renders_like_drf(settings, backend):
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+    settings.RAFFLE_JSON_ENCODER = backend
+
+    assert FragmentJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+    assert (FragmentJSONRenderer().render(PAYLOAD, 'application/json; indent=4')
+            == JSONRenderer().render(PAYLOAD, 'application/json; indent=4'))
+
+
+def test_fragments_are_spliced_verbatim():
+    prizes = Fragment.encode(PAYLOAD['prizes'])
+    data = {'raffle': {'name': 'a:0', 'prizes': prizes}, 'all': [prizes, Fragment(b'{}')]}
+
+    assert encode(data) == JSONRenderer().render({
+        'raffle': {'name': 'a:0', 'prizes': PAYLOAD['prizes']}, 'all': [PAYLOAD['prizes'], {}]})
+    assert FragmentJSONRenderer().render(prizes) == prizes.encoded
+
+
+def test_unknown_backend_is_rejected(settings):
+    settings.RAFFLE_JSON_ENCODER = 'yaml'
+
+    with pytest.raises(ImproperlyConfigured):
+        encode({})
+
+
+def test_drawn_winners_are_served_from_their_fragment(client, raffle, get_ticket, manager_ip):
+    url = f"/raffles/{raffle['id']}/winners/"
+    assert client.get(url).json() == []
+    for _ in range(raffle['total_tickets']):
+        get_ticket(raffle['id'])
+    drawn = client.post(url, REMOTE_ADDR=manager_ip)
+    assert drawn.status_code == 201, unexpected_response_error(drawn)
+
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url)
+
+    assert first.json() == drawn.json()
+    assert second.content == first.content
+    assert len(queries) == 0  # the raffle and its version come from raffle_cache
+
+    obj = Raffle.objects.get(pk=raffle['id'])
+    obj.name = 'Renamed'
+    obj.save()
+    assert {winner['raffle'] for winner in client.get(url).json()} == {'Renamed'}
@@ -0,0 +1,81 @@
+"""
+`?fields=` and `?exclude=` narrow the raffle, ticket and winner responses.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from raffle.models import Raffle, Ticket
+from raffle.serializers import RaffleSerializer, TicketSerializer, parse_fieldset
+from .conftest import unexpected_response_error
+
+
+def test_parse_fieldset_normalises_names():
+    assert parse_fieldset({'fields': ' name, id,,name'}) == (('id', 'name'), ())
+    assert parse_fieldset({'exclude': 'prizes'}) == (None, ('prizes',))
+    assert parse_fieldset({}) == (None, ())
+
+
+def test_list_skips_computed_fields(client, raffle):
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get('/raffles/?fields=id,name')
+
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    assert resp.json()['results'] == [{'id': raffle['id'], 'name': raffle['name']}]
+    assert not [query for query in queries if 'raffle_winner' in query['sql']]
+
+
+def test_detail_excludes_fields(client, raffle):
+    resp = client.get(f"/raffles/{raffle['id']}/?exclude=prizes,winners_drawn")
+
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    assert list(resp.json()) == ['id', 'name', 'total_tickets', 'created_at', 'available_tickets']
+
+
+def test_unknown_fields_are_ignored(client, raffle):
+    resp = client.get(f"/raffles/{raffle['id']}/?fields=name,nonexistent")
+
+    assert resp.json() == {'name': raffle['name']}
+
+
+def test_nested_ticket_keeps_its_fields(client, raffle, get_ticket, manager_ip):
+    for _ in range(raffle['total_tickets']):
+        get_ticket(raffle['id'])
+    client.post(f"/raffles/{raffle['id']}/winners/", REMOTE_ADDR=manager_ip)
+
+    resp = client.get(f"/raffles/{raffle['id']}/winners/?fields=ticket,prize")
+
+    assert resp.status_code == 200, unexpected_response_error(resp)
+    winner = resp.json()[0]
+    assert list(winner) == ['ticket', 'prize']
+    assert list(winner['ticket']) == ['id', 'raffle_id', 'ticket_number', 'verification_code', 'participant_ip']
+
+
+def test_participation_honours_the_fieldset(client, raffle):
+
+    resp = client.post(f"/raffles/{raffle['id']}/participate/?fields=ticket_number", REMOTE_ADDR='10.0.0.1')
+
+    assert resp.status_code == 201, unexpected_response_error(resp)
+    assert resp.json() == {'ticket_number': Ticket.objects.get(participant_ip='10.0.0.1').ticket_number}
+
+
+def test_serializer_keyword_arguments(raffle):
+    obj = Raffle.objects.get(pk=raffle['id'])
+
+    assert RaffleSerializer(obj, fields=['id', 'winners_drawn']).data == {'id': raffle['id'], 'winners_drawn': False}
+    assert 'prizes' not in RaffleSerializer([obj], many=True, exclude=['prizes']).data[0]
+    assert 'verification_code' not in TicketSerializer(fields=['id']).fields
+
+
+def test_cached_list_varies_by_fieldset(client, raffle, settings):
+    settings.DISABLE_TEST_CACHING = False
+
+    full = client.get('/raffles/')
+    narrow = client.get('/raffles/?fields=name,id')
+    reordered = client.get('/raffles/?fields=id,name')
+    Raffle.objects.filter(pk=raffle['id']).update(name='Renamed')  # bypasses the invalidating signal
+
+    assert full.status_code == narrow.status_code == 200, unexpected_response_error(full)
+    assert list(full.json()['results'][0]) == list(RaffleSerializer.Meta.fields)
+    assert narrow.json()['results'] == [{'id': raffle['id'], 'name': raffle['name']}]
+    assert reordered.json() == narrow.json() == client.get('/raffles/?fields=id,name').json()
+    assert client.get('/raffles/').json() == full.json()
@@ -0,0 +1,93 @@
+"""
+Verification codes are stored as compact versioned digests, with older password hashes still accepted.
+"""
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from raffle.digests import DIGEST_PASSWORD_HASH, DIGEST_SHA256, check_digest, make_digest, pack_digest, unpack_digest
+from raffle.models import Raffle, Ticket
+
+BEFORE = [('raffle', '0020_ticket_packed_participant_ip')]
+AFTER = [('raffle', '0021_ticket_verification_digest')]
+
+
+@pytest.fixture
+def raffle_obj():
+    return Raffle.objects.create(name='Digests', total_tickets=10, prizes=[{'name': 'hug', 'amount': 1}])
+
+
+def stored_bytes(ticket):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT verification_code FROM raffle_ticket WHERE id = %s', [ticket.pk])
+        return bytes(cursor.fetchone()[0])
+
+
+def test_claims_store_a_49_byte_digest(raffle_obj):
+    ticket = raffle_obj.get_random_ticket('10.0.0.1', 'secret')
+    ticket = Ticket.objects.get(pk=ticket.pk)
+
+    record = stored_bytes(ticket)
+    assert record[0] == DIGEST_SHA256 and len(record) == 49
+    assert ticket.verification_code.startswith('sha256$')
+    assert ticket.check_verification_code('secret')
+    assert not ticket.check_verification_code('Secret')
+
+
+def test_digests_are_salted():
+    first, second = make_digest('secret'), make_digest('secret')
+
+    assert first != second
+    assert check_digest('secret', first) and check_digest('secret', second)
+
+
+@pytest.mark.parametrize('encoded', [make_digest('secret'), 'md5$salt$abc', 'sha256$nothex$nothex', '!unusable'])
+def test_pack_round_trip(encoded):
+    assert unpack_digest(pack_digest(encoded)) == encoded
+
+
+def test_password_hashes_are_still_accepted(raffle_obj):
+    hashed = make_password('secret')
+    ticket = raffle_obj.tickets.first()
+    ticket.verification_code = hashed
+    ticket.save()
+
+    assert stored_bytes(ticket)[0] == DIGEST_PASSWORD_HASH
+    assert Ticket.objects.get(pk=ticket.pk).check_verification_code('secret')
+
+
+def test_unknown_versions_are_rejected():
+    with pytest.raises(ValueError):
+        unpack_digest(b'\x07abc')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_packs_existing_hashes():
+    hashed = make_password('secret')
+    executor = MigrationExecutor(connection)
+    latest = executor.loader.graph.leaf_nodes('raffle')
+    executor.migrate(BEFORE)
+    apps = executor.loader.project_state(BEFORE).apps
+    OldRaffle, OldTicket = apps.get_model('raffle', 'Raffle'), apps.get_model('raffle', 'Ticket')
+    raffle = OldRaffle.objects.create(name='Old', total_tickets=2, prizes=[{'name': 'hug', 'amount': 1}])
+    OldTicket.objects.create(raffle=raffle, ticket_number=1, verification_code=hashed)
+    OldTicket.objects.create(raffle=raffle, ticket_number=2)
+
+    try:
+        executor = MigrationExecutor(connection)
+        executor.migrate(AFTER)
+        executor.loader.build_graph()
+        tickets = executor.loader.project_state(AFTER).apps.get_model('raffle', 'Ticket').objects.order_by('ticket_number')
+
+        assert [ticket.verification_code for ticket in tickets] == [hashed, None]
+        assert stored_bytes(tickets[0]) == pack_digest(hashed)
+        assert check_digest('secret', tickets[0].verification_code)
+
+        executor.migrate(BEFORE)
+        executor.loader.build_graph()
+        assert list(OldTicket.objects.order_by('ticket_number').values_list('verification_code', flat=True)) == [
+            hashed, None]
+    finally:
+        executor = MigrationExecutor(connection)
+        executor.migrate(latest)
@@ -1,6 +1,21 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from raffle.models import Raffle, Ticket
 from .conftest import unexpected_response_error
 
 
+def sold_out_raffle(total_tickets, winners):
+    raffle = Raffle.objects.create(name='Sold out', total_tickets=total_tickets,
+                                   prizes=[{'name': 'hug', 'amount': winners}])
+    tickets = list(raffle.tickets.all())
+    for n, ticket in enumerate(tickets):
+        ticket.participant_ip = f'10.0.{n >> 8}.{n & 255}'
+    Ticket.objects.bulk_update(tickets, ['participant_ip'])
+    return raffle
+
+
 def test_draw_winners_untrusted_ip(client, raffle, get_ticket):
     """Can't draw winners from non-manager ip address"""
 
@@ -72,3 +87,27 @@ def test_verify_winning_tickets_winners_not_drawn(client, raffle, manager_ip,
                        REMOTE_ADDR=manager_ip)
     assert resp.status_code == 400, unexpected_response_error(resp)
     assert b"Winners for the raffle have not been drawn yet" in resp.content
+
+
+@pytest.mark.parametrize('method', ['post', 'get'])
+def test_winner_queries_do_not_grow_with_winners(client, manager_ip, method):
+    """Drawing and listing winners take the same number of queries for 3 or 30 winners"""
+    query_counts = []
+    for winners in (3, 30):
+        raffle = sold_out_raffle(40, winners)
+        url = f"/raffles/{raffle.id}/winners/"
+        if method == 'get':
+            client.post(url, REMOTE_ADDR=manager_ip)
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = getattr(client, method)(url, REMOTE_ADDR=manager_ip)
+
+        assert resp.status_code in (200, 201), unexpected_response_error(resp)
+        wins = resp.json()
+        assert len(wins) == winners
+        assert {win['ticket_number'] for win in wins} == set(
+            raffle.tickets.filter(is_winner=True).values_list('ticket_number', flat=True))
+        assert all(win['ticket']['raffle_id'] == str(raffle.id) for win in wins)
+        query_counts.append(len(queries))
+
+    assert query_counts[0] == query_counts[1]